@@ -1,4 +1,7 @@
 from .engine import BacktestEngine, BacktestResult
+from .ledger import TradeLedger
+from .runner import BatchBacktestRunner
+from .portfolio import PortfolioBacktestEngine
+from .streaming import ChunkedBacktestEngine
 
-__all__ = ['BacktestEngine', 'BacktestResult']
-
+__all__ = ['BacktestEngine', 'BacktestResult', 'TradeLedger', 'BatchBacktestRunner', 'PortfolioBacktestEngine', 'ChunkedBacktestEngine']
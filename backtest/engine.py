@@ -2,13 +2,18 @@
 回测引擎 - 基于 Hikyuu
 """
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import pandas as pd
 import numpy as np
-from strategy.base import BaseStrategy, SignalType
+from strategy.base import BaseStrategy, SignalType, iter_bars
 from config.settings import BacktestConfig
+from backtest.kernel import simulate_fills, day_ids
+from backtest.ledger import TradeLedger
+from backtest import metrics
 from utils.logger import log
 
+_SIGNAL_CODES = {SignalType.BUY: 1, SignalType.SELL: -1, SignalType.HOLD: 0}
+
 
 @dataclass
 class BacktestResult:
@@ -20,7 +25,50 @@ class BacktestResult:
     win_rate: float  # 胜率
     trade_count: int  # 交易次数
     equity_curve: pd.Series  # 净值曲线
-    trades: List[Dict]  # 交易记录
+    trades: TradeLedger  # 交易记录
+    sortino_ratio: float = 0.0  # 索提诺比率
+    calmar_ratio: float = 0.0  # 卡玛比率
+    max_drawdown_duration: int = 0  # 最长回撤持续K线数
+    profit_factor: float = 0.0  # 盈亏比
+    turnover: float = 0.0  # 年化换手率
+
+
+def collect_signals(
+    strategy: BaseStrategy,
+    data: pd.DataFrame,
+    symbol: str,
+    vectorized: bool = True
+) -> Tuple[np.ndarray, Dict[int, str]]:
+    """
+    计算整段行情的信号数组
+    
+    优先使用策略的 generate_signals（向量化）；否则逐K线计算，
+    实现了流式接口的策略每根K线只做增量更新，其余策略每根K线传入截至当前的全部数据。
+    
+    Returns:
+        (信号数组 1/-1/0, {K线序号: 触发原因})，向量化模式下原因由 strategy.signal_reason 提供
+    """
+    if vectorized:
+        signals = strategy.generate_signals(data)
+        if signals is not None:
+            return np.asarray(signals, dtype=np.int8), {}
+    
+    signals = np.zeros(len(data), dtype=np.int8)
+    reasons = {}
+    if strategy.supports_streaming:
+        strategy.reset_state(symbol)
+        for i, bar in enumerate(iter_bars(data)):
+            signal = strategy.on_new_bar(bar, symbol)
+            if i > 0 and signal.signal_type != SignalType.HOLD:
+                signals[i] = _SIGNAL_CODES[signal.signal_type]
+                reasons[i] = signal.reason
+    else:
+        for i in range(1, len(data)):
+            signal = strategy.calculate_signals(data.iloc[:i+1], symbol)
+            if signal.signal_type != SignalType.HOLD:
+                signals[i] = _SIGNAL_CODES[signal.signal_type]
+                reasons[i] = signal.reason
+    return signals, reasons
 
 
 class BacktestEngine:
@@ -28,20 +76,22 @@ class BacktestEngine:
     回测引擎
     
     支持两种模式：
-    1. 简易模式：使用内置回测逻辑
+    1. 简易模式：使用内置回测逻辑（策略实现 generate_signals 时自动向量化，
+       成交统一由 backtest.kernel 按A股规则模拟）
     2. Hikyuu模式：使用Hikyuu进行专业回测
     """
     
     def __init__(self, config: BacktestConfig = None):
         self.config = config or BacktestConfig()
-        self.trades: List[Dict] = []
+        self.trades = TradeLedger()
         self.equity_curve: List[float] = []
     
     def run(
         self,
         strategy: BaseStrategy,
         data: pd.DataFrame,
-        symbol: str
+        symbol: str,
+        vectorized: bool = True
     ) -> BacktestResult:
         """
         运行回测
@@ -50,123 +100,103 @@ class BacktestEngine:
             strategy: 策略实例
             data: 历史数据
             symbol: 股票代码
+            vectorized: 策略实现了 generate_signals 时使用向量化模式，
+                        否则回退到逐K线模式（优先使用策略的流式接口）
         """
-        log.info(f"开始回测 {strategy.name} 策略，标的: {symbol}")
+        log.info("开始回测 {} 策略，标的: {}", strategy.name, symbol)
         
-        capital = self.config.initial_capital
-        position = 0
-        entry_price = 0
-        self.trades = []
-        equity_values = []
+        signals, reasons = collect_signals(strategy, data, symbol, vectorized)
+        volume = data["volume"].to_numpy() if "volume" in data.columns else None
+        fills = simulate_fills(
+            signals,
+            data["close"].to_numpy(),
+            volume,
+            day_ids(data.index),
+            self.config
+        )
         
-        for i in range(len(data)):
-            current_data = data.iloc[:i+1]
-            if len(current_data) < 2:
-                equity_values.append(capital)
-                continue
-            
-            current_price = current_data["close"].iloc[-1]
-            signal = strategy.calculate_signals(current_data, symbol)
-            
-            # 处理买入信号
-            if signal.signal_type == SignalType.BUY and position == 0:
-                # 计算可买数量（考虑手续费）
-                available = capital * (1 - self.config.commission_rate)
-                quantity = int(available / current_price / 100) * 100
-                
-                if quantity > 0:
-                    cost = quantity * current_price * (1 + self.config.commission_rate)
-                    capital -= cost
-                    position = quantity
-                    entry_price = current_price
-                    
-                    self.trades.append({
-                        "date": current_data.index[-1],
-                        "action": "BUY",
-                        "price": current_price,
-                        "quantity": quantity,
-                        "reason": signal.reason
-                    })
-                    log.debug(f"买入 {symbol}: {quantity}股 @ {current_price}")
-            
-            # 处理卖出信号
-            elif signal.signal_type == SignalType.SELL and position > 0:
-                revenue = position * current_price * (1 - self.config.commission_rate)
-                capital += revenue
-                
-                profit = (current_price - entry_price) / entry_price
-                self.trades.append({
-                    "date": current_data.index[-1],
-                    "action": "SELL",
-                    "price": current_price,
-                    "quantity": position,
-                    "profit": profit,
-                    "reason": signal.reason
-                })
-                log.debug(f"卖出 {symbol}: {position}股 @ {current_price}, 收益: {profit:.2%}")
-                position = 0
-            
-            # 计算当前净值
-            current_equity = capital + position * current_price
-            equity_values.append(current_equity)
+        self.trades = TradeLedger(len(fills.trades["bar"]))
+        self.record_fills(self.trades, fills.trades, data.index, reasons, strategy, symbol)
+        log.debug("{} 成交 {} 笔", symbol, len(self.trades))
         
         # 计算回测指标
-        equity_curve = pd.Series(equity_values, index=data.index)
+        equity_curve = pd.Series(fills.equity, index=data.index)
         result = self._calculate_metrics(equity_curve)
         
-        log.info(f"回测完成 - 总收益: {result.total_return:.2%}, 夏普: {result.sharpe_ratio:.2f}, 最大回撤: {result.max_drawdown:.2%}")
+        log.info("回测完成 - 总收益: {:.2%}, 夏普: {:.2f}, 最大回撤: {:.2%}", result.total_return, result.sharpe_ratio, result.max_drawdown)
         return result
     
+    @staticmethod
+    def record_fills(
+        ledger: TradeLedger,
+        trades: Dict[str, np.ndarray],
+        index: pd.Index,
+        reasons: Dict[int, str],
+        strategy: BaseStrategy,
+        symbol: str
+    ):
+        """把成交内核的成交数组写入成交记录，原因优先取逐K线信号的原因，否则取策略的默认原因"""
+        side = trades["side"]
+        buy_code = ledger.reason_code(strategy.signal_reason(SignalType.BUY))
+        sell_code = ledger.reason_code(strategy.signal_reason(SignalType.SELL))
+        reason = np.where(side > 0, buy_code, sell_code).astype(np.int16)
+        if reasons:
+            for k, bar in enumerate(trades["signal_bar"]):
+                text = reasons.get(int(bar))
+                if text:
+                    reason[k] = ledger.reason_code(text)
+        
+        timestamp = index.values[trades["bar"]].astype("datetime64[ns]").astype(np.int64)
+        ledger.extend(
+            timestamp, side, trades["price"], trades["quantity"],
+            trades["fee"], trades["profit"], reason, symbol
+        )
+    
     def _calculate_metrics(self, equity_curve: pd.Series) -> BacktestResult:
         """计算回测指标"""
-        returns = equity_curve.pct_change().dropna()
-        
-        # 总收益率
-        total_return = (equity_curve.iloc[-1] - equity_curve.iloc[0]) / equity_curve.iloc[0]
-        
-        # 年化收益率
+        equity = equity_curve.to_numpy(dtype=np.float64)
         days = (equity_curve.index[-1] - equity_curve.index[0]).days
-        annual_return = (1 + total_return) ** (365 / max(days, 1)) - 1
-        
-        # 夏普比率 (假设无风险利率3%)
-        risk_free_rate = 0.03
-        excess_returns = returns - risk_free_rate / 252
-        sharpe_ratio = np.sqrt(252) * excess_returns.mean() / (excess_returns.std() + 1e-10)
+        periods = metrics.periods_per_year(day_ids(equity_curve.index))
+        values = metrics.compute_metrics(equity, days, periods_per_year=periods)
         
-        # 最大回撤
-        cummax = equity_curve.cummax()
-        drawdown = (equity_curve - cummax) / cummax
-        max_drawdown = abs(drawdown.min())
-        
-        # 胜率
-        profitable_trades = [t for t in self.trades if t.get("profit", 0) > 0]
-        sell_trades = [t for t in self.trades if t["action"] == "SELL"]
-        win_rate = len(profitable_trades) / max(len(sell_trades), 1)
+        # 交易类指标：胜率/盈亏比按平仓收益率，换手率按成交金额
+        profits = self.trades.closed_profits()
+        traded = self.trades.traded_value()
         
         return BacktestResult(
-            total_return=total_return,
-            annual_return=annual_return,
-            sharpe_ratio=sharpe_ratio,
-            max_drawdown=max_drawdown,
-            win_rate=win_rate,
+            total_return=float(values["total_return"]),
+            annual_return=float(values["annual_return"]),
+            sharpe_ratio=float(values["sharpe_ratio"]),
+            max_drawdown=float(values["max_drawdown"]),
+            win_rate=metrics.win_rate(profits),
             trade_count=len(self.trades),
             equity_curve=equity_curve,
-            trades=self.trades
+            trades=self.trades,
+            sortino_ratio=float(values["sortino_ratio"]),
+            calmar_ratio=float(values["calmar_ratio"]),
+            max_drawdown_duration=int(values["max_drawdown_duration"]),
+            profit_factor=metrics.profit_factor(profits),
+            turnover=metrics.turnover(traded, equity, periods)
         )
     
-    def run_with_hikyuu(self, strategy: BaseStrategy, symbol: str) -> BacktestResult:
+    def run_with_hikyuu(self, strategy: BaseStrategy, data: pd.DataFrame, symbol: str) -> BacktestResult:
         """
-        使用Hikyuu进行回测（需要先初始化Hikyuu）
+        使用Hikyuu进行回测，未安装Hikyuu时回退到内置回测引擎
         
-        这里提供接口，具体实现需要根据Hikyuu的API进行适配
+        Args:
+            strategy: 策略实例（实现 hikyuu_signal 时使用原生 Hikyuu 指标，否则使用策略计算的信号）
+            data: 历史数据
+            symbol: 股票代码
         """
         try:
-            import hikyuu as hku
-            # TODO: 实现Hikyuu回测逻辑
-            # hku.init()
-            # ...
-            log.info("Hikyuu回测模式（待实现）")
+            from backtest import hikyuu_adapter
         except ImportError:
             log.warning("Hikyuu未安装，使用内置回测引擎")
+            return self.run(strategy, data, symbol)
+        
+        log.info("开始Hikyuu回测 {} 策略，标的: {}", strategy.name, symbol)
+        equity, self.trades = hikyuu_adapter.run(strategy, data, symbol, self.config)
+        result = self._calculate_metrics(pd.Series(equity, index=data.index))
         
-        return None
+        log.info("Hikyuu回测完成 - 总收益: {:.2%}, 夏普: {:.2f}, 最大回撤: {:.2%}", result.total_return, result.sharpe_ratio, result.max_drawdown)
+        return result
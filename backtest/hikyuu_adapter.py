@@ -0,0 +1,123 @@
+"""
+Hikyuu 回测适配器
+
+行情 DataFrame 载入为 Hikyuu 临时 Stock，策略转换为 Hikyuu 信号指示器
+（策略实现了 hikyuu_signal 时直接使用，否则用策略计算出的信号数组构造 SG_Bool），
+由 Hikyuu 的 C++ 交易系统（SYS_Simple）撮合，成交记录和资金曲线再转换回本项目的格式。
+
+费用、滑点和仓位规则按 BacktestConfig 映射到 Hikyuu 组件（TC_FixedA2017 / SL_FixedPercent / MM_FixedPercent），
+信号K线收盘价成交，与内置引擎一致；整手、T+1 等细则以 Hikyuu 的实现为准。
+"""
+from typing import Tuple
+import numpy as np
+import pandas as pd
+import hikyuu as hku
+from backtest.ledger import TradeLedger
+from strategy.base import BaseStrategy, SignalType
+from config.settings import BacktestConfig
+
+
+def split_symbol(symbol: str) -> Tuple[str, str]:
+    """股票代码拆分为 (市场, 6位代码)，如 sh600000 -> ("SH", "600000")"""
+    code = symbol[-6:]
+    prefix = symbol[:-6].strip(".").upper()
+    if prefix in ("SH", "SZ", "BJ"):
+        return prefix, code
+    if code.startswith(("6", "9", "5")):
+        return "SH", code
+    if code.startswith(("4", "8")):
+        return "BJ", code
+    return "SZ", code
+
+
+def to_kdata(data: pd.DataFrame, symbol: str):
+    """行情 DataFrame 转换为 Hikyuu KData（临时 Stock，不写入 Hikyuu 数据库）"""
+    market, code = split_symbol(symbol)
+    volume = data["volume"] if "volume" in data.columns else pd.Series(0.0, index=data.index)
+    amount = data["amount"] if "amount" in data.columns else data["close"] * volume
+    
+    records = []
+    for ts, o, h, l, c, a, v in zip(data.index, data["open"], data["high"], data["low"], data["close"], amount, volume):
+        record = hku.KRecord()
+        record.datetime = hku.Datetime(pd.Timestamp(ts).to_pydatetime())
+        record.open = float(o)
+        record.high = float(h)
+        record.low = float(l)
+        record.close = float(c)
+        record.amount = float(a)
+        record.volume = float(v)
+        records.append(record)
+    
+    stock = hku.Stock(market, code, symbol)
+    stock.set_krecord_list(records)
+    return stock.get_kdata(hku.Query(0))
+
+
+def to_signal(strategy: BaseStrategy, data: pd.DataFrame, symbol: str):
+    """策略转换为 Hikyuu 信号指示器"""
+    sg = strategy.hikyuu_signal(hku)
+    if sg is not None:
+        return sg
+    
+    from backtest.engine import collect_signals
+    signals, _ = collect_signals(strategy, data, symbol)
+    buy = hku.PRICELIST((signals > 0).astype(np.float64).tolist())
+    sell = hku.PRICELIST((signals < 0).astype(np.float64).tolist())
+    return hku.SG_Bool(buy, sell)
+
+
+def build_system(strategy: BaseStrategy, data: pd.DataFrame, symbol: str, config: BacktestConfig, start):
+    """组装 Hikyuu 交易系统"""
+    tm = hku.crtTM(
+        date=start,
+        init_cash=config.initial_capital,
+        cost_func=hku.TC_FixedA2017(
+            commission=config.commission_rate,
+            lowest_commission=config.min_commission,
+            stamptax=config.stamp_duty,
+            transferfee=0.0
+        )
+    )
+    # 无止损时每股风险即买入价，按可用资金（扣除费用和滑点的余量）满仓买入
+    mm = hku.MM_FixedPercent(1 / (1 + config.commission_rate + config.slippage))
+    system = hku.SYS_Simple(
+        tm=tm,
+        sg=to_signal(strategy, data, symbol),
+        mm=mm,
+        sl=hku.SL_FixedPercent(config.slippage)
+    )
+    # 信号K线当根成交（默认为下一根K线开盘）
+    system.set_param("buy_delay", False)
+    system.set_param("sell_delay", False)
+    return system
+
+
+def run(strategy: BaseStrategy, data: pd.DataFrame, symbol: str, config: BacktestConfig) -> Tuple[np.ndarray, TradeLedger]:
+    """
+    用 Hikyuu 运行单标的回测
+    
+    Returns:
+        (每根K线的净值, 成交记录)
+    """
+    kdata = to_kdata(data, symbol)
+    system = build_system(strategy, data, symbol, config, kdata[0].datetime)
+    system.run(kdata)
+    tm = system.tm
+    equity = np.asarray(tm.get_funds_curve(kdata.get_datetime_list()), dtype=np.float64)
+    
+    ledger = TradeLedger()
+    buy_reason = strategy.signal_reason(SignalType.BUY)
+    sell_reason = strategy.signal_reason(SignalType.SELL)
+    entry_cost = 0.0
+    for record in tm.get_trade_list():
+        timestamp = pd.Timestamp(record.datetime.datetime())
+        quantity = int(record.number)
+        fee = float(record.cost.total)
+        value = record.real_price * quantity
+        if record.business == hku.BUSINESS.BUY:
+            entry_cost = value + fee
+            ledger.append(timestamp, 1, record.real_price, quantity, fee, reason=buy_reason, symbol=symbol)
+        elif record.business == hku.BUSINESS.SELL:
+            profit = (value - fee - entry_cost) / entry_cost if entry_cost else np.nan
+            ledger.append(timestamp, -1, record.real_price, quantity, fee, profit=profit, reason=sell_reason, symbol=symbol)
+    return equity, ledger
@@ -0,0 +1,260 @@
+"""
+成交模拟内核
+
+输入整段信号、价格、成交量数组，一次调用得到每根K线的持仓、现金、净值和成交记录。
+按A股规则撮合：滑点、佣金（含最低佣金）、卖出印花税、100股整手、T+1（当日买入次日才能卖出，
+当日的卖出信号顺延到下一交易日第一根K线执行），可选按成交量限制买入数量。
+
+只在信号K线上循环（信号通常很稀疏），资金/持仓路径用 searchsorted 展开到每根K线；
+安装了 numba 时循环部分会被编译。
+"""
+from dataclasses import dataclass
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+from config.settings import BacktestConfig
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:  # numba 可选，未安装时使用纯 Python/NumPy 实现
+    HAS_NUMBA = False
+    
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+
+@njit(cache=True)
+def buy_fill(cash, price, volume, slippage, commission_rate, min_commission, lot_size, max_volume_pct):
+    """
+    计算买入成交
+    
+    Returns:
+        (数量, 成交价, 手续费)，资金不足一手时数量为 0
+    """
+    exec_price = price * (1 + slippage)
+    lots = int(cash / (exec_price * (1 + commission_rate)) / lot_size)
+    if max_volume_pct > 0:
+        lots = min(lots, int(volume * max_volume_pct / lot_size))
+    
+    while lots > 0:
+        quantity = lots * lot_size
+        fee = max(quantity * exec_price * commission_rate, min_commission)
+        if quantity * exec_price + fee <= cash:
+            return quantity, exec_price, fee
+        lots -= 1
+    return 0, exec_price, 0.0
+
+
+@njit(cache=True)
+def sell_fill(quantity, price, slippage, commission_rate, min_commission, stamp_duty):
+    """
+    计算卖出成交
+    
+    Returns:
+        (成交价, 手续费（佣金 + 印花税）, 净收入)
+    """
+    exec_price = price * (1 - slippage)
+    value = quantity * exec_price
+    fee = max(value * commission_rate, min_commission) + value * stamp_duty
+    return exec_price, fee, value - fee
+
+
+@njit(cache=True)
+def _simulate_events(
+    event_bars, signals, price, volume, day, initial_cash, initial_position, initial_entry_cost,
+    initial_buy_day, initial_pending_day,
+    slippage, commission_rate, min_commission, stamp_duty, lot_size, max_volume_pct, t_plus_one
+):
+    n = len(price)
+    size = len(event_bars) + 1
+    trade_bar = np.empty(size, dtype=np.int64)
+    trade_side = np.empty(size, dtype=np.int8)
+    trade_price = np.empty(size, dtype=np.float64)
+    trade_quantity = np.empty(size, dtype=np.int64)
+    trade_fee = np.empty(size, dtype=np.float64)
+    trade_profit = np.empty(size, dtype=np.float64)
+    trade_signal_bar = np.empty(size, dtype=np.int64)
+    cash_after = np.empty(size, dtype=np.float64)
+    position_after = np.empty(size, dtype=np.int64)
+    
+    cash = initial_cash
+    position = initial_position
+    entry_cost = initial_entry_cost
+    buy_day = initial_buy_day
+    pending_bar = -1  # T+1 顺延的卖出执行K线
+    pending_signal_bar = -1
+    pending_day = initial_pending_day  # 顺延卖出信号所在交易日
+    if pending_day >= 0:
+        pending_bar = np.searchsorted(day, pending_day, side="right")
+    count = 0
+    
+    for k in range(len(event_bars) + 1):
+        i = event_bars[k] if k < len(event_bars) else n
+        
+        # 先执行已到期的顺延卖出
+        if pending_bar >= 0 and pending_bar <= i and pending_bar < n:
+            exec_price, fee, proceeds = sell_fill(
+                position, price[pending_bar], slippage, commission_rate, min_commission, stamp_duty
+            )
+            cash += proceeds
+            trade_bar[count] = pending_bar
+            trade_side[count] = -1
+            trade_price[count] = exec_price
+            trade_quantity[count] = position
+            trade_fee[count] = fee
+            trade_profit[count] = (proceeds - entry_cost) / entry_cost
+            trade_signal_bar[count] = pending_signal_bar
+            position = 0
+            cash_after[count] = cash
+            position_after[count] = position
+            count += 1
+            pending_bar = -1
+            pending_day = -1
+        
+        if i >= n:
+            break
+        
+        signal = signals[i]
+        if signal > 0 and position == 0 and pending_bar < 0:
+            quantity, exec_price, fee = buy_fill(
+                cash, price[i], volume[i], slippage, commission_rate, min_commission, lot_size, max_volume_pct
+            )
+            if quantity <= 0:
+                continue
+            entry_cost = quantity * exec_price + fee
+            cash -= entry_cost
+            position = quantity
+            buy_day = day[i]
+            trade_bar[count] = i
+            trade_side[count] = 1
+            trade_price[count] = exec_price
+            trade_quantity[count] = quantity
+            trade_fee[count] = fee
+            trade_profit[count] = np.nan
+            trade_signal_bar[count] = i
+        
+        elif signal < 0 and position > 0 and pending_bar < 0:
+            if t_plus_one and day[i] == buy_day:
+                # 当日买入不能卖出，顺延到下一交易日第一根K线
+                pending_bar = np.searchsorted(day, day[i], side="right")
+                pending_signal_bar = i
+                pending_day = day[i]
+                continue
+            exec_price, fee, proceeds = sell_fill(
+                position, price[i], slippage, commission_rate, min_commission, stamp_duty
+            )
+            cash += proceeds
+            trade_bar[count] = i
+            trade_side[count] = -1
+            trade_price[count] = exec_price
+            trade_quantity[count] = position
+            trade_fee[count] = fee
+            trade_profit[count] = (proceeds - entry_cost) / entry_cost
+            trade_signal_bar[count] = i
+            position = 0
+        
+        else:
+            continue
+        
+        cash_after[count] = cash
+        position_after[count] = position
+        count += 1
+    
+    return (
+        trade_bar[:count], trade_side[:count], trade_price[:count], trade_quantity[:count],
+        trade_fee[:count], trade_profit[:count], trade_signal_bar[:count],
+        cash_after[:count], position_after[:count],
+        cash, position, entry_cost, buy_day, pending_day
+    )
+
+
+@dataclass
+class FillState:
+    """账户状态（分段模拟时在段与段之间传递）"""
+    cash: float  # 现金
+    position: int = 0  # 持仓股数
+    entry_cost: float = 0.0  # 当前持仓的买入总成本（含费用）
+    buy_day: int = -1  # 买入所在交易日编号
+    pending_day: int = -1  # T+1 顺延中的卖出信号所在交易日，-1 表示无
+
+
+@dataclass
+class FillResult:
+    """成交模拟结果"""
+    position: np.ndarray  # 每根K线收盘后的持仓股数
+    cash: np.ndarray  # 每根K线收盘后的现金
+    equity: np.ndarray  # 每根K线的净值
+    trades: Dict[str, np.ndarray]  # 成交记录：bar/side/price/quantity/fee/profit/signal_bar
+    state: FillState = None  # 最后一根K线之后的账户状态
+
+
+def day_ids(index: pd.Index) -> np.ndarray:
+    """K线所属交易日编号（用于 T+1 判断）"""
+    if isinstance(index, pd.DatetimeIndex):
+        return index.values.astype("datetime64[D]").astype(np.int64)
+    return np.arange(len(index), dtype=np.int64)
+
+
+def simulate_fills(
+    signals: np.ndarray,
+    price: np.ndarray,
+    volume: Optional[np.ndarray] = None,
+    day: Optional[np.ndarray] = None,
+    config: BacktestConfig = None,
+    state: Optional[FillState] = None
+) -> FillResult:
+    """
+    根据信号数组模拟成交
+    
+    Args:
+        signals: 信号数组，1-买入，-1-卖出，0-持有（未传入 state 时第一根K线的信号忽略）
+        price: 成交参考价（通常为收盘价）
+        volume: 成交量，config.max_volume_pct > 0 时用于限制买入数量
+        day: 交易日编号（见 day_ids），用于 T+1；默认每根K线视为不同交易日
+        config: 回测配置（资金、费率、滑点等）
+        state: 上一段的结束状态（见 FillResult.state），分段模拟长行情时传入以延续资金和持仓
+    """
+    config = config or BacktestConfig()
+    price = np.ascontiguousarray(price, dtype=np.float64)
+    n = len(price)
+    signals = np.asarray(signals, dtype=np.int8)
+    if len(signals) != n:
+        raise ValueError(f"信号长度 {len(signals)} 与行情长度 {n} 不一致")
+    volume = np.zeros(n) if volume is None else np.ascontiguousarray(volume, dtype=np.float64)
+    day = np.arange(n, dtype=np.int64) if day is None else np.ascontiguousarray(day, dtype=np.int64)
+    
+    if state is None:
+        state = FillState(cash=float(config.initial_capital))
+        event_bars = (np.flatnonzero(signals[1:]) + 1).astype(np.int64)
+    else:
+        event_bars = np.flatnonzero(signals).astype(np.int64)
+    
+    (bar, side, exec_price, quantity, fee, profit, signal_bar, cash_after, position_after,
+     end_cash, end_position, end_entry_cost, end_buy_day, end_pending_day) = _simulate_events(
+        event_bars, signals, price, volume, day,
+        float(state.cash), int(state.position), float(state.entry_cost), int(state.buy_day), int(state.pending_day),
+        float(config.slippage), float(config.commission_rate), float(config.min_commission),
+        float(config.stamp_duty), int(config.lot_size), float(config.max_volume_pct), bool(config.t_plus_one)
+    )
+    
+    # 每根K线之前（含当根）发生的成交笔数，即其所处的资金/持仓区间
+    segment = np.searchsorted(bar, np.arange(n), side="right")
+    cash = np.concatenate(([float(state.cash)], cash_after))[segment]
+    position = np.concatenate(([int(state.position)], position_after))[segment]
+    equity = cash + position * price
+    
+    trades = {
+        "bar": bar, "side": side, "price": exec_price, "quantity": quantity,
+        "fee": fee, "profit": profit, "signal_bar": signal_bar,
+    }
+    end_state = FillState(
+        cash=float(end_cash),
+        position=int(end_position),
+        entry_cost=float(end_entry_cost),
+        buy_day=int(end_buy_day),
+        pending_day=int(end_pending_day)
+    )
+    return FillResult(position=position, cash=cash, equity=equity, trades=trades, state=end_state)
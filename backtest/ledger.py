@@ -0,0 +1,243 @@
+"""
+成交记录 - 列式存储
+
+每个字段一个预分配的定长 NumPy 数组，容量不足时按倍数扩容；
+标的代码和触发原因存为小整数编码，另存一张去重后的字符串表。
+相比每笔成交一个 dict，内存占用和跨进程传输（pickle）开销都小得多，需要时再转换为 DataFrame。
+"""
+from typing import Dict, Iterator, List
+import numpy as np
+import pandas as pd
+
+ACTIONS = {1: "BUY", -1: "SELL"}
+
+_COLUMNS = {
+    "timestamp": np.int64,  # 成交时间（纳秒时间戳）
+    "symbol": np.int32,  # 标的编码，见 symbols
+    "side": np.int8,  # 1-买入，-1-卖出
+    "price": np.float64,  # 成交价
+    "quantity": np.int64,  # 成交数量
+    "fee": np.float64,  # 手续费
+    "profit": np.float64,  # 平仓收益率（买入为 NaN）
+    "reason": np.int16,  # 原因编码，见 reasons
+}
+
+TRADE_DTYPE = np.dtype([(name, dtype) for name, dtype in _COLUMNS.items()])
+
+
+class TradeLedger:
+    """列式成交记录"""
+    
+    def __init__(self, capacity: int = 64):
+        self._size = 0
+        self._columns: Dict[str, np.ndarray] = {
+            name: np.empty(max(capacity, 1), dtype=dtype) for name, dtype in _COLUMNS.items()
+        }
+        self.symbols: List[str] = []
+        self.reasons: List[str] = []
+        self._symbol_codes: Dict[str, int] = {}
+        self._reason_codes: Dict[str, int] = {}
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def __getattr__(self, name: str) -> np.ndarray:
+        # 列访问：ledger.price 等返回有效部分的视图
+        columns = self.__dict__.get("_columns")
+        if columns is None or name not in columns:
+            raise AttributeError(name)
+        return columns[name][:self._size]
+    
+    def __getitem__(self, k):
+        """第 k 笔成交（dict 形式），切片返回 dict 列表"""
+        if isinstance(k, slice):
+            return [self[i] for i in range(*k.indices(self._size))]
+        if k < 0:
+            k += self._size
+        if not 0 <= k < self._size:
+            raise IndexError(k)
+        c = self._columns
+        record = {
+            "date": pd.Timestamp(int(c["timestamp"][k])),
+            "symbol": self.symbols[c["symbol"][k]],
+            "action": ACTIONS[int(c["side"][k])],
+            "price": float(c["price"][k]),
+            "quantity": int(c["quantity"][k]),
+            "fee": float(c["fee"][k]),
+            "reason": self.reasons[c["reason"][k]],
+        }
+        if c["side"][k] < 0:
+            record["profit"] = float(c["profit"][k])
+        return record
+    
+    def __iter__(self) -> Iterator[Dict]:
+        for k in range(self._size):
+            yield self[k]
+    
+    def __getstate__(self):
+        # 只序列化有效部分
+        state = self.__dict__.copy()
+        state["_columns"] = {name: arr[:self._size].copy() for name, arr in self._columns.items()}
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+    
+    def symbol_code(self, symbol: str) -> int:
+        """标的编码（首次出现时登记）"""
+        code = self._symbol_codes.get(symbol)
+        if code is None:
+            code = self._symbol_codes[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return code
+    
+    def reason_code(self, reason: str) -> int:
+        """原因编码（首次出现时登记）"""
+        reason = reason or ""
+        code = self._reason_codes.get(reason)
+        if code is None:
+            code = self._reason_codes[reason] = len(self.reasons)
+            self.reasons.append(reason)
+        return code
+    
+    def _reserve(self, n: int):
+        needed = self._size + n
+        capacity = len(self._columns["side"])
+        if needed <= capacity:
+            return
+        # 空账本（如反序列化的空账本）容量为 0，翻倍前至少取 1
+        capacity = max(capacity, 1)
+        while capacity < needed:
+            capacity *= 2
+        for name, arr in self._columns.items():
+            grown = np.empty(capacity, dtype=arr.dtype)
+            grown[:self._size] = arr[:self._size]
+            self._columns[name] = grown
+    
+    def append(
+        self,
+        timestamp,
+        side: int,
+        price: float,
+        quantity: int,
+        fee: float,
+        profit: float = np.nan,
+        reason: str = "",
+        symbol: str = ""
+    ):
+        """追加一笔成交"""
+        self._reserve(1)
+        k = self._size
+        c = self._columns
+        c["timestamp"][k] = pd.Timestamp(timestamp).value
+        c["symbol"][k] = self.symbol_code(symbol)
+        c["side"][k] = side
+        c["price"][k] = price
+        c["quantity"][k] = quantity
+        c["fee"][k] = fee
+        c["profit"][k] = profit
+        c["reason"][k] = self.reason_code(reason)
+        self._size += 1
+    
+    def extend(
+        self,
+        timestamp: np.ndarray,
+        side: np.ndarray,
+        price: np.ndarray,
+        quantity: np.ndarray,
+        fee: np.ndarray,
+        profit: np.ndarray,
+        reason: np.ndarray,
+        symbol: str = ""
+    ):
+        """
+        批量追加同一标的的成交
+        
+        Args:
+            timestamp: 纳秒时间戳数组
+            reason: 原因编码数组（由 reason_code 得到）
+        """
+        n = len(side)
+        self._reserve(n)
+        k = self._size
+        c = self._columns
+        c["timestamp"][k:k + n] = timestamp
+        c["symbol"][k:k + n] = self.symbol_code(symbol)
+        c["side"][k:k + n] = side
+        c["price"][k:k + n] = price
+        c["quantity"][k:k + n] = quantity
+        c["fee"][k:k + n] = fee
+        c["profit"][k:k + n] = np.where(np.asarray(side) < 0, profit, np.nan)
+        c["reason"][k:k + n] = reason
+        self._size += n
+    
+    def clear(self):
+        """清空成交（保留标的/原因编码表，分块回测写盘后复用）"""
+        self._size = 0
+    
+    def to_records(self) -> np.ndarray:
+        """转换为 TRADE_DTYPE 结构化数组（编码形式，可直接写入二进制文件）"""
+        records = np.empty(self._size, dtype=TRADE_DTYPE)
+        for name in _COLUMNS:
+            records[name] = self._columns[name][:self._size]
+        return records
+    
+    @classmethod
+    def from_records(cls, records: np.ndarray, symbols: List[str], reasons: List[str]) -> "TradeLedger":
+        """由 TRADE_DTYPE 结构化数组和编码表重建"""
+        ledger = cls(len(records))
+        for name in _COLUMNS:
+            ledger._columns[name][:len(records)] = records[name]
+        ledger._size = len(records)
+        for symbol in symbols:
+            ledger.symbol_code(symbol)
+        for reason in reasons:
+            ledger.reason_code(reason)
+        return ledger
+    
+    def traded_value(self) -> np.ndarray:
+        """每笔成交金额"""
+        return self.price * self.quantity
+    
+    def closed_profits(self) -> np.ndarray:
+        """平仓（卖出）成交的收益率"""
+        return self.profit[self.side < 0]
+    
+    def to_frame(self) -> pd.DataFrame:
+        """转换为 DataFrame（标的、动作、原因为 category 列）"""
+        return pd.DataFrame({
+            "date": pd.to_datetime(self.timestamp),
+            "symbol": pd.Categorical.from_codes(self.symbol, self.symbols),
+            "action": pd.Categorical.from_codes((self.side < 0).astype(np.int8), ["BUY", "SELL"]),
+            "price": self.price,
+            "quantity": self.quantity,
+            "fee": self.fee,
+            "profit": self.profit,
+            "reason": pd.Categorical.from_codes(self.reason, self.reasons),
+        })
+    
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "TradeLedger":
+        """从 to_frame 的结果重建"""
+        ledger = cls(len(df))
+        n = len(df)
+        c = ledger._columns
+        c["timestamp"][:n] = pd.to_datetime(df["date"]).values.astype("datetime64[ns]").astype(np.int64)
+        for name, mapper in (("symbol", ledger.symbol_code), ("reason", ledger.reason_code)):
+            values = pd.Categorical(df[name].astype(str))
+            lookup = np.array([mapper(v) for v in values.categories], dtype=c[name].dtype)
+            c[name][:n] = lookup[values.codes] if n else []
+        c["side"][:n] = np.where(df["action"].astype(str).to_numpy() == "SELL", -1, 1)
+        for name in ("price", "quantity", "fee", "profit"):
+            c[name][:n] = df[name].to_numpy(dtype=c[name].dtype)
+        ledger._size = n
+        return ledger
+    
+    def to_parquet(self, path: str, **kwargs):
+        """保存为 Parquet 文件（需要 pyarrow 或 fastparquet）"""
+        self.to_frame().to_parquet(path, index=False, **kwargs)
+    
+    @classmethod
+    def read_parquet(cls, path: str) -> "TradeLedger":
+        """读取 to_parquet 保存的成交记录"""
+        return cls.from_frame(pd.read_parquet(path))
@@ -0,0 +1,318 @@
+"""
+回测指标 - 基于 NumPy 数组计算
+
+所有净值类指标沿最后一个维度计算：传入一维净值曲线得到标量，
+传入二维数组 (曲线数 × K线数)（如每组参数或每个标的一条净值曲线）一次得到所有曲线的指标。
+"""
+from typing import Dict, List
+import numpy as np
+
+TRADING_DAYS = 252
+RISK_FREE_RATE = 0.03  # 无风险利率
+_EPS = 1e-10
+
+
+def periods_per_year(day: np.ndarray) -> int:
+    """
+    每年K线根数（用于年化），按单个交易日的最多K线数推算（不受首尾不完整交易日影响），日线为 252
+    
+    Args:
+        day: 每根K线的交易日编号（见 backtest.kernel.day_ids）
+    """
+    day = np.asarray(day)
+    if len(day) == 0:
+        return TRADING_DAYS
+    boundaries = np.flatnonzero(day[1:] != day[:-1]) + 1
+    bars_per_day = np.diff(np.concatenate(([0], boundaries, [len(day)]))).max()
+    return TRADING_DAYS * int(bars_per_day)
+
+
+def simple_returns(equity: np.ndarray) -> np.ndarray:
+    """逐K线收益率"""
+    equity = np.asarray(equity, dtype=np.float64)
+    return equity[..., 1:] / equity[..., :-1] - 1
+
+
+def total_return(equity: np.ndarray) -> np.ndarray:
+    """总收益率"""
+    equity = np.asarray(equity, dtype=np.float64)
+    return equity[..., -1] / equity[..., 0] - 1
+
+
+def annual_return(equity: np.ndarray, days: float) -> np.ndarray:
+    """年化收益率，days 为首尾K线相隔的自然日数"""
+    return (1 + total_return(equity)) ** (365 / max(days, 1)) - 1
+
+
+def sharpe_ratio(
+    equity: np.ndarray,
+    risk_free_rate: float = RISK_FREE_RATE,
+    periods_per_year: int = TRADING_DAYS
+) -> np.ndarray:
+    """夏普比率（收益率标准差为样本标准差）"""
+    excess = simple_returns(equity) - risk_free_rate / periods_per_year
+    if excess.shape[-1] < 2:
+        return np.full(excess.shape[:-1], np.nan)
+    return np.sqrt(periods_per_year) * excess.mean(axis=-1) / (excess.std(axis=-1, ddof=1) + _EPS)
+
+
+def sortino_ratio(
+    equity: np.ndarray,
+    risk_free_rate: float = RISK_FREE_RATE,
+    periods_per_year: int = TRADING_DAYS
+) -> np.ndarray:
+    """索提诺比率（只用下行波动）"""
+    excess = simple_returns(equity) - risk_free_rate / periods_per_year
+    if excess.shape[-1] < 1:
+        return np.full(excess.shape[:-1], np.nan)
+    downside = np.sqrt(np.mean(np.square(np.minimum(excess, 0)), axis=-1))
+    return np.sqrt(periods_per_year) * excess.mean(axis=-1) / (downside + _EPS)
+
+
+def drawdown(equity: np.ndarray) -> np.ndarray:
+    """回撤序列（非正数）"""
+    equity = np.asarray(equity, dtype=np.float64)
+    peak = np.maximum.accumulate(equity, axis=-1)
+    return equity / peak - 1
+
+
+def max_drawdown(equity: np.ndarray) -> np.ndarray:
+    """最大回撤（正数）"""
+    return -drawdown(equity).min(axis=-1)
+
+
+def max_drawdown_duration(equity: np.ndarray) -> np.ndarray:
+    """最长回撤持续K线数（净值低于前高的最长连续区间）"""
+    equity = np.asarray(equity, dtype=np.float64)
+    peak = np.maximum.accumulate(equity, axis=-1)
+    positions = np.arange(equity.shape[-1])
+    # 每根K线最近一次创新高的位置
+    last_peak = np.maximum.accumulate(np.where(equity >= peak, positions, 0), axis=-1)
+    return (positions - last_peak).max(axis=-1)
+
+
+def calmar_ratio(equity: np.ndarray, days: float) -> np.ndarray:
+    """卡玛比率 = 年化收益率 / 最大回撤"""
+    return annual_return(equity, days) / (max_drawdown(equity) + _EPS)
+
+
+def win_rate(profits: np.ndarray) -> float:
+    """胜率：盈利的平仓交易占比"""
+    profits = np.asarray(profits, dtype=np.float64)
+    return float((profits > 0).sum() / max(len(profits), 1))
+
+
+def profit_factor(profits: np.ndarray) -> float:
+    """盈亏比：盈利交易收益之和 / 亏损交易损失之和，无亏损交易时为 inf（无交易时为 0）"""
+    profits = np.asarray(profits, dtype=np.float64)
+    gains = profits[profits > 0].sum()
+    losses = -profits[profits < 0].sum()
+    if losses == 0:
+        return float("inf") if gains > 0 else 0.0
+    return float(gains / losses)
+
+
+def turnover(
+    trade_values: np.ndarray,
+    equity: np.ndarray,
+    periods_per_year: int = TRADING_DAYS
+) -> float:
+    """年化换手率：成交金额之和 / 平均净值，按年折算"""
+    equity = np.asarray(equity, dtype=np.float64)
+    return annual_turnover(float(np.sum(trade_values)), float(equity.mean()), len(equity), periods_per_year)
+
+
+def annual_turnover(traded: float, mean_equity: float, bars: int, periods_per_year: int = TRADING_DAYS) -> float:
+    """年化换手率（由成交总额、平均净值和K线数计算）"""
+    years = max(bars / periods_per_year, 1 / periods_per_year)
+    return traded / mean_equity / years
+
+
+def compute_metrics(
+    equity: np.ndarray,
+    days: float,
+    risk_free_rate: float = RISK_FREE_RATE,
+    periods_per_year: int = TRADING_DAYS
+) -> Dict[str, np.ndarray]:
+    """
+    计算全部净值类指标
+    
+    Args:
+        equity: 一维净值曲线，或二维 (曲线数 × K线数) 批量净值曲线
+        days: 首尾K线相隔的自然日数（用于年化）
+    
+    Returns:
+        {指标名: 标量或每条曲线一个值的数组}
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    total = total_return(equity)
+    annual = (1 + total) ** (365 / max(days, 1)) - 1
+    mdd = max_drawdown(equity)
+    return {
+        "total_return": total,
+        "annual_return": annual,
+        "sharpe_ratio": sharpe_ratio(equity, risk_free_rate, periods_per_year),
+        "sortino_ratio": sortino_ratio(equity, risk_free_rate, periods_per_year),
+        "max_drawdown": mdd,
+        "max_drawdown_duration": max_drawdown_duration(equity),
+        "calmar_ratio": annual / (mdd + _EPS),
+    }
+
+
+class RunningMetrics:
+    """
+    分块累计的净值指标
+    
+    按顺序逐块传入净值，只保留常数个累计量（收益率的均值/二阶矩按分块合并、当前峰值、最大回撤等），
+    结果与对整条净值曲线调用 compute_metrics 一致，内存占用与曲线长度无关。
+    
+    未指定 periods_per_year 时，每日K线数跨块累计（块可以比一个交易日短），年化在 result() 中按全程最大值计算；
+    下行波动依赖无风险利率折算到每根K线的值，需先确定每日K线数：在看到第一个完整交易日之前收益率暂存，
+    之后按当时的每日K线数累计（各交易日K线数相同时与整段计算一致）。
+    """
+    
+    def __init__(self, risk_free_rate: float = RISK_FREE_RATE, periods_per_year: int = None):
+        """
+        Args:
+            periods_per_year: 每年K线根数，默认按每个交易日的最多K线数推算（见 periods_per_year）
+        """
+        self.risk_free_rate = risk_free_rate
+        self._fixed_periods = periods_per_year
+        self.bars = 0
+        self.first = np.nan
+        self.last = np.nan
+        self.equity_sum = 0.0
+        self._day = None  # 当前交易日编号
+        self._day_bars = 0  # 当前交易日已有K线数
+        self._max_day_bars = 0
+        self._day_changes = 0
+        self._downside_periods = periods_per_year  # 下行波动使用的每年K线数，确定前收益率暂存
+        self._pending: List[np.ndarray] = []
+        self._count = 0  # 收益率个数
+        self._mean = 0.0  # 原始收益率的均值（超额收益在 result 中扣除）
+        self._m2 = 0.0
+        self._downside = 0.0
+        self._peak = -np.inf
+        self._last_peak = 0
+        self._max_drawdown = 0.0
+        self._max_duration = 0
+    
+    @property
+    def periods_per_year(self) -> int:
+        """每年K线根数（未指定时按目前为止每个交易日的最多K线数）"""
+        if self._fixed_periods is not None:
+            return self._fixed_periods
+        return TRADING_DAYS * max(self._max_day_bars, 1)
+    
+    def _count_days(self, day: np.ndarray):
+        """跨块累计每个交易日的K线数"""
+        boundaries = np.flatnonzero(day[1:] != day[:-1]) + 1
+        lengths = np.diff(np.concatenate(([0], boundaries, [len(day)])))
+        if self._day is not None and day[0] == self._day:
+            lengths[0] += self._day_bars
+        else:
+            self._day_changes += self._day is not None
+        self._day_changes += len(boundaries)
+        self._max_day_bars = max(self._max_day_bars, int(lengths.max()))
+        self._day = day[-1]
+        self._day_bars = int(lengths[-1])
+    
+    def _accumulate(self, returns: np.ndarray):
+        count = len(returns)
+        mean = returns.mean()
+        m2 = np.square(returns - mean).sum()
+        total = self._count + count
+        delta = mean - self._mean
+        self._mean += delta * count / total
+        self._m2 += m2 + delta * delta * self._count * count / total
+        self._count = total
+        excess = returns - self.risk_free_rate / self._downside_periods
+        self._downside += np.square(np.minimum(excess, 0)).sum()
+    
+    def _flush(self):
+        """确定下行波动使用的每年K线数，累计暂存的收益率"""
+        if self._downside_periods is None:
+            self._downside_periods = self.periods_per_year
+        for returns in self._pending:
+            self._accumulate(returns)
+        self._pending = []
+    
+    def update(self, equity: np.ndarray, day: np.ndarray = None):
+        """
+        追加一块净值
+        
+        Args:
+            equity: 本块每根K线的净值
+            day: 本块每根K线的交易日编号，用于推算 periods_per_year，不传时按日线
+        """
+        equity = np.asarray(equity, dtype=np.float64)
+        n = len(equity)
+        if n == 0:
+            return
+        if day is None:
+            day = np.arange(self.bars, self.bars + n)
+        self._count_days(np.asarray(day))
+        
+        # 收益率：块首与上一块最后一根衔接
+        if self.bars == 0:
+            self.first = equity[0]
+            returns = simple_returns(equity)
+        else:
+            returns = simple_returns(np.concatenate(([self.last], equity)))
+        if len(returns):
+            if self._downside_periods is None:
+                self._pending.append(returns)
+                # 第一个完整交易日（前后都出现过换日）之后每日K线数确定
+                if self._day_changes >= 2:
+                    self._flush()
+            else:
+                self._accumulate(returns)
+        
+        # 回撤：峰值和最近创新高位置跨块延续
+        peak = np.maximum(np.maximum.accumulate(equity), self._peak)
+        self._max_drawdown = max(self._max_drawdown, float(-(equity / peak - 1).min()))
+        positions = np.arange(self.bars, self.bars + n)
+        last_peak = np.maximum(np.maximum.accumulate(np.where(equity >= peak, positions, -1)), self._last_peak)
+        self._max_duration = max(self._max_duration, int((positions - last_peak).max()))
+        self._peak = float(peak[-1])
+        self._last_peak = int(last_peak[-1])
+        
+        self.last = equity[-1]
+        self.equity_sum += equity.sum()
+        self.bars += n
+    
+    @property
+    def mean_equity(self) -> float:
+        """平均净值"""
+        return self.equity_sum / max(self.bars, 1)
+    
+    def result(self, days: float) -> Dict[str, float]:
+        """
+        当前累计的指标，键与 compute_metrics 相同
+        
+        Args:
+            days: 首尾K线相隔的自然日数（用于年化）
+        """
+        self._flush()
+        periods = self.periods_per_year
+        total = self.last / self.first - 1
+        annual = (1 + total) ** (365 / max(days, 1)) - 1
+        mean = self._mean - self.risk_free_rate / periods
+        if self._count >= 2:
+            std = np.sqrt(self._m2 / (self._count - 1))
+            sharpe = np.sqrt(periods) * mean / (std + _EPS)
+        else:
+            sharpe = np.nan
+        if self._count >= 1:
+            sortino = np.sqrt(periods) * mean / (np.sqrt(self._downside / self._count) + _EPS)
+        else:
+            sortino = np.nan
+        return {
+            "total_return": total,
+            "annual_return": annual,
+            "sharpe_ratio": sharpe,
+            "sortino_ratio": sortino,
+            "max_drawdown": self._max_drawdown,
+            "max_drawdown_duration": self._max_duration,
+            "calmar_ratio": annual / (self._max_drawdown + _EPS),
+        }
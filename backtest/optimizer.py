@@ -0,0 +1,188 @@
+"""
+策略参数寻优 - 网格搜索 / 随机搜索 / 逐步减半搜索
+
+同一标的的多个参数组合在同一个任务里顺序回测，并共享 strategy.feature_cache，
+不同组合用到的相同指标（如同一周期的均线）只计算一次；
+任务按 (标的, 参数分块) 分发到进程池。
+"""
+import itertools
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple, Type
+import pandas as pd
+from backtest.engine import BacktestEngine
+from backtest.runner import SUMMARY_COLUMNS
+from strategy.base import BaseStrategy
+from config.settings import BacktestConfig
+from utils.logger import log
+
+
+def _evaluate_chunk(
+    task: Tuple[Type[BaseStrategy], List[Dict], str, pd.DataFrame, BacktestConfig]
+) -> List[Dict]:
+    """进程池任务：在一个标的上回测一组参数，组合之间共享中间结果"""
+    strategy_cls, combos, symbol, data, config = task
+    engine = BacktestEngine(config)
+    feature_cache = {}
+    rows = []
+    for params in combos:
+        row = {"symbol": symbol, **params}
+        try:
+            strategy = strategy_cls(**params)
+            strategy.feature_cache = feature_cache
+            result = engine.run(strategy, data, symbol)
+            row.update({k: getattr(result, k) for k in SUMMARY_COLUMNS})
+            row["error"] = ""
+        except Exception as e:
+            row["error"] = f"{type(e).__name__}: {e}"
+        rows.append(row)
+    return rows
+
+
+class ParameterOptimizer:
+    """
+    策略参数优化器
+    
+    示例：
+        optimizer = ParameterOptimizer(
+            MACrossStrategy,
+            {"short_period": [5, 10, 15], "long_period": [20, 30, 60]},
+            constraint=lambda p: p["short_period"] < p["long_period"]
+        )
+        ranking = optimizer.grid_search(data)  # data: {symbol: DataFrame}
+    """
+    
+    def __init__(
+        self,
+        strategy_cls: Type[BaseStrategy],
+        param_grid: Dict[str, List],
+        config: BacktestConfig = None,
+        metric: str = "sharpe_ratio",
+        constraint: Optional[Callable[[Dict], bool]] = None,
+        max_workers: int = None
+    ):
+        """
+        Args:
+            strategy_cls: 策略类，参数以关键字参数传入构造函数
+            param_grid: 参数网格 {参数名: 候选值列表}
+            config: 回测配置
+            metric: 排名使用的指标（BacktestResult 字段，max_drawdown 越小越好，其余越大越好）
+            constraint: 参数组合过滤条件，返回 False 的组合跳过
+            max_workers: 进程数，默认 CPU 核数；为 1 时在当前进程执行
+        """
+        if metric not in SUMMARY_COLUMNS:
+            raise ValueError(f"不支持的排名指标: {metric}，可选: {SUMMARY_COLUMNS}")
+        self.strategy_cls = strategy_cls
+        self.param_grid = param_grid
+        self.config = config or BacktestConfig()
+        self.metric = metric
+        self.constraint = constraint
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.results = pd.DataFrame()  # 最近一次搜索的逐标的明细
+    
+    def combinations(self) -> List[Dict]:
+        """展开参数网格（已应用过滤条件）"""
+        names = list(self.param_grid)
+        combos = [dict(zip(names, values)) for values in itertools.product(*self.param_grid.values())]
+        if self.constraint:
+            combos = [c for c in combos if self.constraint(c)]
+        return combos
+    
+    def grid_search(self, data: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """
+        网格搜索
+        
+        Args:
+            data: 历史数据 {symbol: DataFrame}，可由 load_data 获取
+        
+        Returns:
+            pd.DataFrame: 按排名指标排序的参数表（各标的指标取均值）
+        """
+        return self._search(self.combinations(), data)
+    
+    def random_search(self, data: Dict[str, pd.DataFrame], n_iter: int, seed: int = None) -> pd.DataFrame:
+        """随机搜索：从网格中不放回抽取 n_iter 个组合"""
+        combos = self.combinations()
+        combos = random.Random(seed).sample(combos, min(n_iter, len(combos)))
+        return self._search(combos, data)
+    
+    def successive_halving(
+        self,
+        data: Dict[str, pd.DataFrame],
+        eta: int = 3,
+        min_fraction: float = 0.25
+    ) -> pd.DataFrame:
+        """
+        逐步减半搜索
+        
+        第一轮所有组合只回测最近 min_fraction 比例的历史，每轮保留排名前 1/eta 的组合，
+        并把历史长度放大 eta 倍，直到使用全部历史。
+        
+        Args:
+            eta: 每轮淘汰比例
+            min_fraction: 第一轮使用的历史比例
+        """
+        combos = self.combinations()
+        fraction = min_fraction
+        while True:
+            fraction = min(fraction, 1.0)
+            subset = {s: df.iloc[-max(int(len(df) * fraction), 2):] for s, df in data.items()}
+            log.info(f"逐步减半搜索：{len(combos)} 个组合，使用 {fraction:.0%} 历史")
+            ranking = self._search(combos, subset)
+            if fraction >= 1.0 or len(combos) <= 1:
+                return ranking
+            keep = max(math.ceil(len(combos) / eta), 1)
+            names = list(self.param_grid)
+            combos = [dict(zip(names, row)) for row in ranking.head(keep)[names].itertuples(index=False)]
+            fraction *= eta
+    
+    def load_data(self, symbols: List[str]) -> Dict[str, pd.DataFrame]:
+        """按回测配置加载历史数据（经过本地缓存），多次搜索可复用"""
+        from data.fetcher import DataFetcher
+        data = {}
+        for symbol in symbols:
+            df = DataFetcher.get_stock_history(symbol, self.config.start_date, self.config.end_date)
+            if df.empty:
+                log.warning(f"无法获取 {symbol} 的历史数据，跳过")
+                continue
+            data[symbol] = df
+        return data
+    
+    def _search(self, combos: List[Dict], data: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        if not combos or not data:
+            raise ValueError("参数组合或历史数据为空")
+        
+        # 每个标的的参数组合分成若干块：块内共享中间结果，块间并行
+        chunks_per_symbol = max(self.max_workers // len(data), 1)
+        chunk_size = math.ceil(len(combos) / chunks_per_symbol)
+        tasks = [
+            (self.strategy_cls, combos[i:i + chunk_size], symbol, df, self.config)
+            for symbol, df in data.items()
+            for i in range(0, len(combos), chunk_size)
+        ]
+        
+        log.info(f"参数寻优：{len(combos)} 个组合 × {len(data)} 个标的，任务数 {len(tasks)}")
+        workers = min(self.max_workers, len(tasks))
+        if workers <= 1:
+            outputs = list(map(_evaluate_chunk, tasks))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                outputs = list(pool.map(_evaluate_chunk, tasks))
+        
+        self.results = pd.DataFrame([row for rows in outputs for row in rows])
+        return self.rank(self.results)
+    
+    def rank(self, results: pd.DataFrame) -> pd.DataFrame:
+        """按参数组合汇总各标的指标并排序"""
+        names = list(self.param_grid)
+        ok = results[results["error"] == ""]
+        if ok.empty:
+            log.warning("所有参数组合均回测失败")
+            return pd.DataFrame(columns=names + SUMMARY_COLUMNS + ["symbols"])
+        
+        ranking = ok.groupby(names, sort=False)[SUMMARY_COLUMNS].mean()
+        ranking["symbols"] = ok.groupby(names, sort=False)["symbol"].count()
+        ascending = self.metric == "max_drawdown"
+        return ranking.sort_values(self.metric, ascending=ascending).reset_index()
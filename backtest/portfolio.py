@@ -0,0 +1,138 @@
+"""
+组合回测引擎 - 多标的共享资金
+
+所有标的的行情按日期并集对齐为 (时间 × 标的) 的 NumPy 矩阵；
+各标的的信号事件用堆归并成一条按时间排序的事件流，逐笔撮合（费用规则同 backtest.kernel），
+仓位规则与实盘 RealtimeMonitor 一致：买入使用 可用资金 × max_position_pct，卖出清仓。
+"""
+import heapq
+from typing import Dict, List, Tuple
+import numpy as np
+import pandas as pd
+from backtest.engine import BacktestEngine, BacktestResult, collect_signals
+from backtest.kernel import buy_fill, sell_fill
+from backtest.ledger import TradeLedger
+from strategy.base import BaseStrategy, SignalType
+from config.settings import BacktestConfig, TradingConfig
+from utils.logger import log
+
+# 同一时刻先卖后买，卖出回笼的资金可用于买入
+_SELL_FIRST = {-1: 0, 1: 1}
+
+
+def align_bars(data: Dict[str, pd.DataFrame], fields=("close",)) -> Tuple[pd.DatetimeIndex, List[str], Dict[str, np.ndarray]]:
+    """
+    将多个标的的行情按日期并集对齐
+    
+    Returns:
+        (时间索引, 标的列表, {字段: (时间 × 标的) 矩阵})，缺失的K线为 NaN
+    """
+    symbols = list(data)
+    index = pd.DatetimeIndex([])
+    for df in data.values():
+        index = index.union(df.index)
+    
+    matrices = {f: np.full((len(index), len(symbols)), np.nan) for f in fields}
+    for j, symbol in enumerate(symbols):
+        df = data[symbol]
+        rows = index.get_indexer(df.index)
+        for f in fields:
+            matrices[f][rows, j] = df[f].to_numpy(dtype=np.float64)
+    return index, symbols, matrices
+
+
+class PortfolioBacktestEngine(BacktestEngine):
+    """组合回测引擎"""
+    
+    def __init__(self, config: BacktestConfig = None, trading_config: TradingConfig = None):
+        super().__init__(config)
+        self.trading_config = trading_config or TradingConfig()
+        self.positions: Dict[str, int] = {}
+    
+    def run_portfolio(
+        self,
+        strategy: BaseStrategy,
+        data: Dict[str, pd.DataFrame]
+    ) -> BacktestResult:
+        """
+        运行组合回测
+        
+        Args:
+            strategy: 策略实例（对每个标的分别计算信号）
+            data: 历史数据 {symbol: DataFrame}，未传入的股票池标的不参与
+        """
+        data = {s: df for s, df in data.items() if not df.empty}
+        if not data:
+            raise ValueError("组合回测没有可用的历史数据")
+        log.info("开始组合回测 {} 策略，标的数: {}", strategy.name, len(data))
+        
+        index, symbols, matrices = align_bars(data, fields=("close", "volume"))
+        close = matrices["close"]
+        n_bars, n_symbols = close.shape
+        
+        # 各标的的信号事件 (时间行号, 先卖后买, 标的列号, 信号)，按时间归并
+        streams = []
+        for j, symbol in enumerate(symbols):
+            signals, _ = collect_signals(strategy, data[symbol], symbol)
+            rows = index.get_indexer(data[symbol].index)
+            hits = np.flatnonzero(signals)
+            streams.append([(int(rows[k]), _SELL_FIRST[int(signals[k])], j, int(signals[k])) for k in hits])
+        
+        cfg = self.config
+        max_pct = self.trading_config.max_position_pct
+        volume = matrices["volume"]
+        cash = cfg.initial_capital
+        holdings = np.zeros(n_symbols, dtype=np.int64)
+        entry_cost = np.zeros(n_symbols)
+        position_delta = np.zeros((n_bars, n_symbols))
+        cash_delta = np.zeros(n_bars)
+        self.trades = TradeLedger()
+        buy_reason = strategy.signal_reason(SignalType.BUY)
+        sell_reason = strategy.signal_reason(SignalType.SELL)
+        
+        for t, _, j, signal in heapq.merge(*streams):
+            price = close[t, j]
+            if np.isnan(price):
+                continue
+            
+            if signal > 0 and holdings[j] == 0:
+                quantity, exec_price, fee = buy_fill(
+                    cash * max_pct, price, np.nan_to_num(volume[t, j]), cfg.slippage, cfg.commission_rate,
+                    cfg.min_commission, cfg.lot_size, cfg.max_volume_pct
+                )
+                if quantity <= 0:
+                    continue
+                cost = quantity * exec_price + fee
+                cash -= cost
+                cash_delta[t] -= cost
+                holdings[j] = quantity
+                position_delta[t, j] += quantity
+                entry_cost[j] = cost
+                self.trades.append(index[t], 1, exec_price, quantity, fee, reason=buy_reason, symbol=symbols[j])
+            
+            elif signal < 0 and holdings[j] > 0:
+                quantity = int(holdings[j])
+                exec_price, fee, proceeds = sell_fill(
+                    quantity, price, cfg.slippage, cfg.commission_rate, cfg.min_commission, cfg.stamp_duty
+                )
+                cash += proceeds
+                cash_delta[t] += proceeds
+                position_delta[t, j] -= quantity
+                self.trades.append(
+                    index[t], -1, exec_price, quantity, fee,
+                    profit=(proceeds - entry_cost[j]) / entry_cost[j], reason=sell_reason, symbol=symbols[j]
+                )
+                holdings[j] = 0
+        
+        # 持仓和资金展开到每根K线，停牌标的按最近收盘价估值
+        valuation = pd.DataFrame(close).ffill().fillna(0.0).to_numpy()
+        positions = np.cumsum(position_delta, axis=0)
+        cash_path = self.config.initial_capital + np.cumsum(cash_delta)
+        equity_values = cash_path + (positions * valuation).sum(axis=1)
+        
+        self.positions = {symbols[j]: int(holdings[j]) for j in range(n_symbols) if holdings[j] > 0}
+        equity_curve = pd.Series(equity_values, index=index)
+        result = self._calculate_metrics(equity_curve)
+        
+        log.info("组合回测完成 - 总收益: {:.2%}, 夏普: {:.2f}, 最大回撤: {:.2%}", result.total_return, result.sharpe_ratio, result.max_drawdown)
+        return result
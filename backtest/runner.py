@@ -0,0 +1,131 @@
+"""
+多标的并行回测 - 基于进程池
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional, Tuple
+import pandas as pd
+from backtest.engine import BacktestEngine, BacktestResult
+from strategy.base import BaseStrategy
+from config.settings import BacktestConfig
+from utils.logger import log
+
+SUMMARY_COLUMNS = [
+    "total_return", "annual_return", "sharpe_ratio", "sortino_ratio", "calmar_ratio",
+    "max_drawdown", "max_drawdown_duration", "win_rate", "profit_factor", "turnover", "trade_count"
+]
+
+
+def _run_symbol(
+    task: Tuple[str, BaseStrategy, BacktestConfig, Optional[pd.DataFrame], Optional[Callable[[str], pd.DataFrame]]]
+) -> Tuple[str, Optional[BacktestResult], str]:
+    """
+    进程池任务：回测单个标的
+    
+    每个任务在子进程中拿到独立的策略副本（随任务序列化）和独立的引擎，
+    异常在这里捕获，单个标的失败不影响其他标的。
+    """
+    symbol, strategy, config, data, loader = task
+    try:
+        if data is None and loader is not None:
+            data = loader(symbol)
+        elif data is None:
+            from data.fetcher import DataFetcher
+            data = DataFetcher.get_stock_history(symbol, config.start_date, config.end_date)
+        if data.empty:
+            return symbol, None, "无历史数据"
+        
+        engine = BacktestEngine(config)
+        return symbol, engine.run(strategy, data, symbol), ""
+    except Exception as e:
+        return symbol, None, f"{type(e).__name__}: {e}"
+
+
+class BatchBacktestRunner:
+    """
+    多标的批量回测
+    
+    将标的分发到进程池，每个子进程独立获取数据、独立回测，
+    结果汇总为一张指标表。
+    """
+    
+    def __init__(
+        self,
+        strategy: BaseStrategy,
+        config: BacktestConfig = None,
+        max_workers: int = None,
+        chunksize: int = 1,
+        loader: Callable[[str], pd.DataFrame] = None
+    ):
+        """
+        Args:
+            strategy: 策略实例（每个任务使用它的独立副本）
+            config: 回测配置
+            max_workers: 进程数，默认 CPU 核数；为 1 时在当前进程顺序执行
+            chunksize: 每次派发给子进程的标的数，标的多且单个回测很快时调大可减少调度开销
+            loader: 子进程中按标的加载行情的函数（需可序列化，如 functools.partial(MinuteBarStore(...).load_frame, period=5)），
+                    默认从数据源获取日线
+        """
+        self.strategy = strategy
+        self.config = config or BacktestConfig()
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunksize = max(chunksize, 1)
+        self.loader = loader
+        self.results: Dict[str, BacktestResult] = {}
+        self.errors: Dict[str, str] = {}
+    
+    def run(self, symbols: List[str], data: Dict[str, pd.DataFrame] = None) -> pd.DataFrame:
+        """
+        运行批量回测
+        
+        Args:
+            symbols: 股票代码列表
+            data: 已加载的历史数据 {symbol: DataFrame}，缺失的标的由子进程自行获取
+        
+        Returns:
+            pd.DataFrame: 以 symbol 为索引的指标汇总表（失败的标的记录在 error 列）
+        """
+        data = data or {}
+        tasks = [(s, self.strategy, self.config, data.get(s), self.loader) for s in symbols]
+        self.results = {}
+        self.errors = {}
+        
+        workers = min(self.max_workers, len(tasks))
+        log.info(f"批量回测 {len(tasks)} 个标的，进程数: {max(workers, 1)}")
+        
+        if workers <= 1:
+            self._collect(map(_run_symbol, tasks))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                try:
+                    self._collect(pool.map(_run_symbol, tasks, chunksize=self.chunksize))
+                except BrokenProcessPool as e:
+                    # 子进程异常退出（如内存不足被杀），剩余标的记为失败
+                    for symbol in symbols:
+                        if symbol not in self.results and symbol not in self.errors:
+                            self.errors[symbol] = f"进程池异常: {e}"
+        
+        log.info(f"批量回测完成 - 成功: {len(self.results)}, 失败: {len(self.errors)}")
+        return self.summary(symbols)
+    
+    def _collect(self, outputs):
+        for symbol, result, error in outputs:
+            if result is None:
+                self.errors[symbol] = error
+                log.warning(f"{symbol} 回测失败: {error}")
+            else:
+                self.results[symbol] = result
+    
+    def summary(self, symbols: List[str] = None) -> pd.DataFrame:
+        """汇总指标表"""
+        symbols = symbols or list(self.results) + list(self.errors)
+        rows = []
+        for symbol in symbols:
+            result = self.results.get(symbol)
+            row = {"symbol": symbol}
+            if result is not None:
+                row.update({k: getattr(result, k) for k in SUMMARY_COLUMNS})
+            row["error"] = self.errors.get(symbol, "")
+            rows.append(row)
+        return pd.DataFrame(rows, columns=["symbol"] + SUMMARY_COLUMNS + ["error"]).set_index("symbol")
@@ -0,0 +1,188 @@
+"""
+分块流式回测 - 内存占用只取决于块大小
+
+行情按块（DataFrame 迭代器，如 MinuteBarStore.iter_chunks 或任意生成器）依次输入：
+- 策略状态跨块延续：向量化策略每块前拼接上一块末尾的 lookback 根K线重新计算，
+  流式策略（on_new_bar）的指标状态本身就跨块保留
+- 账户状态（现金、持仓、T+1 顺延的卖出）由成交内核的 FillState 跨块传递
+- 每块的净值和成交追加写入磁盘，指标由 RunningMetrics 逐块累计
+
+输出目录中每个标的三个文件：
+- {symbol}_equity.bin   (timestamp int64, equity float64) 定长记录
+- {symbol}_trades.bin   backtest.ledger.TRADE_DTYPE 定长记录
+- {symbol}_trades.json  成交记录的标的/原因编码表
+"""
+import json
+import tempfile
+from pathlib import Path
+from typing import Iterable, Optional
+import numpy as np
+import pandas as pd
+from backtest.engine import BacktestEngine, BacktestResult, collect_signals
+from backtest.kernel import FillState, simulate_fills, day_ids
+from backtest.ledger import TradeLedger, TRADE_DTYPE
+from backtest import metrics
+from strategy.base import BaseStrategy, SignalType, iter_bars
+from config.settings import BacktestConfig
+from utils.logger import log
+
+EQUITY_DTYPE = np.dtype([("timestamp", "<i8"), ("equity", "<f8")])
+
+
+class ChunkedBacktestEngine(BacktestEngine):
+    """分块流式回测引擎"""
+    
+    def __init__(self, config: BacktestConfig = None, output_dir: str = None, lookback: int = 500):
+        """
+        Args:
+            config: 回测配置
+            output_dir: 净值和成交的落盘目录，默认新建临时目录
+            lookback: 向量化策略每块前拼接的历史K线数，须不少于策略最长的指标窗口
+        """
+        super().__init__(config)
+        self.output_dir = Path(output_dir) if output_dir else None
+        self.lookback = lookback
+        self.equity_path: Optional[Path] = None
+        self.trades_path: Optional[Path] = None
+    
+    def _chunk_signals(self, strategy: BaseStrategy, chunk: pd.DataFrame, tail: Optional[pd.DataFrame],
+                       symbol: str, vectorized: bool, first: bool):
+        """计算一块行情的信号，返回 (信号数组, {块内K线序号: 原因})"""
+        if vectorized:
+            frame = chunk if tail is None else pd.concat([tail, chunk])
+            signals = strategy.generate_signals(frame)
+            if signals is not None:
+                return np.asarray(signals, dtype=np.int8)[len(frame) - len(chunk):], {}
+        
+        signals = np.zeros(len(chunk), dtype=np.int8)
+        reasons = {}
+        if strategy.supports_streaming:
+            if first:
+                strategy.reset_state(symbol)
+            for i, bar in enumerate(iter_bars(chunk)):
+                signal = strategy.on_new_bar(bar, symbol)
+                if signal.signal_type != SignalType.HOLD and not (first and i == 0):
+                    signals[i] = 1 if signal.signal_type == SignalType.BUY else -1
+                    reasons[i] = signal.reason
+            return signals, reasons
+        
+        # 既不支持向量化也不支持流式：拼接 lookback 后逐K线计算
+        frame = chunk if tail is None else pd.concat([tail, chunk])
+        offset = len(frame) - len(chunk)
+        all_signals, all_reasons = collect_signals(strategy, frame, symbol, vectorized=False)
+        reasons = {i - offset: r for i, r in all_reasons.items() if i >= offset}
+        return all_signals[offset:], reasons
+    
+    def run_chunks(
+        self,
+        strategy: BaseStrategy,
+        chunks: Iterable[pd.DataFrame],
+        symbol: str,
+        vectorized: bool = True
+    ) -> BacktestResult:
+        """
+        分块运行回测
+        
+        Args:
+            strategy: 策略实例
+            chunks: 按时间顺序的行情块（相邻块不重叠）
+            symbol: 股票代码
+            vectorized: 同 BacktestEngine.run
+        
+        Returns:
+            BacktestResult: equity_curve 为落盘净值文件的内存映射
+        """
+        log.info("开始分块回测 {} 策略，标的: {}", strategy.name, symbol)
+        output_dir = self.output_dir or Path(tempfile.mkdtemp(prefix="backtest_"))
+        output_dir.mkdir(parents=True, exist_ok=True)
+        self.equity_path = output_dir / f"{symbol}_equity.bin"
+        self.trades_path = output_dir / f"{symbol}_trades.bin"
+        
+        ledger = TradeLedger()
+        running = metrics.RunningMetrics()
+        state: Optional[FillState] = None
+        tail: Optional[pd.DataFrame] = None
+        first_ts = last_ts = None
+        traded = 0.0
+        n_chunks = 0
+        
+        with open(self.equity_path, "wb") as equity_file, open(self.trades_path, "wb") as trades_file:
+            for chunk in chunks:
+                if chunk.empty:
+                    continue
+                signals, reasons = self._chunk_signals(strategy, chunk, tail, symbol, vectorized, state is None)
+                day = day_ids(chunk.index)
+                volume = chunk["volume"].to_numpy() if "volume" in chunk.columns else None
+                # 第一块忽略首根K线信号，之后的块从上一块的账户状态继续
+                fills = simulate_fills(signals, chunk["close"].to_numpy(), volume, day, self.config, state)
+                state = fills.state
+                
+                self.record_fills(ledger, fills.trades, chunk.index, reasons, strategy, symbol)
+                traded += float(ledger.traded_value().sum())
+                trades_file.write(ledger.to_records().tobytes())
+                ledger.clear()
+                
+                records = np.empty(len(chunk), dtype=EQUITY_DTYPE)
+                records["timestamp"] = chunk.index.values.astype("datetime64[ns]").astype(np.int64)
+                records["equity"] = fills.equity
+                equity_file.write(records.tobytes())
+                running.update(fills.equity, day)
+                
+                if self.lookback > 0:
+                    # 块可能比 lookback 短，尾部跨块累积
+                    tail = (chunk if tail is None else pd.concat([tail, chunk])).iloc[-self.lookback:]
+                first_ts = chunk.index[0] if first_ts is None else first_ts
+                last_ts = chunk.index[-1]
+                n_chunks += 1
+        
+        if n_chunks == 0:
+            raise ValueError(f"{symbol} 没有可回测的行情")
+        
+        meta_path = self.trades_path.with_suffix(".json")
+        meta_path.write_text(
+            json.dumps({"symbols": ledger.symbols, "reasons": ledger.reasons}, ensure_ascii=False),
+            encoding="utf-8"
+        )
+        self.trades = self.load_trades(self.trades_path)
+        
+        values = running.result((last_ts - first_ts).days)
+        profits = self.trades.closed_profits()
+        result = BacktestResult(
+            total_return=float(values["total_return"]),
+            annual_return=float(values["annual_return"]),
+            sharpe_ratio=float(values["sharpe_ratio"]),
+            max_drawdown=float(values["max_drawdown"]),
+            win_rate=metrics.win_rate(profits),
+            trade_count=len(self.trades),
+            equity_curve=self.load_equity(self.equity_path),
+            trades=self.trades,
+            sortino_ratio=float(values["sortino_ratio"]),
+            calmar_ratio=float(values["calmar_ratio"]),
+            max_drawdown_duration=int(values["max_drawdown_duration"]),
+            profit_factor=metrics.profit_factor(profits),
+            turnover=metrics.annual_turnover(traded, running.mean_equity, running.bars, running.periods_per_year)
+        )
+        
+        log.info(
+            "分块回测完成 - 块数: {}, K线数: {}, 总收益: {:.2%}, 夏普: {:.2f}, 最大回撤: {:.2%}, 输出目录: {}",
+            n_chunks, running.bars, result.total_return, result.sharpe_ratio, result.max_drawdown, output_dir
+        )
+        return result
+    
+    @staticmethod
+    def load_equity(path) -> pd.Series:
+        """以内存映射方式读取落盘的净值曲线"""
+        path = Path(path)
+        n = path.stat().st_size // EQUITY_DTYPE.itemsize
+        if n == 0:
+            return pd.Series(dtype=np.float64)
+        records = np.memmap(path, dtype=EQUITY_DTYPE, mode="r", shape=(n,))
+        index = pd.DatetimeIndex(np.asarray(records["timestamp"]).view("datetime64[ns]"))
+        return pd.Series(records["equity"], index=index, copy=False)
+    
+    @staticmethod
+    def load_trades(path) -> TradeLedger:
+        """读取落盘的成交记录（{symbol}_trades.bin，编码表取同名 .json）"""
+        path = Path(path)
+        meta = json.loads(path.with_suffix(".json").read_text(encoding="utf-8"))
+        return TradeLedger.from_records(np.fromfile(path, dtype=TRADE_DTYPE), meta["symbols"], meta["reasons"])
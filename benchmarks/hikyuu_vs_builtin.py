@@ -0,0 +1,74 @@
+"""
+Hikyuu 引擎与内置回测引擎对比
+
+同一份行情、同一个策略分别用内置引擎（向量化 / 流式）和 Hikyuu 引擎回测，比较耗时和结果。
+
+运行方式：
+python benchmarks/hikyuu_vs_builtin.py --bars 5000
+python benchmarks/hikyuu_vs_builtin.py --symbol 601138
+"""
+import sys
+import os
+import argparse
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtest.engine import BacktestEngine
+from benchmarks.synthetic import make_bars
+from config.settings import config
+from strategy.examples.ma_cross import MACrossStrategy
+
+
+def timed(func, repeat: int):
+    """运行 repeat 次，返回 (最短耗时, 最后一次结果)"""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hikyuu 与内置回测引擎对比")
+    parser.add_argument("--bars", type=int, default=5000, help="合成K线根数")
+    parser.add_argument("--symbol", default=None, help="使用该股票的真实历史数据（需要网络）")
+    parser.add_argument("--repeat", type=int, default=3, help="每种模式运行次数，取最短耗时")
+    args = parser.parse_args()
+    
+    if args.symbol:
+        from data.fetcher import DataFetcher
+        symbol = args.symbol
+        data = DataFetcher.get_stock_history(symbol, config.backtest.start_date, config.backtest.end_date)
+    else:
+        symbol = "600000"
+        data = make_bars(args.bars)
+    
+    strategy = MACrossStrategy(short_period=5, long_period=20)
+    engine = BacktestEngine(config.backtest)
+    modes = {
+        "内置-向量化": lambda: engine.run(strategy, data, symbol),
+        "内置-流式": lambda: engine.run(strategy, data, symbol, vectorized=False),
+    }
+    try:
+        import hikyuu  # noqa: F401
+        modes["Hikyuu"] = lambda: engine.run_with_hikyuu(strategy, data, symbol)
+    except ImportError:
+        print("Hikyuu 未安装，只测试内置引擎")
+    
+    print("=" * 72)
+    print(f"标的: {symbol}  K线数: {len(data)}  策略: {strategy.name}")
+    print("=" * 72)
+    print(f"{'模式':<12}{'耗时(ms)':>10}{'总收益':>10}{'夏普':>8}{'最大回撤':>10}{'交易次数':>10}")
+    for name, func in modes.items():
+        seconds, result = timed(func, args.repeat)
+        print(
+            f"{name:<12}{seconds * 1000:>10.1f}{result.total_return:>10.2%}{result.sharpe_ratio:>8.2f}"
+            f"{result.max_drawdown:>10.2%}{result.trade_count:>10d}"
+        )
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
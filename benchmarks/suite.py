@@ -0,0 +1,319 @@
+"""
+性能基准测试套件
+
+离线生成合成行情，测量回测、策略、数据层和实时监控热点路径在不同K线数、标的数下的耗时，
+结果写入 JSON 文件，可与之前的结果对比发现性能回退。
+
+运行方式：
+python benchmarks/suite.py
+python benchmarks/suite.py --bars 1000 100000 10000000 --symbols 1 100 1000
+python benchmarks/suite.py --cases backtest strategy --repeat 5
+python benchmarks/suite.py --compare benchmarks/results/上次的结果.json --threshold 1.2
+
+对比时耗时超过上次 threshold 倍的用例记为回退，存在回退时退出码为 1（可用于 CI）。
+"""
+import sys
+import os
+import argparse
+import json
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from backtest.engine import BacktestEngine
+from backtest.runner import BatchBacktestRunner
+from benchmarks.synthetic import make_bars
+from config.settings import config
+from data.cache import BarCache
+from data.fetcher import DataFetcher
+from data.snapshot import SpotSnapshot
+from monitor.realtime import RealtimeMonitor
+from strategy.examples.ma_cross import MACrossStrategy
+from trader.executor import TradeExecutor
+from trader.paper import PaperBroker
+from utils.logger import setup_logger
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# 按标的数测试的用例每个标的的K线数
+SYMBOL_BARS = 2500
+
+
+def _bars(n: int, seed: int = 0) -> pd.DataFrame:
+    # 分钟频率，1000 万根K线也不会超出 pandas 的时间范围；波动率按分钟线取小，长序列价格不会溢出
+    return make_bars(n, seed=seed, freq="min", volatility=0.001)
+
+
+def _symbols(n: int):
+    return [f"{600000 + i:06d}" for i in range(n)]
+
+
+def bench_generate_signals(n: int):
+    data = _bars(n)
+    return lambda: MACrossStrategy(5, 20).generate_signals(data)
+
+
+def bench_calculate_signals(n: int):
+    data = _bars(n)
+    strategy = MACrossStrategy(5, 20)
+    return lambda: strategy.calculate_signals(data, "600000")
+
+
+def bench_backtest_run(n: int):
+    data = _bars(n)
+    engine = BacktestEngine(config.backtest)
+    return lambda: engine.run(MACrossStrategy(5, 20), data, "600000")
+
+
+def bench_backtest_streaming(n: int):
+    data = _bars(n)
+    engine = BacktestEngine(config.backtest)
+    return lambda: engine.run(MACrossStrategy(5, 20), data, "600000", vectorized=False)
+
+
+def bench_metrics(n: int):
+    data = _bars(n)
+    engine = BacktestEngine(config.backtest)
+    equity = data["close"] / data["close"].iloc[0] * config.backtest.initial_capital
+    return lambda: engine._calculate_metrics(equity)
+
+
+def bench_cache_save(n: int, workdir: str):
+    data = _bars(n)
+    cache = BarCache(workdir)
+    return lambda: cache.save("600000", "qfq", data, "20000101", "20991231")
+
+
+def bench_cache_load(n: int, workdir: str):
+    cache = BarCache(workdir)
+    cache.save("600000", "qfq", _bars(n), "20000101", "20991231")
+    return lambda: cache.load("600000", "qfq")
+
+
+def bench_history_cached(n: int, workdir: str):
+    """DataFetcher 批量读取日线，全部命中本地缓存（不联网）"""
+    symbols = _symbols(n)
+    cache = BarCache(workdir)
+    for i, symbol in enumerate(symbols):
+        cache.save(symbol, "qfq", make_bars(SYMBOL_BARS, seed=i), "20000101", "20991231")
+    
+    def run():
+        previous = config.data.cache_dir
+        config.data.cache_dir = workdir
+        try:
+            return DataFetcher.get_many_histories(symbols, "2000-01-01", "2009-12-31")
+        finally:
+            config.data.cache_dir = previous
+    return run
+
+
+def bench_batch_backtest(n: int):
+    symbols = _symbols(n)
+    data = {symbol: make_bars(SYMBOL_BARS, seed=i) for i, symbol in enumerate(symbols)}
+    runner = BatchBacktestRunner(MACrossStrategy(5, 20), config.backtest, max_workers=1)
+    return lambda: runner.run(symbols, data=data)
+
+
+def bench_monitor_tick(n: int):
+    """RealtimeMonitor 处理一份快照：逐标的更新实时K线、计算信号、向模拟券商下单"""
+    symbols = _symbols(n)
+    broker = PaperBroker()
+    executor = TradeExecutor(config.trading, trader=broker)
+    executor.refresh_account()
+    monitor = RealtimeMonitor(MACrossStrategy(5, 20), executor, symbols, config.monitor)
+    for i, symbol in enumerate(symbols):
+        monitor._history_cache[symbol] = make_bars(300, seed=i, start="2023-01-02")
+    
+    rng = np.random.default_rng(0)
+    codes = [f"sh{symbol}" for symbol in symbols]
+    prices = np.array([monitor._history_cache[s]["close"].iloc[-1] for s in symbols])
+    state = {"now": datetime(2024, 1, 2, 10, 0), "volume": 0.0}
+    monitor.clock = broker.clock = lambda: state["now"]
+    
+    def tick():
+        state["now"] += timedelta(seconds=3)
+        state["volume"] += 1000.0
+        prices[:] *= np.exp(rng.normal(0, 0.002, n))
+        snapshot = SpotSnapshot(
+            pd.DataFrame({"代码": codes, "最新价": prices, "成交量": state["volume"]}),
+            state["now"]
+        )
+        monitor.process_snapshot(snapshot)
+    return tick
+
+
+# 用例名 -> (维度, 构造函数, 是否需要临时目录, 最大规模)
+CASES = {
+    "strategy.generate_signals": ("bars", bench_generate_signals, False, None),
+    "strategy.calculate_signals": ("bars", bench_calculate_signals, False, None),
+    "backtest.run": ("bars", bench_backtest_run, False, None),
+    "backtest.run_streaming": ("bars", bench_backtest_streaming, False, 100_000),
+    "backtest.metrics": ("bars", bench_metrics, False, None),
+    "data.cache_save": ("bars", bench_cache_save, True, None),
+    "data.cache_load": ("bars", bench_cache_load, True, None),
+    "data.history_cached": ("symbols", bench_history_cached, True, None),
+    "backtest.batch": ("symbols", bench_batch_backtest, False, None),
+    "monitor.tick": ("symbols", bench_monitor_tick, False, None),
+}
+
+
+def measure(func, repeat: int, warmup: int = 1):
+    """预热后运行 repeat 次，返回每次耗时（秒）"""
+    for _ in range(warmup):
+        func()
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    return times
+
+
+def run_case(name: str, n: int, repeat: int) -> dict:
+    """运行单个用例，返回结果记录"""
+    dim, factory, needs_dir, _ = CASES[name]
+    workdir = tempfile.mkdtemp(prefix="bench_") if needs_dir else None
+    try:
+        func = factory(n, workdir) if needs_dir else factory(n)
+        times = measure(func, repeat)
+    finally:
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    best = min(times)
+    return {
+        "case": name,
+        "dim": dim,
+        "n": n,
+        "repeat": repeat,
+        "best_s": best,
+        "mean_s": float(np.mean(times)),
+        "per_second": n / best if best > 0 else None,
+    }
+
+
+def environment() -> dict:
+    """运行环境（写入结果文件，便于判断两次结果是否可比）"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, cwd=os.path.dirname(RESULTS_DIR), timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    try:
+        import numba
+        numba_version = numba.__version__
+    except ImportError:
+        numba_version = None
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "numba": numba_version,
+    }
+
+
+def compare(results: list, baseline_path: str, threshold: float) -> list:
+    """
+    与之前的结果对比，打印耗时比值
+    
+    Returns:
+        list: 回退的用例（耗时超过上次 threshold 倍）
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["case"], r["n"]): r for r in json.load(f)["results"]}
+    
+    regressions = []
+    print(f"\n与 {baseline_path} 对比（比值 = 本次 / 上次，阈值 {threshold}）")
+    print(f"{'用例':<28}{'规模':>10}{'上次(ms)':>12}{'本次(ms)':>12}{'比值':>8}")
+    for r in results:
+        old = baseline.get((r["case"], r["n"]))
+        if old is None:
+            continue
+        ratio = r["best_s"] / old["best_s"] if old["best_s"] > 0 else float("inf")
+        flag = "  回退" if ratio > threshold else ""
+        print(f"{r['case']:<28}{r['n']:>10}{old['best_s'] * 1000:>12.2f}{r['best_s'] * 1000:>12.2f}{ratio:>8.2f}{flag}")
+        if ratio > threshold:
+            regressions.append({**r, "baseline_s": old["best_s"], "ratio": ratio})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="回测/策略/数据层/监控热点路径基准测试")
+    parser.add_argument(
+        "--bars",
+        type=int,
+        nargs="+",
+        default=[1_000, 10_000, 100_000, 1_000_000],
+        help="按K线数测试的规模（可加 10000000，需要数 GB 内存）"
+    )
+    parser.add_argument("--symbols", type=int, nargs="+", default=[1, 10, 100], help="按标的数测试的规模")
+    parser.add_argument("--cases", nargs="+", default=None, help="只运行名称以这些前缀开头的用例，如 backtest data.cache")
+    parser.add_argument("--repeat", type=int, default=3, help="每个用例运行次数，取最短耗时")
+    parser.add_argument("--output", default=None, help="结果文件，默认 benchmarks/results/bench_时间.json")
+    parser.add_argument("--compare", default=None, help="与之前的结果文件对比")
+    parser.add_argument("--threshold", type=float, default=1.2, help="对比时耗时超过上次该倍数记为回退")
+    parser.add_argument("--list", action="store_true", help="列出所有用例")
+    args = parser.parse_args()
+    
+    if args.list:
+        for name, (dim, _, _, limit) in CASES.items():
+            print(f"{name:<28}{dim:<8}{'' if limit is None else f'最大 {limit}'}")
+        return 0
+    
+    # 只输出警告，避免回测日志影响计时
+    setup_logger(config.log.log_dir, "quiet")
+    
+    names = [
+        name for name in CASES
+        if args.cases is None or any(name.startswith(prefix) for prefix in args.cases)
+    ]
+    if not names:
+        parser.error(f"没有匹配的用例: {args.cases}")
+    
+    results = []
+    print("=" * 76)
+    print(f"{'用例':<28}{'规模':>10}{'最短(ms)':>12}{'平均(ms)':>12}{'每秒':>14}")
+    for name in names:
+        dim, _, _, limit = CASES[name]
+        for n in (args.bars if dim == "bars" else args.symbols):
+            if limit is not None and n > limit:
+                continue
+            r = run_case(name, n, args.repeat)
+            results.append(r)
+            print(f"{name:<28}{n:>10}{r['best_s'] * 1000:>12.2f}{r['mean_s'] * 1000:>12.2f}{r['per_second'] or 0:>14,.0f}")
+    print("=" * 76)
+    
+    output = args.output or os.path.join(RESULTS_DIR, f"bench_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    report = {"environment": environment(), "results": results}
+    
+    regressions = []
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        report["baseline"] = args.compare
+        report["regressions"] = regressions
+    
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已写入: {output}")
+    
+    if regressions:
+        print(f"{len(regressions)} 个用例性能回退")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,29 @@
+"""
+合成行情 - 基准测试使用的随机游走K线
+"""
+import numpy as np
+import pandas as pd
+
+
+def make_bars(n: int, seed: int = 0, freq: str = "D", start: str = "2000-01-03", volatility: float = 0.02) -> pd.DataFrame:
+    """
+    生成 n 根随机游走 OHLCV K线
+    
+    Args:
+        n: K线根数
+        seed: 随机种子
+        freq: K线频率（pandas 频率字符串）
+        start: 起始时间
+        volatility: 每根K线对数收益率的标准差
+    """
+    rng = np.random.default_rng(seed)
+    close = 10 * np.exp(np.cumsum(rng.normal(0, volatility, n)))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    spread = np.abs(rng.normal(0, 0.01, n)) * close
+    return pd.DataFrame({
+        "open": open_,
+        "high": np.maximum(open_, close) + spread,
+        "low": np.minimum(open_, close) - spread,
+        "close": close,
+        "volume": rng.integers(100_000, 1_000_000, n).astype(np.float64),
+    }, index=pd.date_range(start, periods=n, freq=freq))
@@ -1,4 +1,4 @@
-from .settings import config, Config, BacktestConfig, TradingConfig, MonitorConfig, BrokerType
+from .settings import config, Config, BacktestConfig, TradingConfig, MonitorConfig, DataConfig, BrokerType
 
-__all__ = ['config', 'Config', 'BacktestConfig', 'TradingConfig', 'MonitorConfig', 'BrokerType']
+__all__ = ['config', 'Config', 'BacktestConfig', 'TradingConfig', 'MonitorConfig', 'DataConfig', 'BrokerType']
 
@@ -10,6 +10,7 @@ class BrokerType(Enum):
     """券商类型"""
     TONGHUASHUN = "ths"
     DONGCAIFU = "gj"  # 国金/东财
+    PAPER = "paper"  # 进程内模拟券商（模拟盘）
 
 
 @dataclass
@@ -20,6 +21,11 @@ class BacktestConfig:
     initial_capital: float = 1_000_000.0
     commission_rate: float = 0.0003  # 万三佣金
     slippage: float = 0.001  # 滑点
+    min_commission: float = 5.0  # 单笔最低佣金（元）
+    stamp_duty: float = 0.0005  # 卖出印花税
+    lot_size: int = 100  # 每手股数
+    t_plus_one: bool = True  # T+1：当日买入次日才能卖出
+    max_volume_pct: float = 0.0  # 买入数量不超过当根K线成交量的比例，0 表示不限制
 
 
 @dataclass
@@ -29,6 +35,13 @@ class TradingConfig:
     exe_path: str = ""  # 客户端路径
     max_position_pct: float = 0.3  # 单只股票最大仓位
     stock_pool: List[str] = field(default_factory=list)
+    async_orders: bool = True  # 实盘使用专用下单线程和订单队列（非阻塞）
+    order_queue_size: int = 1000  # 排队订单上限
+    account_refresh_interval: float = 30.0  # 本地账户与券商对账间隔（秒），<=0 不自动对账
+    paper_cash: float = 1_000_000.0  # 模拟券商初始资金
+    paper_latency: float = 0.0  # 模拟券商委托到成交的延迟（秒）
+    paper_slippage: float = 0.001  # 模拟券商成交滑点
+    paper_fill_ratio: float = 1.0  # 模拟券商每次撮合最多成交的比例，<1 模拟部分成交
 
 
 @dataclass
@@ -36,14 +49,39 @@ class MonitorConfig:
     """监控配置"""
     refresh_interval: int = 3  # 行情刷新间隔（秒）
     trading_hours: tuple = (("09:30", "11:30"), ("13:00", "15:00"))
+    async_mode: bool = False  # 使用 asyncio 监控（行情/信号/下单流水线）
+    bar_period: str = "1D"  # 实时K线周期，盘中 tick 聚合到当前K线
+    bar_capacity: int = 512  # 每个标的保留的K线根数
+
+
+@dataclass
+class DataConfig:
+    """数据配置"""
+    use_cache: bool = True  # 历史数据使用本地缓存
+    cache_dir: str = "data/cache"  # 缓存目录
+    minute_dir: str = "data/minute"  # 分钟K线存储目录
+    max_workers: int = 8  # 批量下载并发线程数
+    rate_limit: float = 5.0  # 每秒最多请求次数，<=0 不限流
+    max_retries: int = 3  # 下载失败重试次数
+    retry_backoff: float = 1.0  # 重试初始等待秒数（指数退避）
+    spot_ttl: float = 3.0  # 全市场行情快照有效期（秒）
+
+
+@dataclass
+class LogConfig:
+    """日志配置"""
+    log_dir: str = "logs"
+    profile: str = "default"  # default / production（异步写入）/ quiet（回测只输出警告及以上），见 utils.logger.PROFILES
 
 
 @dataclass
 class Config:
     """主配置类"""
+    data: DataConfig = field(default_factory=DataConfig)
     backtest: BacktestConfig = field(default_factory=BacktestConfig)
     trading: TradingConfig = field(default_factory=TradingConfig)
     monitor: MonitorConfig = field(default_factory=MonitorConfig)
+    log: LogConfig = field(default_factory=LogConfig)
 
 
 # 全局配置实例
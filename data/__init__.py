@@ -1,4 +1,5 @@
 from .fetcher import DataFetcher
+from .minute import MinuteBarStore
 
-__all__ = ['DataFetcher']
+__all__ = ['DataFetcher', 'MinuteBarStore']
 
@@ -0,0 +1,83 @@
+"""
+本地K线缓存 - 按 symbol/复权类型 存储为可内存映射的 NumPy 文件
+
+每个标的两个文件：
+- {symbol}_{adjust}.npy   结构化数组（date 为 int64 纳秒时间戳，其余列为 float64）
+- {symbol}_{adjust}.json  已下载的日期区间 {"start": "YYYYMMDD", "end": "YYYYMMDD"}
+
+记录已下载区间而不是只看最后一根K线，避免节假日、停牌导致每次都去补数据。
+"""
+import json
+import os
+from pathlib import Path
+from typing import Optional, Tuple
+import numpy as np
+import pandas as pd
+
+
+class BarCache:
+    """日线本地缓存"""
+    
+    def __init__(self, cache_dir: str = "data/cache"):
+        self.cache_dir = Path(cache_dir)
+    
+    def _paths(self, symbol: str, adjust: str) -> Tuple[Path, Path]:
+        stem = f"{symbol}_{adjust or 'none'}"
+        return self.cache_dir / f"{stem}.npy", self.cache_dir / f"{stem}.json"
+    
+    def coverage(self, symbol: str, adjust: str) -> Optional[Tuple[str, str]]:
+        """已缓存的日期区间 (start, end)，格式 YYYYMMDD；无缓存返回 None"""
+        data_path, meta_path = self._paths(symbol, adjust)
+        if not data_path.exists() or not meta_path.exists():
+            return None
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            return meta["start"], meta["end"]
+        except (ValueError, KeyError):
+            return None
+    
+    def load(self, symbol: str, adjust: str, mmap: bool = True) -> Optional[pd.DataFrame]:
+        """读取缓存，返回以 date 为索引的 DataFrame"""
+        data_path, _ = self._paths(symbol, adjust)
+        if not data_path.exists():
+            return None
+        
+        records = np.load(data_path, mmap_mode="r" if mmap else None)
+        columns = [name for name in records.dtype.names if name != "date"]
+        df = pd.DataFrame(
+            {name: np.asarray(records[name]) for name in columns},
+            index=pd.DatetimeIndex(np.asarray(records["date"]).astype("datetime64[ns]"), name="date")
+        )
+        return df
+    
+    def save(self, symbol: str, adjust: str, df: pd.DataFrame, start: str, end: str):
+        """
+        写入缓存（先写临时文件再替换，多进程并发读取时不会读到半个文件）
+        
+        Args:
+            df: 以 date 为索引的行情数据
+            start/end: 本次缓存覆盖的请求区间 YYYYMMDD
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        data_path, meta_path = self._paths(symbol, adjust)
+        
+        columns = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c])]
+        records = np.empty(len(df), dtype=[("date", "i8")] + [(c, "f8") for c in columns])
+        records["date"] = df.index.values.astype("datetime64[ns]").astype("i8")
+        for c in columns:
+            records[c] = df[c].to_numpy(dtype=np.float64)
+        
+        tmp_data = data_path.with_name(f"{data_path.name}.{os.getpid()}.tmp")
+        with open(tmp_data, "wb") as f:
+            np.save(f, records)
+        os.replace(tmp_data, data_path)
+        
+        tmp_meta = meta_path.with_name(f"{meta_path.name}.{os.getpid()}.tmp")
+        tmp_meta.write_text(json.dumps({"start": start, "end": end}), encoding="utf-8")
+        os.replace(tmp_meta, meta_path)
+    
+    def clear(self, symbol: str, adjust: str):
+        """删除某个标的的缓存"""
+        for path in self._paths(symbol, adjust):
+            if path.exists():
+                path.unlink()
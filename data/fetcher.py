@@ -2,16 +2,81 @@
 数据获取模块 - 基于 akshare（使用新浪/腾讯数据源）
 """
 import os
-
-# 清除代理环境变量，确保直连
-for key in list(os.environ.keys()):
-    if 'proxy' in key.lower():
-        del os.environ[key]
-
-import akshare as ak
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
 import pandas as pd
-from typing import List
+from pathlib import Path
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+from config.settings import config
+from data.cache import BarCache
+from data.minute import MinuteBarStore, normalize_minute
+from data.snapshot import SpotSnapshot, SpotSnapshotCache
 from utils.logger import log
+from utils.ratelimit import RateLimiter
+
+_akshare = None
+_bar_cache: Optional[BarCache] = None
+_minute_store: Optional[MinuteBarStore] = None
+_rate_limiter: Optional[RateLimiter] = None
+_spot_cache: Optional[SpotSnapshotCache] = None
+_stock_list: Optional[Tuple[date, pd.DataFrame]] = None
+
+
+def clear_proxy_env():
+    """清除代理环境变量，确保直连数据源"""
+    for key in list(os.environ.keys()):
+        if 'proxy' in key.lower():
+            del os.environ[key]
+
+
+def _get_akshare():
+    """首次联网下载时才导入 akshare（依赖较多，导入耗时明显），导入前清除代理"""
+    global _akshare
+    if _akshare is None:
+        clear_proxy_env()
+        import akshare
+        _akshare = akshare
+    return _akshare
+
+
+def _get_bar_cache() -> BarCache:
+    """按 config.data.cache_dir 创建（或复用）本地K线缓存"""
+    global _bar_cache
+    if _bar_cache is None or _bar_cache.cache_dir != Path(config.data.cache_dir):
+        _bar_cache = BarCache(config.data.cache_dir)
+    return _bar_cache
+
+
+def _closed_bars(df: pd.DataFrame, covered_end: str) -> pd.DataFrame:
+    """只保留截至 covered_end 的K线（当天尚未收盘的K线不写入缓存，缓存最后一根与覆盖区间一致）"""
+    return df[df.index <= pd.Timestamp(covered_end)]
+
+
+def _get_minute_store() -> MinuteBarStore:
+    """按 config.data.minute_dir 创建（或复用）分钟K线存储"""
+    global _minute_store
+    if _minute_store is None or _minute_store.root != Path(config.data.minute_dir):
+        _minute_store = MinuteBarStore(config.data.minute_dir)
+    return _minute_store
+
+
+def _get_rate_limiter() -> RateLimiter:
+    """所有下载线程共享的限流器，避免触发数据源的访问频率限制"""
+    global _rate_limiter
+    if _rate_limiter is None or _rate_limiter.rate != config.data.rate_limit:
+        _rate_limiter = RateLimiter(config.data.rate_limit)
+    return _rate_limiter
+
+
+def _get_spot_cache() -> SpotSnapshotCache:
+    """全市场行情快照缓存，实时行情与股票列表共用"""
+    global _spot_cache
+    if _spot_cache is None:
+        _spot_cache = SpotSnapshotCache(lambda: _get_akshare().stock_zh_a_spot(), ttl=config.data.spot_ttl)
+    _spot_cache.ttl = config.data.spot_ttl
+    return _spot_cache
 
 
 class DataFetcher:
@@ -22,96 +87,230 @@ class DataFetcher:
         symbol: str, 
         start_date: str,
         end_date: str,
-        adjust: str = "qfq"
+        adjust: str = "qfq",
+        use_cache: bool = None
     ) -> pd.DataFrame:
         """
-        获取股票历史数据（使用新浪数据源）
+        获取股票历史数据（优先读取本地缓存，缺失区间再从新浪数据源补齐）
         
         Args:
             symbol: 股票代码，如 "000001"
             start_date: 开始日期 "YYYY-MM-DD" 或 "YYYYMMDD"
             end_date: 结束日期
             adjust: 复权类型 qfq-前复权, hfq-后复权, ""-不复权
+            use_cache: 是否使用本地缓存，默认取 config.data.use_cache
         """
+        if use_cache is None:
+            use_cache = config.data.use_cache
+        if not use_cache:
+            return DataFetcher._download_history(symbol, start_date, end_date, adjust)
+        
+        start = start_date.replace("-", "")
+        end = end_date.replace("-", "")
+        # 当天的K线可能尚未收盘，只把截至昨天的区间记为已缓存
+        yesterday = (pd.Timestamp.now().normalize() - pd.Timedelta(days=1)).strftime("%Y%m%d")
+        covered_end = min(end, yesterday)
+        
+        cache = _get_bar_cache()
+        coverage = cache.coverage(symbol, adjust)
+        cached = cache.load(symbol, adjust) if coverage else None
+        
         try:
-            # 转换代码格式：000001 -> sz000001, 600519 -> sh600519
-            if symbol.startswith("6"):
-                sina_symbol = f"sh{symbol}"
+            if cached is None or start < coverage[0]:
+                # 无缓存，或请求区间早于缓存起点：整段重新下载
+                fetch_end = max(end, coverage[1]) if coverage else end
+                df = DataFetcher._download_history(symbol, start, fetch_end, adjust)
+                if not df.empty:
+                    saved_end = min(fetch_end, yesterday)
+                    cache.save(symbol, adjust, _closed_bars(df, saved_end), start, saved_end)
+            elif end > coverage[1]:
+                df = DataFetcher._top_up_history(cache, cached, symbol, coverage, end, covered_end, adjust)
             else:
-                sina_symbol = f"sz{symbol}"
-            
-            # 使用新浪数据源
-            df = ak.stock_zh_a_daily(
-                symbol=sina_symbol,
-                start_date=start_date.replace("-", ""),
-                end_date=end_date.replace("-", ""),
-                adjust=adjust
-            )
-            
-            if df.empty:
-                log.warning(f"{symbol} 无数据")
-                return pd.DataFrame()
-            
-            # 标准化列名
-            df = df.rename(columns={
-                "date": "date",
-                "open": "open",
-                "high": "high",
-                "low": "low",
-                "close": "close",
-                "volume": "volume"
-            })
-            
-            df["date"] = pd.to_datetime(df["date"])
-            df.set_index("date", inplace=True)
-            
-            log.info(f"获取 {symbol} 历史数据成功，共 {len(df)} 条")
+                log.debug("{} 命中本地缓存 ({}-{})", symbol, coverage[0], coverage[1])
+                df = cached
+        except OSError as e:
+            log.warning(f"读写 {symbol} 本地缓存失败，直接下载: {e}")
+            return DataFetcher._download_history(symbol, start_date, end_date, adjust)
+        
+        if df.empty:
             return df
+        return df.loc[pd.Timestamp(start):pd.Timestamp(end)]
+    
+    @staticmethod
+    def _top_up_history(
+        cache: BarCache,
+        cached: pd.DataFrame,
+        symbol: str,
+        coverage: tuple,
+        end: str,
+        covered_end: str,
+        adjust: str
+    ) -> pd.DataFrame:
+        """只下载缓存之后缺失的区间并追加到缓存"""
+        # 从缓存最后一根K线开始下载，用重叠的那根校验复权价格是否变化
+        overlap_start = cached.index[-1].strftime("%Y%m%d") if not cached.empty else coverage[1]
+        new = DataFetcher._download_history(symbol, overlap_start, end, adjust)
+        if new.empty:
+            return cached
+        
+        overlap = cached.index[-1] if not cached.empty else None
+        if overlap is not None and overlap in new.index:
+            if not np.isclose(new.at[overlap, "close"], cached.at[overlap, "close"]):
+                # 除权除息后前复权价格整体变化，缓存作废
+                log.info(f"{symbol} 复权价格已变化，重新下载全部历史")
+                df = DataFetcher._download_history(symbol, coverage[0], end, adjust)
+                if not df.empty:
+                    cache.save(symbol, adjust, _closed_bars(df, covered_end), coverage[0], covered_end)
+                return df
+        
+        df = pd.concat([cached, new[new.index > cached.index[-1]] if overlap is not None else new])
+        saved_end = max(covered_end, coverage[1])
+        cache.save(symbol, adjust, _closed_bars(df, saved_end), coverage[0], saved_end)
+        log.info(f"{symbol} 缓存补齐 {len(df) - len(cached)} 条")
+        return df
+    
+    @staticmethod
+    def _download_history(
+        symbol: str,
+        start_date: str,
+        end_date: str,
+        adjust: str = "qfq"
+    ) -> pd.DataFrame:
+        """从新浪数据源下载历史数据（全局限流，失败按指数退避重试）"""
+        # 转换代码格式：000001 -> sz000001, 600519 -> sh600519
+        if symbol.startswith("6"):
+            sina_symbol = f"sh{symbol}"
+        else:
+            sina_symbol = f"sz{symbol}"
+        
+        max_retries = max(config.data.max_retries, 1)
+        for attempt in range(max_retries):
+            try:
+                _get_rate_limiter().acquire()
+                
+                # 使用新浪数据源
+                df = _get_akshare().stock_zh_a_daily(
+                    symbol=sina_symbol,
+                    start_date=start_date.replace("-", ""),
+                    end_date=end_date.replace("-", ""),
+                    adjust=adjust
+                )
+                
+                if df.empty:
+                    log.warning(f"{symbol} 无数据")
+                    return pd.DataFrame()
+                
+                # 标准化列名
+                df = df.rename(columns={
+                    "date": "date",
+                    "open": "open",
+                    "high": "high",
+                    "low": "low",
+                    "close": "close",
+                    "volume": "volume"
+                })
+                
+                df["date"] = pd.to_datetime(df["date"])
+                df.set_index("date", inplace=True)
+                
+                log.info(f"获取 {symbol} 历史数据成功，共 {len(df)} 条")
+                return df
             
-        except Exception as e:
-            log.error(f"获取 {symbol} 历史数据失败: {e}")
-            return pd.DataFrame()
+            except Exception as e:
+                if attempt < max_retries - 1:
+                    delay = config.data.retry_backoff * (2 ** attempt)
+                    log.warning(f"获取 {symbol} 历史数据失败，{delay:.1f}秒后重试 ({attempt + 1}/{max_retries}): {e}")
+                    time.sleep(delay)
+                else:
+                    log.error(f"获取 {symbol} 历史数据失败: {e}")
+        
+        return pd.DataFrame()
+    
+    @staticmethod
+    def get_many_histories(
+        symbols: List[str],
+        start_date: str,
+        end_date: str,
+        adjust: str = "qfq",
+        max_workers: int = None
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        并发批量获取历史数据（经过本地缓存，下载受全局限流约束）
+        
+        Args:
+            symbols: 股票代码列表
+            start_date: 开始日期
+            end_date: 结束日期
+            adjust: 复权类型
+            max_workers: 并发线程数，默认取 config.data.max_workers
+        
+        Returns:
+            Dict[str, pd.DataFrame]: {symbol: 历史数据}，获取失败的标的不在结果中
+        """
+        symbols = list(dict.fromkeys(symbols))
+        max_workers = max_workers or config.data.max_workers
+        results = {}
+        
+        with ThreadPoolExecutor(max_workers=max(min(max_workers, len(symbols)), 1)) as pool:
+            futures = {
+                pool.submit(DataFetcher.get_stock_history, s, start_date, end_date, adjust): s
+                for s in symbols
+            }
+            for future in as_completed(futures):
+                symbol = futures[future]
+                try:
+                    df = future.result()
+                except Exception as e:
+                    log.error(f"获取 {symbol} 历史数据失败: {e}")
+                    continue
+                if not df.empty:
+                    results[symbol] = df
+        
+        log.info(f"批量获取历史数据完成：{len(results)}/{len(symbols)}")
+        return {s: results[s] for s in symbols if s in results}
+    
+    @staticmethod
+    def get_spot_snapshot(max_age: float = None) -> SpotSnapshot:
+        """
+        获取全市场实时行情快照（TTL 内共享同一份，按代码 O(1) 查询）
+        
+        Args:
+            max_age: 可接受的最大快照年龄（秒），默认取 config.data.spot_ttl
+        """
+        return _get_spot_cache().get(max_age)
     
     @staticmethod
     def get_realtime_quote(symbols: List[str]) -> pd.DataFrame:
         """
-        获取实时行情（使用新浪数据源）
+        获取实时行情（使用新浪数据源，共享全市场快照）
         
         Args:
             symbols: 股票代码列表，如 ["000001", "600519"]
         """
         try:
-            # 转换代码格式
-            sina_symbols = []
-            for s in symbols:
-                if s.startswith("6"):
-                    sina_symbols.append(f"sh{s}")
-                else:
-                    sina_symbols.append(f"sz{s}")
-            
-            # 获取新浪实时行情
-            df = ak.stock_zh_a_spot()
-            
-            # 筛选指定股票
-            df = df[df["代码"].isin(symbols)]
-            return df
-            
+            return DataFetcher.get_spot_snapshot().rows(symbols)
         except Exception as e:
             log.error(f"获取实时行情失败: {e}")
             return pd.DataFrame()
     
     @staticmethod
     def get_stock_list() -> pd.DataFrame:
-        """获取A股股票列表（使用新浪数据源）"""
+        """获取A股股票列表（使用新浪数据源，按交易日缓存）"""
+        global _stock_list
+        today = datetime.now().date()
+        if _stock_list is not None and _stock_list[0] == today:
+            return _stock_list[1]
+        
         try:
-            df = ak.stock_zh_a_spot()
-            return df[["代码", "名称"]]
+            df = DataFetcher.get_spot_snapshot().df[["代码", "名称"]]
+            _stock_list = (today, df)
+            return df
         except Exception as e:
             log.error(f"获取股票列表失败: {e}")
             return pd.DataFrame()
     
     @staticmethod
-    def get_minute_data(symbol: str, period: str = "1", max_retries: int = 3) -> pd.DataFrame:
+    def get_minute_data(symbol: str, period: str = "1", max_retries: int = 3, normalize: bool = False):
         """
         获取分钟级数据（使用东方财富数据源）
         
@@ -119,18 +318,18 @@ class DataFetcher:
             symbol: 股票代码，如 "000001"
             period: 周期，"1"-1分钟, "5"-5分钟, "15"-15分钟, "30"-30分钟, "60"-60分钟
             max_retries: 最大重试次数
+            normalize: 为 True 时返回 data.minute.MINUTE_DTYPE 记录（英文字段、纳秒时间戳、成交量单位为股）
         """
-        import time
-        
         for attempt in range(max_retries):
             try:
-                df = ak.stock_zh_a_hist_min_em(
+                _get_rate_limiter().acquire()
+                df = _get_akshare().stock_zh_a_hist_min_em(
                     symbol=symbol,
                     period=period,
                     adjust=""
                 )
                 log.info(f"获取 {symbol} {period}分钟数据成功，共 {len(df)} 条")
-                return df
+                return normalize_minute(df) if normalize else df
             except Exception as e:
                 if attempt < max_retries - 1:
                     log.warning(f"获取分钟数据失败，2秒后重试 ({attempt + 1}/{max_retries})")
@@ -138,12 +337,49 @@ class DataFetcher:
                 else:
                     log.error(f"获取 {symbol} 分钟数据失败: {e}")
         
-        return pd.DataFrame()
-
+        return normalize_minute(pd.DataFrame()) if normalize else pd.DataFrame()
+    
+    @staticmethod
+    def sync_minute_bars(symbols: List[str], max_workers: int = None) -> Dict[str, int]:
+        """
+        下载最近的 1 分钟K线并追加到本地分钟存储（数据源只提供最近几个交易日，需定期执行以积累历史）
+        
+        Args:
+            symbols: 股票代码列表
+            max_workers: 并发线程数，默认 config.data.max_workers
+        
+        Returns:
+            {symbol: 新写入的K线根数}
+        """
+        store = _get_minute_store()
+        workers = max(1, min(max_workers or config.data.max_workers, len(symbols)))
+        written = {}
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(DataFetcher.get_minute_data, symbol, "1", normalize=True): symbol
+                for symbol in symbols
+            }
+            for future in as_completed(futures):
+                symbol = futures[future]
+                written[symbol] = store.append(symbol, future.result())
+        log.info(f"分钟K线同步完成 - 标的: {len(symbols)}, 新增: {sum(written.values())} 根")
+        return written
+    
+    @staticmethod
+    def get_minute_history(symbol: str, period: int = 1, start=None, end=None) -> pd.DataFrame:
+        """
+        从本地分钟存储读取K线
+        
+        Args:
+            symbol: 股票代码
+            period: 周期（分钟），1/5/15/30/60
+            start/end: 起止时间（含）
+        """
+        return _get_minute_store().load_frame(symbol, period, start, end)
 
 if __name__ == '__main__':
     fetcher = DataFetcher()
-
+    
     # 1. 获取历史日线
     # df = fetcher.get_stock_history("000001", "2024-01-01", "2024-12-08")
     # print(df.head())
@@ -151,11 +387,11 @@ if __name__ == '__main__':
     # # 2. 获取实时行情
     # df = fetcher.get_realtime_quote(["000001", "600519"])
     # print(df.head())
-
+    
     # 3. 获取股票列表
     # df = fetcher.get_stock_list()
     # print(df.head())
-
+    
     # 4. 获取5分钟数据
     df = fetcher.get_minute_data("000001", period="5")
     print(df.head())
\ No newline at end of file
@@ -0,0 +1,235 @@
+"""
+分钟K线存储 - 紧凑的内存映射格式
+
+每个标的一个只追加的二进制文件 {symbol}.bin，内容为定长结构化记录：
+timestamp(int64 纳秒，北京时间) / open/high/low/close(float32) / volume(int64，股)，每根K线 32 字节。
+读取时用 np.memmap 映射，按时间二分定位，只有实际访问的部分会被读入内存；
+一年 1 分钟K线约 6 万根、不到 2MB，数百个标的也只占用很小的磁盘和内存。
+
+5/15/30/60 分钟K线由 1 分钟K线按A股交易时段（9:30-11:30、13:00-15:00）即时合成，
+K线时间为该周期的结束时刻（与东方财富一致，如 60 分钟为 10:30/11:30/14:00/15:00）。
+"""
+from pathlib import Path
+from typing import Iterator, List, Optional
+import numpy as np
+import pandas as pd
+
+MINUTE_DTYPE = np.dtype([
+    ("timestamp", "<i8"),
+    ("open", "<f4"),
+    ("high", "<f4"),
+    ("low", "<f4"),
+    ("close", "<f4"),
+    ("volume", "<i8"),
+])
+
+PERIODS = (1, 5, 15, 30, 60)
+SESSION_MINUTES = 240  # A股每个交易日的分钟数
+
+_MINUTE_NS = 60 * 10**9
+_DAY_NS = 86400 * 10**9
+_MORNING_OPEN = 9 * 60 + 31  # 上午第一根1分钟K线 09:31
+_MORNING_CLOSE = 11 * 60 + 30
+_AFTERNOON_OPEN = 13 * 60 + 1  # 下午第一根1分钟K线 13:01
+
+# 东方财富分钟数据列名
+_COLUMNS = {
+    "时间": "timestamp",
+    "开盘": "open",
+    "最高": "high",
+    "最低": "low",
+    "收盘": "close",
+    "成交量": "volume",
+}
+
+
+def normalize_minute(df: pd.DataFrame) -> np.ndarray:
+    """
+    akshare（东方财富）分钟数据转换为 MINUTE_DTYPE 记录
+    
+    时间列解析为纳秒时间戳，成交量由手转换为股，按时间排序并去重。
+    """
+    if df.empty:
+        return np.empty(0, dtype=MINUTE_DTYPE)
+    df = df.rename(columns=_COLUMNS)
+    records = np.empty(len(df), dtype=MINUTE_DTYPE)
+    records["timestamp"] = pd.to_datetime(df["timestamp"]).values.astype("datetime64[ns]").astype(np.int64)
+    for field in ("open", "high", "low", "close"):
+        records[field] = df[field].to_numpy(dtype=np.float32)
+    records["volume"] = (df["volume"].to_numpy(dtype=np.float64) * 100).astype(np.int64)
+    return _sorted_unique(records)
+
+
+def _sorted_unique(records: np.ndarray) -> np.ndarray:
+    """按时间排序，同一时间保留最后一条"""
+    order = np.argsort(records["timestamp"], kind="stable")
+    records = records[order]
+    ts = records["timestamp"]
+    keep = np.ones(len(records), dtype=bool)
+    keep[:-1] = ts[1:] != ts[:-1]
+    return records[keep]
+
+
+def to_records(df: pd.DataFrame) -> np.ndarray:
+    """以时间为索引的 OHLCV DataFrame 转换为 MINUTE_DTYPE 记录"""
+    records = np.empty(len(df), dtype=MINUTE_DTYPE)
+    records["timestamp"] = df.index.values.astype("datetime64[ns]").astype(np.int64)
+    for field in ("open", "high", "low", "close"):
+        records[field] = df[field].to_numpy(dtype=np.float32)
+    records["volume"] = df["volume"].to_numpy(dtype=np.float64).astype(np.int64)
+    return _sorted_unique(records)
+
+
+def to_frame(records: np.ndarray) -> pd.DataFrame:
+    """MINUTE_DTYPE 记录转换为回测使用的 DataFrame（价格转为 float64）"""
+    index = pd.DatetimeIndex(np.asarray(records["timestamp"]).view("datetime64[ns]"), name="date")
+    return pd.DataFrame({
+        "open": records["open"].astype(np.float64),
+        "high": records["high"].astype(np.float64),
+        "low": records["low"].astype(np.float64),
+        "close": records["close"].astype(np.float64),
+        "volume": records["volume"].astype(np.float64),
+    }, index=index)
+
+
+def resample_minutes(records: np.ndarray, period: int) -> np.ndarray:
+    """
+    1 分钟K线合成为 period 分钟K线
+    
+    按交易时段内的分钟序号分组（集合竞价 09:30 归入第一根，13:00 归入上午最后一根），
+    不会把午休或隔夜拼进同一根K线。
+    
+    Args:
+        records: 按时间排序的 1 分钟 MINUTE_DTYPE 记录
+        period: 目标周期（分钟），须整除 240
+    """
+    if period == 1 or len(records) == 0:
+        return np.asarray(records)
+    if SESSION_MINUTES % period:
+        raise ValueError(f"不支持的分钟周期: {period}")
+    
+    ts = np.asarray(records["timestamp"])
+    day = ts // _DAY_NS
+    minute = (ts // _MINUTE_NS) % 1440
+    slot = np.where(minute <= _MORNING_CLOSE, minute - _MORNING_OPEN, minute - _AFTERNOON_OPEN + 120)
+    bucket = np.clip(slot, 0, SESSION_MINUTES - 1) // period
+    key = day * SESSION_MINUTES + bucket
+    
+    starts = np.flatnonzero(np.concatenate(([True], key[1:] != key[:-1])))
+    ends = np.append(starts[1:], len(key)) - 1
+    
+    # K线时间取周期结束时刻
+    end_slot = (bucket[starts] + 1) * period - 1
+    end_minute = np.where(end_slot < 120, _MORNING_OPEN + end_slot, _AFTERNOON_OPEN + end_slot - 120)
+    
+    out = np.empty(len(starts), dtype=MINUTE_DTYPE)
+    out["timestamp"] = day[starts] * _DAY_NS + end_minute * _MINUTE_NS
+    out["open"] = records["open"][starts]
+    out["high"] = np.maximum.reduceat(np.asarray(records["high"]), starts)
+    out["low"] = np.minimum.reduceat(np.asarray(records["low"]), starts)
+    out["close"] = records["close"][ends]
+    out["volume"] = np.add.reduceat(np.asarray(records["volume"]), starts)
+    return out
+
+
+def _to_ns(value, end: bool = False) -> Optional[int]:
+    """时间参数转纳秒；end 为纯日期时包含当天全部K线"""
+    if value is None:
+        return None
+    ts = pd.Timestamp(value)
+    if end and ts == ts.normalize():
+        ts += pd.Timedelta(days=1)
+        return ts.value - 1
+    return ts.value
+
+
+class MinuteBarStore:
+    """分钟K线本地存储（只保存 1 分钟K线，其余周期读取时合成）"""
+    
+    def __init__(self, root: str = "data/minute"):
+        self.root = Path(root)
+    
+    def _path(self, symbol: str) -> Path:
+        return self.root / f"{symbol}.bin"
+    
+    def symbols(self) -> List[str]:
+        """已存储的标的"""
+        if not self.root.exists():
+            return []
+        return sorted(p.stem for p in self.root.glob("*.bin"))
+    
+    def count(self, symbol: str) -> int:
+        """已存储的K线根数"""
+        path = self._path(symbol)
+        return path.stat().st_size // MINUTE_DTYPE.itemsize if path.exists() else 0
+    
+    def load(self, symbol: str, start=None, end=None) -> np.ndarray:
+        """
+        以内存映射方式读取 1 分钟记录（只读，不复制）
+        
+        Args:
+            start/end: 起止时间（含），end 为纯日期时包含当天
+        """
+        n = self.count(symbol)
+        if n == 0:
+            return np.empty(0, dtype=MINUTE_DTYPE)
+        records = np.memmap(self._path(symbol), dtype=MINUTE_DTYPE, mode="r", shape=(n,))
+        ts = records["timestamp"]
+        lo = 0 if start is None else int(np.searchsorted(ts, _to_ns(start), side="left"))
+        hi = n if end is None else int(np.searchsorted(ts, _to_ns(end, end=True), side="right"))
+        return records[lo:hi]
+    
+    def load_frame(self, symbol: str, period: int = 1, start=None, end=None) -> pd.DataFrame:
+        """读取为 DataFrame（period 分钟K线）"""
+        return to_frame(resample_minutes(self.load(symbol, start, end), period))
+    
+    def append(self, symbol: str, records: np.ndarray) -> int:
+        """
+        追加 1 分钟记录，只写入晚于已存储最后一根K线的部分
+        
+        Returns:
+            int: 实际写入的K线根数
+        """
+        records = _sorted_unique(np.asarray(records, dtype=MINUTE_DTYPE))
+        n = self.count(symbol)
+        if n:
+            last = self.load(symbol)[-1]["timestamp"]
+            records = records[records["timestamp"] > last]
+        if len(records) == 0:
+            return 0
+        
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self._path(symbol), "ab") as f:
+            f.write(records.tobytes())
+        return len(records)
+    
+    def iter_chunks(
+        self,
+        symbol: str,
+        period: int = 1,
+        chunk_bars: int = 100_000,
+        start=None,
+        end=None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        按块读取 period 分钟K线
+        
+        每块约 chunk_bars 根 1 分钟K线，且只在交易日之间切分，保证合成的K线不跨块。
+        """
+        records = self.load(symbol, start, end)
+        ts = records["timestamp"]
+        n = len(records)
+        i = 0
+        while i < n:
+            j = min(i + max(chunk_bars, 1), n)
+            if j < n:
+                next_day = (int(ts[j - 1]) // _DAY_NS + 1) * _DAY_NS
+                j = int(np.searchsorted(ts, next_day, side="left"))
+            yield to_frame(resample_minutes(np.array(records[i:j]), period))
+            i = j
+    
+    def clear(self, symbol: str):
+        """删除某个标的的分钟数据"""
+        path = self._path(symbol)
+        if path.exists():
+            path.unlink()
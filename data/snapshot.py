@@ -0,0 +1,123 @@
+"""
+全市场行情快照 - 带 TTL 的共享缓存
+
+ak.stock_zh_a_spot() 每次下载全市场约 5000 只股票，实时行情和股票列表都依赖它。
+TTL 内所有调用方共享同一份快照，按代码建立索引，单只股票的查询为 O(1)。
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import numpy as np
+import pandas as pd
+
+
+class SpotSnapshot:
+    """一次全市场行情快照"""
+    
+    def __init__(self, df: pd.DataFrame, timestamp: datetime = None, index: Dict[str, int] = None):
+        """
+        Args:
+            df: 全市场行情
+            timestamp: 快照时间
+            index: 复用已建好的 代码 -> 行号 索引（代码列与建索引时完全相同时，如回放录制的行情）
+        """
+        self.df = df.reset_index(drop=True)
+        self.timestamp = timestamp or datetime.now()
+        self.fetched_at = time.monotonic()
+        
+        if index is not None:
+            self._index = index
+        else:
+            self._index = self.build_index(self.df["代码"]) if "代码" in self.df.columns else {}
+        
+        if "最新价" in self.df.columns:
+            self.prices = pd.to_numeric(self.df["最新价"], errors="coerce").to_numpy(dtype=np.float64)
+        else:
+            self.prices = np.full(len(self.df), np.nan)
+        
+        if "成交量" in self.df.columns:
+            self.volumes = pd.to_numeric(self.df["成交量"], errors="coerce").to_numpy(dtype=np.float64)
+        else:
+            self.volumes = np.full(len(self.df), np.nan)
+    
+    @staticmethod
+    def build_index(codes) -> Dict[str, int]:
+        """代码 -> 行号；新浪代码带 sh/sz/bj 前缀，同时登记去掉前缀的6位代码"""
+        index: Dict[str, int] = {}
+        for i, code in enumerate(map(str, codes)):
+            index[code] = i
+            index.setdefault(code[-6:], i)
+        return index
+    
+    @property
+    def age(self) -> float:
+        """快照已存在的秒数"""
+        return time.monotonic() - self.fetched_at
+    
+    def __len__(self) -> int:
+        return len(self.df)
+    
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._index
+    
+    def price(self, symbol: str) -> Optional[float]:
+        """最新价，无该股票或价格无效时返回 None"""
+        i = self._index.get(symbol)
+        if i is None or np.isnan(self.prices[i]):
+            return None
+        return float(self.prices[i])
+    
+    def volume(self, symbol: str) -> Optional[float]:
+        """当日累计成交量，无数据时返回 None"""
+        i = self._index.get(symbol)
+        if i is None or np.isnan(self.volumes[i]):
+            return None
+        return float(self.volumes[i])
+    
+    def rows(self, symbols: List[str]) -> pd.DataFrame:
+        """按代码取出若干行（保持传入顺序，不存在的代码忽略）"""
+        positions = [self._index[s] for s in symbols if s in self._index]
+        return self.df.iloc[positions]
+
+
+class SpotSnapshotCache:
+    """
+    快照缓存
+    
+    过期后由第一个调用方刷新，并发调用方等待同一次刷新结果，不会重复下载。
+    """
+    
+    def __init__(self, loader: Callable[[], pd.DataFrame], ttl: float = 3.0):
+        self.loader = loader
+        self.ttl = ttl
+        self._snapshot: Optional[SpotSnapshot] = None
+        self._lock = threading.Lock()
+    
+    def get(self, max_age: float = None) -> SpotSnapshot:
+        """
+        获取快照
+        
+        Args:
+            max_age: 可接受的最大快照年龄（秒），默认取 ttl；0 表示强制刷新
+        """
+        max_age = self.ttl if max_age is None else max_age
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.age < max_age:
+            return snapshot
+        
+        with self._lock:
+            # 等锁期间可能已被其他线程刷新
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.age < max_age:
+                return snapshot
+            self._snapshot = SpotSnapshot(self.loader())
+            return self._snapshot
+    
+    def set(self, snapshot: SpotSnapshot):
+        """直接放入快照（回放、测试时使用）"""
+        self._snapshot = snapshot
+    
+    def invalidate(self):
+        """作废当前快照"""
+        self._snapshot = None
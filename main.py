@@ -7,71 +7,204 @@ A股量化交易系统 - 主程序入口
 3. 策略通过后，使用easytrader连接同花顺/东方财富
 4. 实时监控行情（akshare获取）
 5. 根据策略信号自动执行买卖
+
+各模式用到的子系统（回测引擎、执行器、实时监控等）在选定模式后才导入，
+akshare 只在确实需要联网下载时导入，回测使用本地缓存数据时不加载。
 """
+import time
+
+_STARTED = time.perf_counter()
+
 import argparse
+import importlib
+import sys
+from functools import partial
 from config.settings import config, BrokerType
-from data.fetcher import DataFetcher
-from backtest.engine import BacktestEngine
+from data.minute import MinuteBarStore, PERIODS
 from strategy.examples.ma_cross import MACrossStrategy
-from trader.executor import TradeExecutor
-from monitor.realtime import RealtimeMonitor
-from utils.logger import log
+from utils.logger import log, setup_logger, PROFILES
+
+# 各运行模式导入的子系统（--profile-import 按此统计导入耗时）
+MODE_MODULES = {
+    "backtest": ("data.fetcher", "backtest.engine", "backtest.runner", "backtest.portfolio", "backtest.streaming"),
+    "live": ("data.fetcher", "trader.executor", "monitor.realtime", "monitor.async_monitor", "monitor.replay"),
+    "replay": ("data.fetcher", "trader.executor", "monitor.realtime", "monitor.replay"),
+}
+
+
+def print_result(symbol: str, result):
+    """打印单个标的的回测结果"""
+    print(f"\n{'='*40}")
+    print(f"回测结果 - {symbol}")
+    print(f"{'='*40}")
+    print(f"总收益率:   {result.total_return:>10.2%}")
+    print(f"年化收益率: {result.annual_return:>10.2%}")
+    print(f"夏普比率:   {result.sharpe_ratio:>10.2f}")
+    print(f"索提诺比率: {result.sortino_ratio:>10.2f}")
+    print(f"最大回撤:   {result.max_drawdown:>10.2%}")
+    print(f"胜率:       {result.win_rate:>10.2%}")
+    print(f"盈亏比:     {result.profit_factor:>10.2f}")
+    print(f"交易次数:   {result.trade_count:>10d}")
+    print(f"{'='*40}")
+
+
+def run_minute_backtest(symbols: list, period: int, strategy=None, workers: int = 1, chunked: bool = False):
+    """
+    运行分钟线回测（数据来自本地分钟存储，每个标的在各自的进程中单独加载）
+    
+    Args:
+        symbols: 股票代码列表
+        period: K线周期（分钟）
+        strategy: 策略实例
+        workers: 并行进程数
+        chunked: 逐个标的分块流式回测（内存只取决于块大小，净值和成交写入磁盘）
+    """
+    log.info("=" * 50)
+    log.info(f"开始{period}分钟线回测模式")
+    log.info("=" * 50)
+    
+    from backtest.runner import BatchBacktestRunner
+    from backtest.streaming import ChunkedBacktestEngine
+    
+    strategy = strategy or MACrossStrategy(short_period=5, long_period=20)
+    store = MinuteBarStore(config.data.minute_dir)
+    if chunked:
+        engine = ChunkedBacktestEngine(config.backtest)
+        results = {}
+        for symbol in symbols:
+            chunks = store.iter_chunks(
+                symbol,
+                period,
+                start=config.backtest.start_date,
+                end=config.backtest.end_date
+            )
+            results[symbol] = engine.run_chunks(strategy, chunks, symbol)
+            print_result(f"{symbol} {period}分钟", results[symbol])
+        return results
+    
+    loader = partial(
+        store.load_frame,
+        period=period,
+        start=config.backtest.start_date,
+        end=config.backtest.end_date
+    )
+    runner = BatchBacktestRunner(strategy, config.backtest, max_workers=workers, loader=loader)
+    summary = runner.run(symbols)
+    for symbol, result in runner.results.items():
+        print_result(f"{symbol} {period}分钟", result)
+    print("\n汇总:")
+    print(summary.to_string())
+    return runner.results
 
 
-def run_backtest(symbols: list, strategy=None):
-    """运行回测"""
+def run_backtest(symbols: list, strategy=None, workers: int = 1, use_hikyuu: bool = False):
+    """
+    运行回测
+    
+    Args:
+        symbols: 股票代码列表
+        strategy: 策略实例
+        workers: 并行进程数，大于 1 时使用进程池批量回测
+        use_hikyuu: 使用 Hikyuu 引擎回测（未安装时回退到内置引擎）
+    """
     log.info("=" * 50)
     log.info("开始回测模式")
     log.info("=" * 50)
     
+    from data.fetcher import DataFetcher
+    from backtest.engine import BacktestEngine
+    from backtest.runner import BatchBacktestRunner
+    
+    strategy = strategy or MACrossStrategy(short_period=5, long_period=20)
+    
+    if workers != 1 and len(symbols) > 1 and not use_hikyuu:
+        runner = BatchBacktestRunner(strategy, config.backtest, max_workers=workers)
+        summary = runner.run(symbols)
+        for symbol, result in runner.results.items():
+            print_result(symbol, result)
+        print("\n汇总:")
+        print(summary.to_string())
+        return runner.results
+    
     fetcher = DataFetcher()
     engine = BacktestEngine(config.backtest)
-    strategy = strategy or MACrossStrategy(short_period=5, long_period=20)
+    
+    # 并发获取所有标的的历史数据
+    histories = fetcher.get_many_histories(
+        symbols,
+        config.backtest.start_date,
+        config.backtest.end_date
+    )
     
     results = {}
     for symbol in symbols:
         log.info(f"\n回测标的: {symbol}")
         
-        # 获取历史数据
-        data = fetcher.get_stock_history(
-            symbol,
-            config.backtest.start_date,
-            config.backtest.end_date
-        )
-        
-        if data.empty:
+        data = histories.get(symbol)
+        if data is None:
             log.warning(f"无法获取 {symbol} 的历史数据")
             continue
         
         # 运行回测
-        result = engine.run(strategy, data, symbol)
+        if use_hikyuu:
+            result = engine.run_with_hikyuu(strategy, data, symbol)
+        else:
+            result = engine.run(strategy, data, symbol)
         results[symbol] = result
         
         # 打印结果
-        print(f"\n{'='*40}")
-        print(f"回测结果 - {symbol}")
-        print(f"{'='*40}")
-        print(f"总收益率:   {result.total_return:>10.2%}")
-        print(f"年化收益率: {result.annual_return:>10.2%}")
-        print(f"夏普比率:   {result.sharpe_ratio:>10.2f}")
-        print(f"最大回撤:   {result.max_drawdown:>10.2%}")
-        print(f"胜率:       {result.win_rate:>10.2%}")
-        print(f"交易次数:   {result.trade_count:>10d}")
-        print(f"{'='*40}")
+        print_result(symbol, result)
     
     return results
 
 
-def run_live_trading(symbols: list, strategy=None):
-    """运行实盘交易"""
+def run_portfolio_backtest(symbols: list, strategy=None):
+    """运行组合回测（多标的共享资金）"""
+    log.info("=" * 50)
+    log.info("开始组合回测模式")
+    log.info("=" * 50)
+    
+    from data.fetcher import DataFetcher
+    from backtest.portfolio import PortfolioBacktestEngine
+    
+    strategy = strategy or MACrossStrategy(short_period=5, long_period=20)
+    histories = DataFetcher.get_many_histories(
+        symbols,
+        config.backtest.start_date,
+        config.backtest.end_date
+    )
+    if not histories:
+        log.warning("无法获取任何标的的历史数据")
+        return None
+    
+    engine = PortfolioBacktestEngine(config.backtest, config.trading)
+    result = engine.run_portfolio(strategy, histories)
+    print_result(f"组合({len(histories)}只)", result)
+    return result
+
+
+def run_live_trading(symbols: list, strategy=None, record: str = None):
+    """
+    运行实盘交易
+    
+    Args:
+        record: 将监控获取的每份行情快照录制到该文件（供 replay 模式回放）
+    """
     log.info("=" * 50)
     log.info("开始实盘交易模式")
     log.info("=" * 50)
     
+    from trader.executor import TradeExecutor
+    from trader.paper import PaperBroker
+    from monitor.realtime import RealtimeMonitor
+    from monitor.async_monitor import AsyncRealtimeMonitor
+    from monitor.replay import QuoteRecorder
+    
     strategy = strategy or MACrossStrategy(short_period=5, long_period=20)
     
     # 初始化交易执行器
     executor = TradeExecutor(config.trading)
+    recorder = None
     
     if not executor.connect():
         log.error("无法连接交易客户端，退出")
@@ -84,30 +217,114 @@ def run_live_trading(symbols: list, strategy=None):
         
         positions = executor.get_positions()
         log.info(f"当前持仓: {positions}")
+        executor.account.reconcile(balance, positions)
+        
+        if config.trading.async_orders:
+            executor.start_worker()
         
         # 启动实时监控
-        monitor = RealtimeMonitor(
+        monitor_cls = AsyncRealtimeMonitor if config.monitor.async_mode else RealtimeMonitor
+        monitor = monitor_cls(
             strategy=strategy,
             executor=executor,
             symbols=symbols,
             config=config.monitor
         )
+        if isinstance(executor.trader, PaperBroker):
+            # 模拟券商按监控拿到的行情撮合，并跟随监控的时钟
+            monitor.add_snapshot_listener(executor.trader.on_snapshot)
+            executor.trader.clock = monitor.now
+        if record:
+            recorder = QuoteRecorder(record)
+            monitor.add_snapshot_listener(recorder.record)
         
         monitor.start()
-        
+    
     except KeyboardInterrupt:
         log.info("收到中断信号")
     finally:
         executor.disconnect()
+        if recorder is not None:
+            recorder.close()
+
+
+def run_replay(symbols: list, path: str, speed: float = 0.0, strategy=None):
+    """
+    回放录制的行情，走完整的实盘链路（监控 -> 执行器 -> 模拟券商）
+    
+    Args:
+        path: QuoteRecorder 录制的文件
+        speed: 回放倍速，1 为原速，<=0 为最快速度
+    """
+    log.info("=" * 50)
+    log.info(f"开始行情回放: {path}，倍速: {speed if speed > 0 else '最快'}")
+    log.info("=" * 50)
+    
+    from trader.executor import TradeExecutor
+    from trader.paper import PaperBroker
+    from monitor.realtime import RealtimeMonitor
+    from monitor.replay import QuoteReplay
+    
+    strategy = strategy or MACrossStrategy(short_period=5, long_period=20)
+    
+    # 回放只在每份快照到达时撮合，且不启动下单线程（订单在处理快照时同步发送），结果可复现
+    broker = PaperBroker.from_config(config.trading)
+    executor = TradeExecutor(config.trading, trader=broker)
+    executor.refresh_account()
+    
+    monitor = RealtimeMonitor(strategy=strategy, executor=executor, symbols=symbols, config=config.monitor)
+    monitor.add_snapshot_listener(broker.on_snapshot)
+    broker.clock = monitor.now
+    
+    try:
+        monitor.preload_history()
+        stats = monitor.replay(QuoteReplay(path, speed))
+    finally:
+        executor.disconnect()
+    
+    print(f"\n{'='*40}")
+    print("回放统计")
+    print(f"{'='*40}")
+    print(f"快照数:     {stats['snapshots']:>10d}")
+    print(f"跳过:       {stats['skipped']:>10d}")
+    print(f"快照/秒:    {stats['ticks_per_second']:>10.1f}")
+    for key, value in broker.stats().items():
+        print(f"{key}: {value}")
+    print(f"{'='*40}")
+    return stats
+
+
+def profile_imports(mode: str):
+    """
+    打印启动和所选模式各子系统的导入耗时
+    
+    子系统按 MODE_MODULES 的顺序依次导入，共用的依赖计入最先导入它的模块；
+    启动耗时从 main.py 开始执行算起，不含解释器自身的启动。
+    """
+    startup = time.perf_counter() - _STARTED
+    print(f"\n{'='*40}")
+    print(f"导入耗时 - {mode}")
+    print(f"{'='*40}")
+    print(f"{startup * 1000:>8.1f} ms  启动（配置/日志/策略）")
+    total = startup
+    for name in MODE_MODULES[mode]:
+        start = time.perf_counter()
+        importlib.import_module(name)
+        elapsed = time.perf_counter() - start
+        total += elapsed
+        print(f"{elapsed * 1000:>8.1f} ms  {name}")
+    print(f"{total * 1000:>8.1f} ms  合计")
+    print(f"akshare 已加载: {'是' if 'akshare' in sys.modules else '否'}")
+    print(f"{'='*40}")
 
 
 def main():
     parser = argparse.ArgumentParser(description="A股量化交易系统")
     parser.add_argument(
         "--mode", 
-        choices=["backtest", "live"], 
+        choices=["backtest", "live", "replay"], 
         default="backtest",
-        help="运行模式: backtest(回测) 或 live(实盘)"
+        help="运行模式: backtest(回测)、live(实盘) 或 replay(回放录制的行情，使用模拟券商)"
     )
     parser.add_argument(
         "--symbols",
@@ -117,24 +334,114 @@ def main():
     )
     parser.add_argument(
         "--broker",
-        choices=["ths", "gj"],
+        choices=["ths", "gj", "paper"],
         default="ths",
-        help="券商类型: ths(同花顺) 或 gj(国金/东财)"
+        help="券商类型: ths(同花顺)、gj(国金/东财) 或 paper(模拟券商)"
+    )
+    parser.add_argument(
+        "--async-monitor",
+        action="store_true",
+        help="实盘模式使用 asyncio 监控"
+    )
+    parser.add_argument(
+        "--portfolio",
+        action="store_true",
+        help="回测模式下按组合回测（共享资金，仓位上限取 max_position_pct）"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="回测并行进程数，0 表示使用全部CPU核"
+    )
+    parser.add_argument(
+        "--minute",
+        type=int,
+        choices=PERIODS,
+        default=None,
+        help="回测模式下使用本地分钟线存储，指定K线周期（分钟）"
+    )
+    parser.add_argument(
+        "--chunked",
+        action="store_true",
+        help="分钟线回测按块流式执行（长历史时内存占用固定）"
+    )
+    parser.add_argument(
+        "--sync-minute",
+        action="store_true",
+        help="回测前先下载最近的1分钟K线追加到本地分钟线存储"
+    )
+    parser.add_argument(
+        "--hikyuu",
+        action="store_true",
+        help="回测模式下使用 Hikyuu 引擎（未安装时回退到内置引擎）"
+    )
+    
+    parser.add_argument(
+        "--record",
+        default=None,
+        help="实盘模式下录制行情快照到该文件"
+    )
+    parser.add_argument(
+        "--quotes",
+        default=None,
+        help="回放模式读取的行情录制文件"
+    )
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=0.0,
+        help="回放倍速：1 为原速，100 为百倍速，0 为最快速度"
+    )
+    parser.add_argument(
+        "--log-profile",
+        choices=list(PROFILES),
+        default=config.log.profile,
+        help="日志方案: default(同步)、production(异步写入) 或 quiet(只输出警告，适合大规模回测)"
+    )
+    parser.add_argument(
+        "--profile-import",
+        action="store_true",
+        help="只输出启动和所选模式各子系统的导入耗时，不运行"
     )
     
     args = parser.parse_args()
     
+    if args.log_profile != config.log.profile:
+        config.log.profile = args.log_profile
+        setup_logger(config.log.log_dir, config.log.profile)
+    
     # 更新配置
     if args.broker == "gj":
         config.trading.broker = BrokerType.DONGCAIFU
+    elif args.broker == "paper":
+        config.trading.broker = BrokerType.PAPER
+    if args.async_monitor:
+        config.monitor.async_mode = True
+    
+    if args.profile_import:
+        profile_imports(args.mode)
+        return
     
     log.info(f"运行模式: {args.mode}")
     log.info(f"交易标的: {args.symbols}")
     
-    if args.mode == "backtest":
-        run_backtest(args.symbols)
+    if args.mode == "backtest" and args.sync_minute:
+        from data.fetcher import DataFetcher
+        DataFetcher.sync_minute_bars(args.symbols)
+    
+    if args.mode == "backtest" and args.minute:
+        run_minute_backtest(args.symbols, args.minute, workers=args.workers, chunked=args.chunked)
+    elif args.mode == "backtest" and args.portfolio:
+        run_portfolio_backtest(args.symbols)
+    elif args.mode == "backtest":
+        run_backtest(args.symbols, workers=args.workers, use_hikyuu=args.hikyuu)
+    elif args.mode == "replay":
+        if not args.quotes:
+            parser.error("回放模式需要 --quotes 指定行情录制文件")
+        run_replay(args.symbols, args.quotes, speed=args.speed)
     else:
-        run_live_trading(args.symbols)
+        run_live_trading(args.symbols, record=args.record)
 
 
 if __name__ == "__main__":
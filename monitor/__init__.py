@@ -1,3 +1,5 @@
 from .realtime import RealtimeMonitor
+from .async_monitor import AsyncRealtimeMonitor
+from .replay import QuoteRecorder, QuoteReplay
 
-__all__ = ['RealtimeMonitor']
+__all__ = ['RealtimeMonitor', 'AsyncRealtimeMonitor', 'QuoteRecorder', 'QuoteReplay']
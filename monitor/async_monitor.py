@@ -0,0 +1,172 @@
+"""
+基于 asyncio 的实时监控
+
+行情获取、信号计算、下单执行拆成三个任务，通过队列衔接：
+- 行情任务按墙钟边界（refresh_interval 的整数倍）取数，错过的节拍直接跳过，不累积漂移；
+  非交易时段一次性休眠到下一个交易时段开始
+- 信号任务只处理最新一份快照，行情变化快于计算时旧快照被丢弃
+- 下单任务在独立的单线程中调用券商接口，慢速下单不阻塞下一轮行情与信号计算
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+from strategy.base import BaseStrategy, Signal
+from trader.executor import TradeExecutor
+from config.settings import MonitorConfig
+from monitor.realtime import RealtimeMonitor
+from utils.logger import log
+
+
+class AsyncRealtimeMonitor(RealtimeMonitor):
+    """asyncio 实时行情监控器"""
+    
+    def __init__(
+        self,
+        strategy: BaseStrategy,
+        executor: TradeExecutor,
+        symbols: List[str],
+        config: MonitorConfig = None,
+        order_queue_size: int = 1000
+    ):
+        super().__init__(strategy, executor, symbols, config)
+        self.order_queue_size = order_queue_size
+        self.tick_latencies = deque(maxlen=1000)  # 最近的 行情到信号 耗时（秒）
+        self.skipped_ticks = 0
+        self._tasks: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # 网络请求与券商调用分开：easytrader 的客户端自动化不是线程安全的
+        self._io_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="monitor-io")
+        self._broker_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="monitor-broker")
+    
+    def _next_boundary(self, after: float) -> float:
+        """after 之后的下一个 refresh_interval 墙钟整数倍时刻"""
+        interval = self.config.refresh_interval
+        return (math.floor(after / interval) + 1) * interval
+    
+    async def _sleep_until_trading(self) -> bool:
+        """非交易时段休眠到下一个交易时段，返回是否发生了休眠"""
+        wait = self.seconds_until_trading()
+        if wait <= 0:
+            return False
+        log.info(f"非交易时间，休眠 {wait:.0f} 秒")
+        await asyncio.sleep(wait)
+        return True
+    
+    async def _quote_loop(self, snapshots: asyncio.Queue):
+        """行情任务：按墙钟节拍获取全市场快照"""
+        loop = asyncio.get_running_loop()
+        next_tick = self._next_boundary(time.time())
+        
+        while self.is_running:
+            if await self._sleep_until_trading():
+                next_tick = self._next_boundary(time.time())
+                continue
+            
+            delay = next_tick - time.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            
+            started = time.monotonic()
+            try:
+                snapshot = await loop.run_in_executor(self._io_pool, self.fetcher.get_spot_snapshot)
+            except Exception as e:
+                log.error(f"获取实时行情失败: {e}")
+            else:
+                # 只保留最新快照
+                if snapshots.full():
+                    snapshots.get_nowait()
+                snapshots.put_nowait((started, snapshot))
+            
+            # 漂移校正：以理论节拍递推，落后超过一个周期时跳到下一个边界
+            next_tick += self.config.refresh_interval
+            now = time.time()
+            if next_tick <= now:
+                missed = int((now - next_tick) // self.config.refresh_interval) + 1
+                self.skipped_ticks += missed
+                log.warning(f"行情处理落后，跳过 {missed} 个节拍")
+                next_tick = self._next_boundary(now)
+    
+    def _evaluate_all(self, snapshot) -> List[Signal]:
+        self._publish_snapshot(snapshot)
+        signals = []
+        for symbol in self.symbols:
+            try:
+                signal = self.evaluate_symbol(symbol, snapshot)
+                if signal is not None:
+                    signals.append(signal)
+            except Exception as e:
+                log.error(f"处理 {symbol} 信号时出错: {e}")
+        return signals
+    
+    async def _signal_loop(self, snapshots: asyncio.Queue, orders: asyncio.Queue):
+        """信号任务：对最新快照计算所有标的的信号"""
+        loop = asyncio.get_running_loop()
+        while self.is_running:
+            started, snapshot = await snapshots.get()
+            signals = await loop.run_in_executor(self._io_pool, self._evaluate_all, snapshot)
+            self.tick_latencies.append(time.monotonic() - started)
+            
+            for signal in signals:
+                try:
+                    orders.put_nowait(signal)
+                except asyncio.QueueFull:
+                    log.error(f"下单队列已满，丢弃信号: {signal.symbol} {signal.signal_type.value}")
+    
+    async def _order_loop(self, orders: asyncio.Queue):
+        """下单任务：在券商专用线程中计算数量并执行"""
+        loop = asyncio.get_running_loop()
+        while self.is_running:
+            signal = await orders.get()
+            try:
+                await loop.run_in_executor(self._broker_pool, self.submit_signal, signal)
+            except Exception as e:
+                log.error(f"执行 {signal.symbol} 交易时出错: {e}")
+    
+    async def run(self):
+        """运行监控直到 stop() 被调用"""
+        log.info(f"启动异步实时监控，标的: {self.symbols}")
+        self.is_running = True
+        self._loop = asyncio.get_running_loop()
+        await self._loop.run_in_executor(self._io_pool, self.preload_history)
+        
+        snapshots = asyncio.Queue(maxsize=1)
+        orders = asyncio.Queue(maxsize=self.order_queue_size)
+        self._tasks = [
+            asyncio.ensure_future(self._quote_loop(snapshots)),
+            asyncio.ensure_future(self._signal_loop(snapshots, orders)),
+            asyncio.ensure_future(self._order_loop(orders)),
+        ]
+        try:
+            await asyncio.gather(*self._tasks)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.is_running = False
+            log.info("实时监控已停止")
+    
+    def start(self):
+        """启动监控（阻塞）"""
+        try:
+            asyncio.run(self.run())
+        except KeyboardInterrupt:
+            self.stop()
+        finally:
+            self._io_pool.shutdown(wait=False)
+            self._broker_pool.shutdown(wait=True)
+    
+    def stop(self):
+        """停止监控，可从其他线程调用"""
+        self.is_running = False
+        if self._loop is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._cancel_tasks)
+        except RuntimeError:
+            pass  # 事件循环已关闭
+    
+    def _cancel_tasks(self):
+        for task in self._tasks:
+            task.cancel()
@@ -0,0 +1,145 @@
+"""
+实时K线缓冲区 - 预分配的 NumPy 定长K线存储
+
+每个标的一个 BarBuffer：
+- 追加新K线为 O(1)（底层数组长度为容量的两倍，写满后把最近 capacity 根整体前移，均摊 O(1)）
+- 实时 tick 原地更新当前K线的 high/low/close/volume，跨越周期边界时滚动到新K线
+- view()/frame() 返回底层数组的切片，不复制数据
+"""
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+
+FIELDS = ("open", "high", "low", "close", "volume")
+
+
+class BarBuffer:
+    """定长K线缓冲区（OHLCV + 时间戳）"""
+    
+    def __init__(self, capacity: int = 512, period: str = "1D"):
+        """
+        Args:
+            capacity: 保留的K线根数，超出后丢弃最旧的
+            period: K线周期（pandas 频率字符串，如 "1D"、"1min"、"5min"）
+        """
+        if capacity < 2:
+            raise ValueError(f"capacity 至少为 2: {capacity}")
+        self.capacity = capacity
+        self.period = period
+        self._period_ns = pd.Timedelta(period).value
+        size = capacity * 2
+        self._timestamp = np.zeros(size, dtype=np.int64)
+        self._data: Dict[str, np.ndarray] = {f: np.zeros(size, dtype=np.float64) for f in FIELDS}
+        self._start = 0
+        self._end = 0
+        self._last_cum_volume: Optional[float] = None
+    
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, capacity: int = 512, period: str = "1D") -> "BarBuffer":
+        """用历史K线初始化"""
+        buffer = cls(max(capacity, 2), period)
+        df = df.iloc[-buffer.capacity:]
+        n = len(df)
+        buffer._timestamp[:n] = df.index.values.astype("datetime64[ns]").astype(np.int64)
+        for f in FIELDS:
+            if f in df.columns:
+                buffer._data[f][:n] = df[f].to_numpy(dtype=np.float64)
+        buffer._end = n
+        return buffer
+    
+    def __len__(self) -> int:
+        return self._end - self._start
+    
+    @property
+    def last_timestamp(self) -> Optional[pd.Timestamp]:
+        """最新一根K线的时间"""
+        if len(self) == 0:
+            return None
+        return pd.Timestamp(self._timestamp[self._end - 1])
+    
+    def _bar_start(self, ts_ns: int) -> int:
+        return ts_ns - ts_ns % self._period_ns
+    
+    def _reserve(self):
+        """保证末尾有一个空位，必要时丢弃最旧K线并整体前移"""
+        if len(self) >= self.capacity:
+            self._start += 1
+        if self._end == len(self._timestamp):
+            n = len(self)
+            self._timestamp[:n] = self._timestamp[self._start:self._end]
+            for arr in self._data.values():
+                arr[:n] = arr[self._start:self._end]
+            self._start, self._end = 0, n
+    
+    def append(self, timestamp, open: float, high: float, low: float, close: float, volume: float = 0.0):
+        """追加一根完整K线"""
+        self._reserve()
+        i = self._end
+        self._timestamp[i] = pd.Timestamp(timestamp).value
+        self._data["open"][i] = open
+        self._data["high"][i] = high
+        self._data["low"][i] = low
+        self._data["close"][i] = close
+        self._data["volume"][i] = volume
+        self._end += 1
+    
+    def update_tick(self, timestamp, price: float, cum_volume: float = None) -> bool:
+        """
+        用实时成交价更新K线
+        
+        Args:
+            timestamp: tick 时间
+            price: 最新价
+            cum_volume: 当日累计成交量（行情快照中的“成交量”），用于计算增量
+        
+        Returns:
+            bool: 是否开始了一根新K线
+        """
+        ts_ns = pd.Timestamp(timestamp).value
+        bar_start = self._bar_start(ts_ns)
+        daily = self._period_ns >= pd.Timedelta("1D").value
+        
+        # 日线直接使用当日累计成交量，分钟线使用与上一个 tick 的增量
+        # （第一个 tick 只记录累计量：此前的成交不属于当前K线）
+        volume = 0.0
+        if cum_volume is not None:
+            last = self._last_cum_volume
+            if last is not None:
+                volume = cum_volume - last if cum_volume >= last else cum_volume
+            self._last_cum_volume = cum_volume
+        
+        i = self._end - 1
+        if len(self) > 0 and self._bar_start(int(self._timestamp[i])) == bar_start:
+            self._data["high"][i] = max(self._data["high"][i], price)
+            self._data["low"][i] = min(self._data["low"][i], price)
+            self._data["close"][i] = price
+            if daily and cum_volume is not None:
+                self._data["volume"][i] = cum_volume
+            else:
+                self._data["volume"][i] += volume
+            return False
+        
+        if daily:
+            volume = cum_volume or 0.0
+        self.append(bar_start, price, price, price, price, volume)
+        return True
+    
+    def view(self, field: str, n: int = None) -> np.ndarray:
+        """最近 n 根K线某个字段的只读视图（不复制）"""
+        start = self._start if n is None else max(self._end - n, self._start)
+        if field == "timestamp":
+            arr = self._timestamp[start:self._end]
+        else:
+            arr = self._data[field][start:self._end]
+        arr = arr.view()
+        arr.flags.writeable = False
+        return arr
+    
+    def frame(self, n: int = None) -> pd.DataFrame:
+        """
+        最近 n 根K线的 DataFrame，列直接引用底层数组
+        
+        只读使用；下一次 append/update_tick 后内容可能变化，需要保留时请 copy()。
+        """
+        index = pd.DatetimeIndex(self.view("timestamp", n).view("datetime64[ns]"))
+        return pd.DataFrame({f: self.view(f, n) for f in FIELDS}, index=index, copy=False)
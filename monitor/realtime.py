@@ -3,12 +3,15 @@
 """
 import time
 import schedule
-from typing import List, Callable
-from datetime import datetime
+import pandas as pd
+from typing import Dict, Iterable, List, Callable, Optional
+from datetime import datetime, timedelta
 from data.fetcher import DataFetcher
-from strategy.base import BaseStrategy, SignalType
+from data.snapshot import SpotSnapshot
+from strategy.base import BaseStrategy, Signal, SignalType
 from trader.executor import TradeExecutor
 from config.settings import MonitorConfig
+from monitor.bar_buffer import BarBuffer
 from utils.logger import log
 
 
@@ -28,28 +31,135 @@ class RealtimeMonitor:
         self.config = config or MonitorConfig()
         self.fetcher = DataFetcher()
         self.is_running = False
+        self.clock: Callable[[], datetime] = datetime.now
         self._history_cache = {}
+        self._bars: Dict[str, BarBuffer] = {}  # 实时K线（含盘中更新）
+        self.snapshot_listeners: List[Callable[[SpotSnapshot], None]] = []  # 每份新快照的订阅者（如模拟券商撮合）
+    
+    def now(self) -> datetime:
+        """当前时间（回放时可替换 clock 使用模拟时钟）"""
+        return self.clock()
     
     def is_trading_time(self) -> bool:
         """判断是否在交易时间"""
-        now = datetime.now()
+        return self.seconds_until_trading() == 0
+    
+    def seconds_until_trading(self, now: datetime = None) -> float:
+        """距离下一个交易时段开始的秒数，交易时段内返回 0"""
+        now = now or self.now()
         current_time = now.strftime("%H:%M")
         
         for start, end in self.config.trading_hours:
             if start <= current_time <= end:
-                return True
-        return False
+                return 0.0
+        
+        starts = sorted(datetime.strptime(start, "%H:%M").time() for start, _ in self.config.trading_hours)
+        for start in starts:
+            next_start = datetime.combine(now.date(), start)
+            if next_start > now:
+                return (next_start - now).total_seconds()
+        next_start = datetime.combine(now.date() + timedelta(days=1), starts[0])
+        return (next_start - now).total_seconds()
     
     def _load_history(self, symbol: str, days: int = 60):
         """加载历史数据用于策略计算"""
         if symbol not in self._history_cache:
-            end_date = datetime.now().strftime("%Y-%m-%d")
-            start_date = (datetime.now() - pd.Timedelta(days=days)).strftime("%Y-%m-%d")
+            end_date = self.now().strftime("%Y-%m-%d")
+            start_date = (self.now() - pd.Timedelta(days=days)).strftime("%Y-%m-%d")
             self._history_cache[symbol] = self.fetcher.get_stock_history(
                 symbol, start_date, end_date
             )
         return self._history_cache[symbol]
     
+    def _get_bars(self, symbol: str) -> Optional[BarBuffer]:
+        """获取标的的实时K线缓冲区，首次使用时由历史数据初始化"""
+        bars = self._bars.get(symbol)
+        if bars is None:
+            history = self._load_history(symbol)
+            if history.empty:
+                return None
+            bars = self._bars[symbol] = BarBuffer.from_frame(
+                history, self.config.bar_capacity, self.config.bar_period
+            )
+        return bars
+    
+    def preload_history(self, days: int = 60):
+        """启动前并发预加载所有标的的历史数据"""
+        end_date = self.now().strftime("%Y-%m-%d")
+        start_date = (self.now() - pd.Timedelta(days=days)).strftime("%Y-%m-%d")
+        missing = [s for s in self.symbols if s not in self._history_cache]
+        if missing:
+            self._history_cache.update(self.fetcher.get_many_histories(missing, start_date, end_date))
+    
+    def evaluate_symbol(self, symbol: str, snapshot) -> Optional[Signal]:
+        """
+        计算单个标的的信号
+        
+        Returns:
+            Signal: 非持有信号；持有、无数据或无实时价格时返回 None
+        """
+        # 获取历史数据
+        bars = self._get_bars(symbol)
+        if bars is None:
+            return None
+        
+        # 获取实时价格并更新
+        current_price = snapshot.price(symbol)
+        if current_price is None:
+            return None
+        
+        # 实时价格原地更新当前K线（跨周期时滚动到新K线）
+        bars.update_tick(self.now(), current_price, snapshot.volume(symbol))
+        
+        # 计算信号
+        signal = self.strategy.calculate_signals(bars.frame(), symbol)
+        if signal.signal_type == SignalType.HOLD:
+            return None
+        
+        signal.price = current_price
+        log.info(f"检测到信号: {symbol} - {signal.signal_type.value}, 原因: {signal.reason}")
+        return signal
+    
+    def size_signal(self, signal: Signal) -> Signal:
+        """根据本地缓存的账户资金/持仓计算交易数量"""
+        self.executor.ensure_account()
+        account = self.executor.account
+        
+        if signal.signal_type == SignalType.BUY:
+            max_amount = account.available_cash() * self.executor.config.max_position_pct
+            signal.quantity = int(max_amount / signal.price / 100) * 100
+        else:
+            signal.quantity = account.available_quantity(signal.symbol)
+        return signal
+    
+    def submit_signal(self, signal: Signal):
+        """计算数量并提交订单（下单线程运行时不等待券商返回）"""
+        signal = self.size_signal(signal)
+        if signal.quantity and signal.quantity > 0:
+            self.executor.submit(signal)
+    
+    def add_snapshot_listener(self, listener: Callable[[SpotSnapshot], None]):
+        """订阅行情快照，在计算信号之前调用"""
+        self.snapshot_listeners.append(listener)
+    
+    def _publish_snapshot(self, snapshot: SpotSnapshot):
+        for listener in self.snapshot_listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                log.error(f"行情快照订阅者出错: {e}")
+    
+    def process_snapshot(self, snapshot: SpotSnapshot):
+        """处理一份行情快照：通知订阅者，计算所有标的的信号并下单"""
+        self._publish_snapshot(snapshot)
+        for symbol in self.symbols:
+            try:
+                signal = self.evaluate_symbol(symbol, snapshot)
+                if signal is not None:
+                    self.submit_signal(signal)
+            except Exception as e:
+                log.error(f"处理 {symbol} 信号时出错: {e}")
+    
     def check_signals(self):
         """检查所有标的的信号"""
         if not self.is_trading_time():
@@ -57,60 +167,62 @@ class RealtimeMonitor:
             return
         
         log.info("开始检查交易信号...")
-        quotes = self.fetcher.get_realtime_quote(self.symbols)
+        try:
+            snapshot = self.fetcher.get_spot_snapshot()
+        except Exception as e:
+            log.error(f"获取实时行情失败: {e}")
+            return
         
-        for symbol in self.symbols:
-            try:
-                # 获取历史数据
-                history = self._load_history(symbol)
-                if history.empty:
+        self.process_snapshot(snapshot)
+    
+    def replay(self, snapshots: Iterable[SpotSnapshot]) -> Dict[str, float]:
+        """
+        回放行情快照序列（如 monitor.replay.QuoteReplay）
+        
+        回放期间 clock 取快照时间（模拟时钟），交易时段判断同样按模拟时间，时段外的快照跳过。
+        
+        Returns:
+            Dict: 处理/跳过的快照数、总耗时、处理耗时与每秒处理快照数（不含回放等待）
+        """
+        clock = self.clock
+        processed = skipped = 0
+        busy = 0.0
+        started = time.monotonic()
+        self.is_running = True
+        try:
+            for snapshot in snapshots:
+                if not self.is_running:
+                    break
+                self.clock = lambda ts=snapshot.timestamp: ts
+                if not self.is_trading_time():
+                    skipped += 1
                     continue
-                
-                # 获取实时价格并更新
-                quote = quotes[quotes["代码"] == symbol]
-                if not quote.empty:
-                    current_price = float(quote["最新价"].values[0])
-                    # 将实时价格追加到历史数据
-                    import pandas as pd
-                    new_row = pd.DataFrame({
-                        "open": [current_price],
-                        "high": [current_price],
-                        "low": [current_price],
-                        "close": [current_price],
-                        "volume": [0]
-                    }, index=[pd.Timestamp.now()])
-                    history = pd.concat([history, new_row])
-                
-                # 计算信号
-                signal = self.strategy.calculate_signals(history, symbol)
-                
-                if signal.signal_type != SignalType.HOLD:
-                    log.info(f"检测到信号: {symbol} - {signal.signal_type.value}, 原因: {signal.reason}")
-                    
-                    # 计算交易数量
-                    if signal.signal_type == SignalType.BUY:
-                        balance = self.executor.get_balance()
-                        available = balance.get("可用金额", 0)
-                        max_amount = available * self.executor.config.max_position_pct
-                        signal.quantity = int(max_amount / current_price / 100) * 100
-                    else:
-                        positions = self.executor.get_positions()
-                        for pos in positions:
-                            if pos.get("证券代码") == symbol:
-                                signal.quantity = int(pos.get("可用余额", 0))
-                                break
-                    
-                    # 执行交易
-                    if signal.quantity and signal.quantity > 0:
-                        self.executor.execute_signal(signal)
-                        
-            except Exception as e:
-                log.error(f"处理 {symbol} 信号时出错: {e}")
+                tick = time.perf_counter()
+                self.process_snapshot(snapshot)
+                busy += time.perf_counter() - tick
+                processed += 1
+        finally:
+            self.clock = clock
+            self.is_running = False
+        
+        stats = {
+            "snapshots": processed,
+            "skipped": skipped,
+            "seconds": time.monotonic() - started,
+            "busy_seconds": busy,
+            "ticks_per_second": processed / busy if busy > 0 else 0.0,
+        }
+        log.info(
+            f"回放完成，处理 {processed} 份快照（跳过非交易时段 {skipped} 份），"
+            f"{stats['ticks_per_second']:.1f} 快照/秒"
+        )
+        return stats
     
     def start(self):
         """启动监控"""
         log.info(f"启动实时监控，标的: {self.symbols}")
         self.is_running = True
+        self.preload_history()
         
         # 设置定时任务
         schedule.every(self.config.refresh_interval).seconds.do(self.check_signals)
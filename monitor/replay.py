@@ -0,0 +1,168 @@
+"""
+行情录制与回放
+
+录制：每份全市场快照追加写入一个只追加的二进制文件，只保存监控用到的 代码/最新价/成交量。
+文件由若干帧组成，每帧为定长帧头 + zlib 压缩的内容：
+- 代码表帧：换行分隔的代码列表，之后的行情帧按行号引用（首帧及代码列表变化时写入）
+- 行情帧：与上一份快照相比发生变化的行（行号 int32、最新价 float64、成交量 float64）
+一份约 5000 只股票的快照，变化的行通常只占一部分，压缩后每帧几十 KB 以内。
+进程中断导致的末尾不完整帧在读取时忽略。
+
+回放：QuoteReplay 按录制时的时间间隔（可加速）依次产出快照，交给 RealtimeMonitor.replay，
+回放期间监控的时钟取快照时间。
+"""
+import struct
+import time
+import zlib
+from pathlib import Path
+from typing import Iterator, List, Optional
+import numpy as np
+import pandas as pd
+from data.snapshot import SpotSnapshot
+from utils.logger import log
+
+_HEADER = struct.Struct("<qBI")  # 时间戳（纳秒）、帧类型、压缩后长度
+_FRAME_CODES = 0
+_FRAME_QUOTES = 1
+
+
+def _columns(snapshot: SpotSnapshot):
+    """快照的 代码/最新价/成交量 数组"""
+    if "代码" in snapshot.df.columns:
+        codes = snapshot.df["代码"].astype(str).to_numpy()
+    else:
+        codes = np.empty(0, dtype=object)
+    return codes, snapshot.prices, snapshot.volumes
+
+
+class QuoteRecorder:
+    """行情快照录制器（可作为 RealtimeMonitor 的快照订阅者）"""
+    
+    def __init__(self, path: str, symbols: List[str] = None, level: int = 1):
+        """
+        Args:
+            path: 录制文件，已存在时追加
+            symbols: 只录制这些代码（含或不含交易所前缀均可），默认全市场
+            level: zlib 压缩级别
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.symbols = set(symbols) if symbols else None
+        self.level = level
+        self.frames = 0
+        self.bytes_written = 0
+        self._codes: Optional[np.ndarray] = None
+        self._prices: Optional[np.ndarray] = None
+        self._volumes: Optional[np.ndarray] = None
+        self._file = open(self.path, "ab")
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def __call__(self, snapshot: SpotSnapshot):
+        self.record(snapshot)
+    
+    def _write(self, timestamp: int, kind: int, payload: bytes):
+        data = zlib.compress(payload, self.level)
+        self._file.write(_HEADER.pack(timestamp, kind, len(data)))
+        self._file.write(data)
+        self.bytes_written += _HEADER.size + len(data)
+    
+    def record(self, snapshot: SpotSnapshot):
+        """追加一份快照"""
+        codes, prices, volumes = _columns(snapshot)
+        if self.symbols is not None:
+            keep = np.array([c in self.symbols or c[-6:] in self.symbols for c in codes], dtype=bool)
+            codes, prices, volumes = codes[keep], prices[keep], volumes[keep]
+        timestamp = pd.Timestamp(snapshot.timestamp).value
+        
+        if self._codes is None or len(codes) != len(self._codes) or (codes != self._codes).any():
+            self._write(timestamp, _FRAME_CODES, "\n".join(codes).encode("utf-8"))
+            self._codes = codes
+            changed = np.arange(len(codes), dtype=np.int32)
+        else:
+            # NaN 与 NaN 视为未变化
+            changed = np.flatnonzero(
+                ~(((prices == self._prices) | (np.isnan(prices) & np.isnan(self._prices)))
+                  & ((volumes == self._volumes) | (np.isnan(volumes) & np.isnan(self._volumes))))
+            ).astype(np.int32)
+        
+        payload = (
+            struct.pack("<i", len(changed))
+            + changed.tobytes()
+            + prices[changed].astype("<f8").tobytes()
+            + volumes[changed].astype("<f8").tobytes()
+        )
+        self._write(timestamp, _FRAME_QUOTES, payload)
+        self._file.flush()
+        self._prices = prices.copy()
+        self._volumes = volumes.copy()
+        self.frames += 1
+    
+    def close(self):
+        """关闭文件"""
+        if not self._file.closed:
+            self._file.close()
+            log.info(f"行情录制结束: {self.path}，{self.frames} 份快照，{self.bytes_written / 1e6:.1f} MB")
+
+
+def read_snapshots(path: str) -> Iterator[SpotSnapshot]:
+    """按顺序读取录制文件中的快照"""
+    codes: Optional[np.ndarray] = None
+    index = prices = volumes = None
+    with open(path, "rb") as f:
+        while True:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return
+            timestamp, kind, length = _HEADER.unpack(header)
+            data = f.read(length)
+            if len(data) < length:
+                log.warning(f"{path} 末尾帧不完整，已忽略")
+                return
+            payload = zlib.decompress(data)
+            
+            if kind == _FRAME_CODES:
+                codes = np.array(payload.decode("utf-8").split("\n") if payload else [], dtype=object)
+                index = SpotSnapshot.build_index(codes)
+                prices = np.full(len(codes), np.nan)
+                volumes = np.full(len(codes), np.nan)
+                continue
+            
+            n = struct.unpack_from("<i", payload)[0]
+            offset = 4
+            rows = np.frombuffer(payload, dtype="<i4", count=n, offset=offset)
+            offset += 4 * n
+            prices[rows] = np.frombuffer(payload, dtype="<f8", count=n, offset=offset)
+            offset += 8 * n
+            volumes[rows] = np.frombuffer(payload, dtype="<f8", count=n, offset=offset)
+            
+            df = pd.DataFrame({"代码": codes, "最新价": prices.copy(), "成交量": volumes.copy()})
+            yield SpotSnapshot(df, pd.Timestamp(timestamp).to_pydatetime(), index=index)
+
+
+class QuoteReplay:
+    """
+    录制行情的回放源
+    
+    迭代时按录制时间间隔除以 speed 等待后产出下一份快照；speed <= 0 表示不等待（最快速度）。
+    """
+    
+    def __init__(self, path: str, speed: float = 1.0):
+        self.path = path
+        self.speed = speed
+    
+    def __iter__(self) -> Iterator[SpotSnapshot]:
+        start_wall = start_ts = None
+        for snapshot in read_snapshots(self.path):
+            if self.speed > 0:
+                if start_ts is None:
+                    start_wall, start_ts = time.monotonic(), snapshot.timestamp
+                due = start_wall + (snapshot.timestamp - start_ts).total_seconds() / self.speed
+                delay = due - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            yield snapshot
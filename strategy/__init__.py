@@ -1,3 +1,3 @@
-from .base import BaseStrategy, Signal, SignalType
+from .base import BaseStrategy, Bar, Signal, SignalType
 
-__all__ = ['BaseStrategy', 'Signal', 'SignalType']
+__all__ = ['BaseStrategy', 'Bar', 'Signal', 'SignalType']
@@ -3,8 +3,9 @@
 """
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Optional, List, Dict
+from typing import Any, Callable, Optional, List, Dict
 from enum import Enum
+import numpy as np
 import pandas as pd
 
 
@@ -15,6 +16,17 @@ class SignalType(Enum):
     HOLD = "hold"
 
 
+@dataclass
+class Bar:
+    """单根K线（流式接口使用）"""
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float = 0.0
+    timestamp: Optional[pd.Timestamp] = None
+
+
 @dataclass
 class Signal:
     """交易信号"""
@@ -33,6 +45,7 @@ class BaseStrategy(ABC):
         self.name = name
         self.params = params or {}
         self.positions: Dict[str, int] = {}  # 当前持仓
+        self.feature_cache: Optional[Dict] = None  # 参数寻优时共享的中间结果，由优化器设置
     
     @abstractmethod
     def calculate_signals(self, data: pd.DataFrame, symbol: str) -> Signal:
@@ -48,10 +61,80 @@ class BaseStrategy(ABC):
         """
         pass
     
+    def generate_signals(self, data: pd.DataFrame) -> Optional[np.ndarray]:
+        """
+        批量计算整段行情的信号 - 子类可选实现（向量化回测使用）
+        
+        Args:
+            data: 完整行情数据
+            
+        Returns:
+            np.ndarray: 与 data 等长的信号数组，1-买入，-1-卖出，0-持有；
+                        返回 None 表示不支持，回测引擎将回退到逐K线模式
+        """
+        return None
+    
+    def cached_feature(self, key, compute: Callable[[], Any]):
+        """
+        获取可共享的中间结果（如某周期的均线）
+        
+        设置了 feature_cache 时同一份行情上相同 key 只计算一次，
+        参数寻优中不同参数组合可复用彼此的计算结果。
+        """
+        cache = self.feature_cache
+        if cache is None:
+            return compute()
+        if key not in cache:
+            cache[key] = compute()
+        return cache[key]
+    
+    def hikyuu_signal(self, hku):
+        """
+        转换为 Hikyuu 信号指示器（如 SG_Cross）- 子类可选实现（Hikyuu 回测使用）
+        
+        Args:
+            hku: hikyuu 模块
+            
+        Returns:
+            Hikyuu 信号指示器；返回 None 时由回测引擎根据本策略计算的信号数组构造
+        """
+        return None
+    
+    def signal_reason(self, signal_type: SignalType) -> str:
+        """批量信号对应的触发原因"""
+        return ""
+    
     def on_bar(self, data: pd.DataFrame, symbol: str) -> Signal:
         """每根K线触发"""
         return self.calculate_signals(data, symbol)
     
+    def on_new_bar(self, bar: Bar, symbol: str) -> Signal:
+        """
+        流式接口：输入一根新K线，增量更新该标的的指标状态并返回信号 - 子类可选实现
+        
+        实现时应只维护滚动窗口状态（见 strategy.indicators），保证单次调用为 O(1)。
+        
+        Args:
+            bar: 最新一根K线
+            symbol: 股票代码
+        """
+        raise NotImplementedError(f"{self.name} 未实现流式接口")
+    
+    @property
+    def supports_streaming(self) -> bool:
+        """子类是否实现了流式接口"""
+        return type(self).on_new_bar is not BaseStrategy.on_new_bar
+    
+    def reset_state(self, symbol: Optional[str] = None):
+        """清空流式指标状态，symbol 为 None 时清空全部标的 - 流式策略需实现"""
+        pass
+    
+    def warm_up(self, data: pd.DataFrame, symbol: str):
+        """用历史K线预热流式指标状态（丢弃产生的信号）"""
+        self.reset_state(symbol)
+        for bar in iter_bars(data):
+            self.on_new_bar(bar, symbol)
+    
     def update_position(self, symbol: str, quantity: int):
         """更新持仓"""
         self.positions[symbol] = self.positions.get(symbol, 0) + quantity
@@ -60,4 +143,11 @@ class BaseStrategy(ABC):
     
     def get_position(self, symbol: str) -> int:
         """获取持仓"""
-        return self.positions.get(symbol, 0)
\ No newline at end of file
+        return self.positions.get(symbol, 0)
+
+
+def iter_bars(data: pd.DataFrame):
+    """将行情 DataFrame 逐行转换为 Bar"""
+    volume = data["volume"] if "volume" in data.columns else pd.Series(0.0, index=data.index)
+    for ts, o, h, l, c, v in zip(data.index, data["open"], data["high"], data["low"], data["close"], volume):
+        yield Bar(open=o, high=h, low=l, close=c, volume=v, timestamp=ts)
\ No newline at end of file
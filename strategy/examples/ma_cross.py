@@ -1,8 +1,11 @@
 """
 均线交叉策略示例
 """
+from typing import Dict, Optional
+import numpy as np
 import pandas as pd
-from strategy.base import BaseStrategy, Signal, SignalType
+from strategy.base import BaseStrategy, Bar, Signal, SignalType
+from strategy.indicators import SMA
 
 
 class MACrossStrategy(BaseStrategy):
@@ -19,6 +22,7 @@ class MACrossStrategy(BaseStrategy):
         )
         self.short_period = short_period
         self.long_period = long_period
+        self._states: Dict[str, dict] = {}  # 流式接口的逐标的状态
     
     def calculate_signals(self, data: pd.DataFrame, symbol: str) -> Signal:
         if len(data) < self.long_period + 1:
@@ -56,3 +60,79 @@ class MACrossStrategy(BaseStrategy):
             )
         
         return Signal(symbol=symbol, signal_type=SignalType.HOLD, price=current_price)
+    
+    def generate_signals(self, data: pd.DataFrame) -> np.ndarray:
+        """整段行情一次性计算金叉/死叉信号"""
+        close = data["close"]
+        ma_short = self.cached_feature(("sma", self.short_period), lambda: close.rolling(self.short_period).mean().to_numpy())
+        ma_long = self.cached_feature(("sma", self.long_period), lambda: close.rolling(self.long_period).mean().to_numpy())
+        
+        signals = np.zeros(len(data), dtype=np.int8)
+        if len(data) < self.long_period + 1:
+            return signals
+        
+        prev_short, prev_long = ma_short[:-1], ma_long[:-1]
+        curr_short, curr_long = ma_short[1:], ma_long[1:]
+        
+        # NaN 参与比较结果为 False，均线未就绪的K线不会产生信号
+        golden = (prev_short <= prev_long) & (curr_short > curr_long)
+        dead = (prev_short >= prev_long) & (curr_short < curr_long)
+        signals[1:][golden] = 1
+        signals[1:][dead] = -1
+        return signals
+    
+    def hikyuu_signal(self, hku):
+        """Hikyuu 双均线交叉信号"""
+        close = hku.CLOSE()
+        return hku.SG_Cross(hku.MA(close, n=self.short_period), hku.MA(close, n=self.long_period))
+    
+    def signal_reason(self, signal_type: SignalType) -> str:
+        if signal_type == SignalType.BUY:
+            return f"MA{self.short_period}上穿MA{self.long_period}"
+        if signal_type == SignalType.SELL:
+            return f"MA{self.short_period}下穿MA{self.long_period}"
+        return ""
+    
+    def on_new_bar(self, bar: Bar, symbol: str) -> Signal:
+        """流式计算：每根K线只更新两条均线的滚动和"""
+        state = self._states.get(symbol)
+        if state is None:
+            state = self._states[symbol] = {
+                "short": SMA(self.short_period),
+                "long": SMA(self.long_period),
+                "prev_short": None,
+                "prev_long": None,
+            }
+        
+        curr_short = state["short"].update(bar.close)
+        curr_long = state["long"].update(bar.close)
+        prev_short, prev_long = state["prev_short"], state["prev_long"]
+        state["prev_short"], state["prev_long"] = curr_short, curr_long
+        
+        # 两条均线都就绪后才比较（短周期可能大于长周期）
+        if None in (prev_short, prev_long, curr_short, curr_long):
+            return Signal(symbol=symbol, signal_type=SignalType.HOLD, price=0)
+        
+        if prev_short <= prev_long and curr_short > curr_long:
+            return Signal(
+                symbol=symbol,
+                signal_type=SignalType.BUY,
+                price=bar.close,
+                reason=self.signal_reason(SignalType.BUY)
+            )
+        
+        if prev_short >= prev_long and curr_short < curr_long:
+            return Signal(
+                symbol=symbol,
+                signal_type=SignalType.SELL,
+                price=bar.close,
+                reason=self.signal_reason(SignalType.SELL)
+            )
+        
+        return Signal(symbol=symbol, signal_type=SignalType.HOLD, price=bar.close)
+    
+    def reset_state(self, symbol: Optional[str] = None):
+        if symbol is None:
+            self._states.clear()
+        else:
+            self._states.pop(symbol, None)
@@ -0,0 +1,166 @@
+"""
+增量指标库 - 流式策略使用
+
+每个指标每次 update 一个新值，内部维护滚动窗口状态，单次更新为 O(1)
+（Highest/Lowest 为均摊 O(1)）。指标未就绪时 value 为 None。
+"""
+import math
+from collections import deque
+from typing import Optional
+
+
+class Indicator:
+    """增量指标基类"""
+    
+    def __init__(self, period: int):
+        if period <= 0:
+            raise ValueError(f"period 必须为正整数: {period}")
+        self.period = period
+        self.count = 0
+        self.value: Optional[float] = None
+    
+    @property
+    def ready(self) -> bool:
+        """是否已积累足够数据"""
+        return self.value is not None
+    
+    def update(self, x: float) -> Optional[float]:
+        """输入一个新值，返回最新指标值"""
+        raise NotImplementedError
+    
+    def reset(self):
+        """清空状态"""
+        self.count = 0
+        self.value = None
+
+
+class SMA(Indicator):
+    """简单移动平均（环形缓冲区 + 补偿求和）"""
+    
+    def __init__(self, period: int):
+        super().__init__(period)
+        self._buffer = [0.0] * period
+        self._sum = 0.0
+        self._comp = 0.0
+    
+    def _add(self, x: float):
+        # Kahan 补偿求和，避免长时间滚动累积浮点误差
+        y = x - self._comp
+        t = self._sum + y
+        self._comp = (t - self._sum) - y
+        self._sum = t
+    
+    def update(self, x: float) -> Optional[float]:
+        pos = self.count % self.period
+        if self.count >= self.period:
+            self._add(-self._buffer[pos])
+        self._buffer[pos] = x
+        self._add(x)
+        self.count += 1
+        
+        if self.count >= self.period:
+            self.value = self._sum / self.period
+        return self.value
+    
+    def reset(self):
+        super().reset()
+        self._buffer = [0.0] * self.period
+        self._sum = 0.0
+        self._comp = 0.0
+
+
+class EMA(Indicator):
+    """指数移动平均，前 period 个值用简单平均作为初值"""
+    
+    def __init__(self, period: int):
+        super().__init__(period)
+        self.alpha = 2.0 / (period + 1)
+        self._seed_sum = 0.0
+    
+    def update(self, x: float) -> Optional[float]:
+        self.count += 1
+        if self.value is None:
+            self._seed_sum += x
+            if self.count >= self.period:
+                self.value = self._seed_sum / self.period
+        else:
+            self.value += self.alpha * (x - self.value)
+        return self.value
+    
+    def reset(self):
+        super().reset()
+        self._seed_sum = 0.0
+
+
+class RollingStd(Indicator):
+    """滚动标准差（样本标准差，ddof=1，与 pandas rolling().std() 一致）"""
+    
+    def __init__(self, period: int):
+        if period < 2:
+            raise ValueError(f"RollingStd 的 period 至少为 2: {period}")
+        super().__init__(period)
+        self._buffer = [0.0] * period
+        self._mean = 0.0
+        self._m2 = 0.0
+    
+    def update(self, x: float) -> Optional[float]:
+        pos = self.count % self.period
+        if self.count < self.period:
+            # Welford 增量
+            n = self.count + 1
+            delta = x - self._mean
+            self._mean += delta / n
+            self._m2 += delta * (x - self._mean)
+        else:
+            # 窗口已满：同时移出最旧值、加入新值
+            old = self._buffer[pos]
+            old_mean = self._mean
+            self._mean += (x - old) / self.period
+            self._m2 += (x - old) * (x - self._mean + old - old_mean)
+        self._buffer[pos] = x
+        self.count += 1
+        
+        if self.count >= self.period:
+            self.value = math.sqrt(max(self._m2, 0.0) / (self.period - 1))
+        return self.value
+    
+    def reset(self):
+        super().reset()
+        self._buffer = [0.0] * self.period
+        self._mean = 0.0
+        self._m2 = 0.0
+
+
+class Highest(Indicator):
+    """滚动最高值（单调队列）"""
+    
+    def __init__(self, period: int):
+        super().__init__(period)
+        self._window = deque()  # (序号, 值)，值单调递减
+    
+    def _better(self, new: float, old: float) -> bool:
+        return new >= old
+    
+    def update(self, x: float) -> Optional[float]:
+        window = self._window
+        while window and self._better(x, window[-1][1]):
+            window.pop()
+        window.append((self.count, x))
+        if window[0][0] <= self.count - self.period:
+            window.popleft()
+        self.count += 1
+        
+        if self.count >= self.period:
+            self.value = window[0][1]
+        return self.value
+    
+    def reset(self):
+        super().reset()
+        self._window.clear()
+
+
+class Lowest(Highest):
+    """滚动最低值（单调队列）"""
+    
+    def _better(self, new: float, old: float) -> bool:
+        return new <= old
@@ -0,0 +1,12 @@
+"""
+pytest 配置：项目根目录加入导入路径，日志写到临时目录
+"""
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import config
+
+# 须在导入 utils.logger 之前设置，避免测试日志写入仓库的 logs/
+config.log.log_dir = tempfile.mkdtemp(prefix="quant_test_logs_")
@@ -0,0 +1,56 @@
+"""
+本地账户的冻结、成交与对账
+"""
+import pytest
+from strategy.base import SignalType
+from trader.account import Account
+from trader.orders import Order, OrderStatus
+
+
+def _account():
+    account = Account()
+    account.reconcile({"可用金额": 10_000}, [{"证券代码": "600000", "股票余额": 500, "可用余额": 500, "成本价": 9.0}])
+    return account
+
+
+def test_buy_freezes_and_releases_unfilled():
+    account = _account()
+    order = Order("1", "000001", SignalType.BUY, 10.0, 300)
+    account.on_order(order)
+    assert account.available_cash() == pytest.approx(7_000)
+    
+    account.apply_fill(order, 100, 9.8, fee=5.0)
+    order.filled_quantity = 100
+    order.status = OrderStatus.CANCELLED
+    account.on_order(order)
+    assert account.available_cash() == pytest.approx(10_000 - 9.8 * 100 - 5.0)
+    assert account.position("000001").quantity == 100
+    assert account.open_orders == {}
+
+
+def test_sell_freezes_available_quantity():
+    account = _account()
+    order = Order("1", "600000", SignalType.SELL, 10.0, 200)
+    account.on_order(order)
+    assert account.available_quantity("600000") == 300
+    
+    account.apply_fill(order, 200, 10.0, fee=7.0)
+    order.filled_quantity = 200
+    order.status = OrderStatus.FILLED
+    account.on_order(order)
+    assert account.available_quantity("600000") == 300
+    assert account.position("600000").quantity == 300
+    assert account.available_cash() == pytest.approx(10_000 + 2_000 - 7.0)
+
+
+def test_reconcile_keeps_only_local_orders_frozen():
+    account = _account()
+    queued = Order("1", "000001", SignalType.BUY, 10.0, 100)
+    submitted = Order("2", "000002", SignalType.BUY, 10.0, 100)
+    account.on_order(queued)
+    account.on_order(submitted)
+    submitted.status = OrderStatus.SUBMITTED
+    
+    account.reconcile({"可用金额": 9_000}, [])
+    assert set(account.open_orders) == {"1"}
+    assert account.available_cash() == pytest.approx(8_000)
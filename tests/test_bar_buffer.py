@@ -0,0 +1,27 @@
+"""
+实时K线缓冲区的 tick 更新
+"""
+import pytest
+from monitor.bar_buffer import BarBuffer
+
+
+def test_first_tick_of_minute_bar_has_no_volume():
+    """分钟线第一个 tick 只记录当日累计成交量，之后按增量累加"""
+    buffer = BarBuffer(period="1min")
+    buffer.update_tick("2024-01-02 10:00:05", 10.0, cum_volume=500_000)
+    assert buffer.view("volume")[-1] == 0
+    
+    buffer.update_tick("2024-01-02 10:00:35", 10.1, cum_volume=501_000)
+    assert buffer.view("volume")[-1] == pytest.approx(1000)
+    
+    assert buffer.update_tick("2024-01-02 10:01:05", 10.2, cum_volume=501_500)
+    assert buffer.view("volume")[-1] == pytest.approx(500)
+
+
+def test_daily_bar_uses_cumulative_volume():
+    """日线直接使用当日累计成交量"""
+    buffer = BarBuffer(period="1D")
+    buffer.update_tick("2024-01-02 10:00:05", 10.0, cum_volume=500_000)
+    assert buffer.view("volume")[-1] == pytest.approx(500_000)
+    buffer.update_tick("2024-01-02 10:00:35", 10.1, cum_volume=501_000)
+    assert buffer.view("volume")[-1] == pytest.approx(501_000)
@@ -0,0 +1,56 @@
+"""
+下单执行器的订单状态
+"""
+import time
+from collections import defaultdict
+import pandas as pd
+from config.settings import TradingConfig
+from data.snapshot import SpotSnapshot
+from strategy.base import Signal, SignalType
+from trader.executor import TradeExecutor
+from trader.orders import Order, OrderStatus
+from trader.paper import PaperBroker
+
+
+def _executor(broker):
+    executor = TradeExecutor(TradingConfig(account_refresh_interval=0), trader=broker)
+    executor.refresh_account()
+    return executor
+
+
+def test_set_status_does_not_regress():
+    """已成交/部分成交的订单不会回到已报"""
+    executor = _executor(PaperBroker())
+    for status in (OrderStatus.FILLED, OrderStatus.PARTIAL, OrderStatus.CANCELLED):
+        order = Order("1", "600000", SignalType.BUY, 10.0, 100, status=status)
+        executor._set_status(order, OrderStatus.SUBMITTED)
+        assert order.status == status
+
+
+def test_concurrent_fills_end_filled():
+    """撮合线程与下单线程并发时，每笔订单最终为已成交，完成后不再通知非终态"""
+    symbols = [f"{600000 + i:06d}" for i in range(200)]
+    broker = PaperBroker(match_interval=0.0005)
+    broker.on_snapshot(SpotSnapshot(pd.DataFrame({"代码": symbols, "最新价": 10.0, "成交量": 1e6})))
+    executor = _executor(broker)
+    events = defaultdict(list)
+    executor.add_order_callback(lambda o: events[o.order_id].append(o.status))
+    
+    broker.start()
+    executor.start_worker()
+    try:
+        orders = [executor.submit(Signal(s, SignalType.BUY, 10.0, 100)) for s in symbols]
+        assert executor.wait(timeout=10)
+        deadline = time.monotonic() + 10
+        while any(o.status != OrderStatus.FILLED for o in orders) and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        executor.stop_worker()
+        broker.stop()
+    
+    for order in orders:
+        assert order.status == OrderStatus.FILLED, order
+        assert order.filled_quantity == 100
+        history = events[order.order_id]
+        assert history[-1] == OrderStatus.FILLED
+        assert OrderStatus.FILLED not in history[:-1]
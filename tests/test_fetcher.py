@@ -0,0 +1,37 @@
+"""
+历史K线本地缓存的增量补齐（下载用桩函数替代，不联网）
+"""
+import pandas as pd
+import pytest
+from config.settings import config
+from data.fetcher import DataFetcher
+
+
+@pytest.fixture
+def downloads(monkeypatch, tmp_path):
+    """记录每次下载的区间，返回截至今天（含尚未收盘的当天）的日线"""
+    calls = []
+    
+    def download(symbol, start_date, end_date, adjust="qfq"):
+        calls.append((start_date, end_date))
+        end = min(pd.Timestamp(end_date), pd.Timestamp.now().normalize())
+        index = pd.date_range(pd.Timestamp(start_date), end, freq="D", name="date")
+        return pd.DataFrame({"close": 10.0, "volume": 1000.0}, index=index)
+    
+    monkeypatch.setattr(DataFetcher, "_download_history", staticmethod(download))
+    monkeypatch.setattr(config.data, "cache_dir", str(tmp_path))
+    return calls
+
+
+def test_repeated_request_only_downloads_from_overlap(downloads):
+    """请求区间包含当天时，再次请求只从缓存最后一根K线开始补齐，不重新下载全部历史"""
+    today = pd.Timestamp.now().normalize()
+    start = (today - pd.Timedelta(days=30)).strftime("%Y%m%d")
+    end = today.strftime("%Y%m%d")
+    yesterday = (today - pd.Timedelta(days=1)).strftime("%Y%m%d")
+    
+    first = DataFetcher.get_stock_history("600000", start, end, use_cache=True)
+    second = DataFetcher.get_stock_history("600000", start, end, use_cache=True)
+    
+    assert downloads == [(start, end), (yesterday, end)]
+    pd.testing.assert_frame_equal(first, second, check_freq=False, check_index_type=False)
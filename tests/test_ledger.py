@@ -0,0 +1,23 @@
+"""
+成交记录的序列化与扩容
+"""
+import pickle
+import pytest
+from backtest.ledger import TradeLedger
+
+
+@pytest.mark.parametrize("ledger", [TradeLedger(), TradeLedger(0)])
+def test_append_after_empty_pickle_round_trip(ledger):
+    restored = pickle.loads(pickle.dumps(ledger))
+    for i in range(5):
+        restored.append("2024-01-02", 1, 10.0 + i, 100, 5.0, symbol="600000")
+    assert len(restored) == 5
+    assert restored[-1]["price"] == 14.0
+
+
+def test_pickle_keeps_trades():
+    ledger = TradeLedger()
+    ledger.append("2024-01-02", 1, 10.0, 100, 5.0, symbol="600000", reason="金叉")
+    ledger.append("2024-01-03", -1, 11.0, 100, 5.0, profit=90.0, symbol="600000", reason="死叉")
+    restored = pickle.loads(pickle.dumps(ledger))
+    assert list(restored) == list(ledger)
@@ -0,0 +1,103 @@
+"""
+后台通知器：本地 http.server 桩服务代替 PushPlus 接口（api_url 指向 localhost）
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from utils.notifier import AsyncPushPlusNotifier
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        time.sleep(server.delay)
+        with server.lock:
+            server.requests.append(body)
+            status = 500 if server.failures > 0 else 200
+            server.failures -= status == 500
+        payload = json.dumps({"code": 200, "msg": "请求成功"} if status == 200 else {"msg": "error"}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+    
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """记录收到的请求体；failures 为先返回 5xx 的次数，delay 为每个请求的处理耗时"""
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1")
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.requests, httpd.failures, httpd.delay, httpd.lock = [], 0, 0.0, threading.Lock()
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}/send"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _notifier(server, **kwargs):
+    kwargs = {"rate": 100, "burst": 100, "backoff": 0.01, **kwargs}
+    return AsyncPushPlusNotifier("token", api_url=server.url, **kwargs)
+
+
+def test_send_returns_before_request_completes(server):
+    server.delay = 0.5
+    notifier = _notifier(server)
+    started = time.perf_counter()
+    result = notifier.send_text("标题", "内容")
+    assert time.perf_counter() - started < 0.1
+    assert result["code"] == 202
+    
+    notifier.close()
+    assert [r["title"] for r in server.requests] == ["标题"]
+    assert notifier.stats["sent"] == 1
+
+
+def test_signal_burst_merged_into_one_digest(server):
+    notifier = _notifier(server, digest_window=0.2)
+    for i in range(5):
+        notifier.send_trade_signal(f"60000{i}", "buy" if i % 2 else "sell", 10.0 + i, quantity=100)
+    deadline = time.monotonic() + 5
+    while not server.requests and time.monotonic() < deadline:
+        time.sleep(0.05)
+    time.sleep(0.3)  # 窗口结束后不应再有请求
+    
+    assert len(server.requests) == 1
+    assert "汇总" in server.requests[0]["title"]
+    assert all(f"60000{i}" in server.requests[0]["content"] for i in range(5))
+    assert notifier.stats["digested"] == 5
+    notifier.close()
+
+
+def test_server_error_retried(server):
+    server.failures = 2
+    notifier = _notifier(server)
+    notifier.send_text("标题", "内容")
+    notifier.close()
+    
+    assert len(server.requests) == 3
+    assert notifier.stats["sent"] == 1
+    assert notifier.stats["failed"] == 0
+
+
+def test_close_flushes_pending(server):
+    """close 时发送队列中的消息和未到合并窗口的信号"""
+    notifier = _notifier(server, digest_window=60)
+    notifier.send_trade_signal("600000", "buy", 10.0)
+    notifier.send_trade_signal("000001", "sell", 12.0)
+    notifier.send_text("标题", "内容")
+    
+    started = time.perf_counter()
+    notifier.close()
+    assert time.perf_counter() - started < 5
+    assert len(server.requests) == 2
+    assert notifier.stats["digested"] == 2
+    assert notifier.send_text("标题", "内容")["code"] == -1
@@ -0,0 +1,75 @@
+"""
+下单队列的优先级与合并
+"""
+import threading
+import time
+from strategy.base import Signal, SignalType
+from trader.orders import Order, OrderQueue, OrderStatus
+
+
+def _order(queue, symbol, side, price=10.0, quantity=100):
+    return Order.from_signal(queue.next_id(), Signal(symbol, side, price, quantity))
+
+
+def test_sell_before_buy_then_fifo():
+    queue = OrderQueue()
+    orders = [_order(queue, s, side) for s, side in
+              [("a", SignalType.BUY), ("b", SignalType.SELL), ("c", SignalType.BUY), ("d", SignalType.SELL)]]
+    for order in orders:
+        queue.put(order)
+    assert [queue.get(timeout=0).symbol for _ in orders] == ["b", "d", "a", "c"]
+    assert queue.get(timeout=0) is None
+
+
+def test_same_side_merges_opposite_side_cancels():
+    queue = OrderQueue()
+    first = _order(queue, "a", SignalType.BUY)
+    second = _order(queue, "a", SignalType.BUY, price=11.0)
+    assert queue.put(first) == []
+    assert queue.put(second) == [first]
+    assert first.status == OrderStatus.MERGED
+    
+    sell = _order(queue, "a", SignalType.SELL)
+    assert queue.put(sell) == [second, sell]
+    assert second.status == sell.status == OrderStatus.CANCELLED
+    assert len(queue) == 0
+    assert queue.get(timeout=0) is None
+    assert queue.join(timeout=0)
+
+
+def test_join_wakes_when_opposite_orders_cancel():
+    """相反方向抵消后排队数归零，等待中的 join() 立即返回"""
+    queue = OrderQueue()
+    queue.put(_order(queue, "a", SignalType.BUY))
+    done = threading.Event()
+    waiter = threading.Thread(target=lambda: done.set() if queue.join(timeout=5) else None)
+    waiter.start()
+    time.sleep(0.05)
+    
+    started = time.monotonic()
+    queue.put(_order(queue, "a", SignalType.SELL))
+    waiter.join()
+    assert done.is_set()
+    assert time.monotonic() - started < 1
+
+
+def test_put_wakes_getter_while_join_waits():
+    """join() 也在等待时，新订单仍立即唤醒 get()"""
+    queue = OrderQueue()
+    queue.put(_order(queue, "a", SignalType.BUY))
+    assert queue.get(timeout=0).symbol == "a"
+    got = []
+    getter = threading.Thread(target=lambda: got.append(queue.get(timeout=5)))
+    joiner = threading.Thread(target=lambda: queue.join(timeout=5))
+    getter.start()
+    joiner.start()
+    time.sleep(0.05)
+    
+    started = time.monotonic()
+    queue.put(_order(queue, "b", SignalType.BUY))
+    getter.join()
+    assert got[0].symbol == "b"
+    assert time.monotonic() - started < 1
+    queue.task_done()
+    queue.task_done()
+    joiner.join()
@@ -0,0 +1,76 @@
+"""
+模拟券商的限价成交与资金冻结
+"""
+import pandas as pd
+import pytest
+from data.snapshot import SpotSnapshot
+from trader.paper import PaperBroker
+
+
+def _quote(broker, price):
+    broker.on_snapshot(SpotSnapshot(pd.DataFrame({"代码": ["600000"], "最新价": [price], "成交量": [1e6]})))
+
+
+def _check_cash(broker, initial):
+    """可用资金 + 冻结 + 持仓成本 = 初始资金 + 已实现盈亏，且冻结不为负"""
+    assert all(e.frozen >= 0 for e in broker._entrusts.values())
+    frozen = sum(e.frozen for e in broker._entrusts.values())
+    cost = sum(h.cost for h in broker._holdings.values())
+    assert broker.cash >= 0
+    assert broker.cash + frozen + cost == pytest.approx(initial)
+
+
+def test_buy_not_filled_above_limit():
+    broker = PaperBroker(cash=100_000)
+    broker.buy("600000", 10.0, 1000)
+    _quote(broker, 12.0)
+    assert broker.today_trades == []
+    _check_cash(broker, 100_000)
+    
+    _quote(broker, 9.5)
+    trades = broker.today_trades
+    assert len(trades) == 1
+    assert trades[0]["成交价格"] == pytest.approx(9.5 * (1 + broker.slippage))
+    _check_cash(broker, 100_000)
+
+
+def test_sell_not_filled_below_limit():
+    broker = PaperBroker(cash=100_000)
+    broker.buy("600000", 10.0, 1000)
+    _quote(broker, 10.0)
+    broker._holdings["600000"].available = 1000  # 跳过 T+1
+    broker.sell("600000", 11.0, 1000)
+    _quote(broker, 10.5)
+    assert len(broker.today_trades) == 1
+    _quote(broker, 11.2)
+    assert len(broker.today_trades) == 2
+
+
+def test_fill_price_capped_at_limit():
+    """行情等于限价时，加滑点后的成交价也不超出限价"""
+    broker = PaperBroker(cash=100_000)
+    broker.buy("600000", 10.0, 1000)
+    _quote(broker, 10.0)
+    assert broker.today_trades[0]["成交价格"] == pytest.approx(10.0)
+    _check_cash(broker, 100_000)
+    
+    broker._holdings["600000"].available = 1000  # 跳过 T+1
+    broker.sell("600000", 11.0, 1000)
+    _quote(broker, 11.0)
+    assert broker.today_trades[1]["成交价格"] == pytest.approx(11.0)
+
+
+def test_partial_fills_charge_min_commission_once():
+    broker = PaperBroker(cash=100_000, fill_ratio=0.25)
+    entrust_no = broker.buy("600000", 10.0, 1000)["entrust_no"]
+    for _ in range(4):
+        _quote(broker, 10.0)
+        _check_cash(broker, 100_000)
+    
+    entrust = broker._entrusts[entrust_no]
+    assert entrust.status == "已成" and len(entrust.fills) == 4
+    value = sum(q * p for q, p, _ in entrust.fills)
+    fees = sum(f for _, _, f in entrust.fills)
+    assert fees == pytest.approx(max(value * broker.costs.commission_rate, broker.costs.min_commission))
+    assert entrust.frozen == 0
+    _check_cash(broker, 100_000)
@@ -0,0 +1,51 @@
+"""
+分块流式回测与整段回测的一致性
+"""
+import numpy as np
+import pytest
+from backtest.engine import BacktestEngine
+from backtest.streaming import ChunkedBacktestEngine
+from benchmarks.synthetic import make_bars
+from strategy.examples.ma_cross import MACrossStrategy
+
+
+@pytest.fixture(scope="module")
+def bars():
+    return make_bars(3000)
+
+
+@pytest.fixture(scope="module")
+def full(bars):
+    return BacktestEngine().run(MACrossStrategy(5, 20), bars, "600000")
+
+
+@pytest.mark.parametrize("vectorized", [True, False])
+@pytest.mark.parametrize("size", [1000, 50, 19, 10, 3, 1])
+def test_chunked_matches_full_run(bars, full, tmp_path, size, vectorized):
+    """块大小小于均线窗口时结果仍与整段回测一致"""
+    chunks = (bars.iloc[i:i + size] for i in range(0, len(bars), size))
+    result = ChunkedBacktestEngine(output_dir=str(tmp_path)).run_chunks(
+        MACrossStrategy(5, 20), chunks, "600000", vectorized=vectorized
+    )
+    
+    assert result.trade_count == full.trade_count
+    np.testing.assert_allclose(result.equity_curve.to_numpy(), full.equity_curve.to_numpy())
+    assert result.total_return == pytest.approx(full.total_return)
+    assert result.sharpe_ratio == pytest.approx(full.sharpe_ratio)
+    assert result.max_drawdown == pytest.approx(full.max_drawdown)
+    assert result.win_rate == pytest.approx(full.win_rate)
+
+
+@pytest.mark.parametrize("size", [48, 10])
+def test_chunked_minute_bars_annualize_like_full_run(tmp_path, size):
+    """分钟线的块短于一个交易日时，年化仍按整段的每日K线数"""
+    bars = make_bars(2400, freq="5min")
+    full = BacktestEngine().run(MACrossStrategy(5, 20), bars, "600000")
+    chunks = (bars.iloc[i:i + size] for i in range(0, len(bars), size))
+    result = ChunkedBacktestEngine(output_dir=str(tmp_path)).run_chunks(
+        MACrossStrategy(5, 20), chunks, "600000"
+    )
+    
+    assert result.sharpe_ratio == pytest.approx(full.sharpe_ratio)
+    assert result.sortino_ratio == pytest.approx(full.sortino_ratio)
+    assert result.turnover == pytest.approx(full.turnover)
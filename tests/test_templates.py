@@ -0,0 +1,25 @@
+"""
+通知消息模板的解析与渲染
+"""
+import pytest
+from utils.templates import MessageTemplate, ROW_SEPARATORS, TEMPLATES, render_rows
+
+
+def test_render_by_name_and_position():
+    """按名称和按 fields 位置渲染结果一致，字面花括号原样保留，多余的键忽略"""
+    template = MessageTemplate("{$name} $value {}%", fields=("value", "name"))
+    assert template.render(name="a", value=1, extra=2) == "{a} 1 {}%"
+    assert template.render_row(1, "a") == "{a} 1 {}%"
+
+
+def test_fields_must_cover_placeholders():
+    with pytest.raises(ValueError):
+        MessageTemplate("$a $b", fields=("a",))
+
+
+def test_render_rows_joins_with_separator():
+    template = TEMPLATES["markdown"]["position_row"]
+    rows = [("600000", "浦发银行", "red", "+1.00%"), ("000001", "平安银行", "green", "-2.00%")]
+    assert render_rows(template, rows, ROW_SEPARATORS["markdown"]) == (
+        "| 600000 | 浦发银行 | +1.00% |\n| 000001 | 平安银行 | -2.00% |"
+    )
@@ -1,3 +1,6 @@
 from .executor import TradeExecutor
+from .account import Account, Position
+from .orders import Order, OrderQueue, OrderStatus
+from .paper import PaperBroker
 
-__all__ = ['TradeExecutor']
+__all__ = ['TradeExecutor', 'Account', 'Position', 'Order', 'OrderQueue', 'OrderStatus', 'PaperBroker']
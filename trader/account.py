@@ -0,0 +1,132 @@
+"""
+本地账户模型 - 资金、持仓和未完成订单的内存缓存
+
+下单前的数量计算只读内存，不再逐个信号查询券商客户端：
+- 订单排队/发送时立即冻结资金（买入，按委托价）或可用持仓（卖出）
+- 成交回报更新持仓和资金，订单结束时退回未成交部分的冻结
+- 定期与券商查询结果对账（reconcile），以券商为准；已到达券商的委托视为已在券商数据中冻结，之后不再跟踪
+"""
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from strategy.base import SignalType
+from trader.orders import Order, OrderStatus
+from utils.logger import log
+
+# 尚未到达券商的订单状态（对账时券商数据中不包含其冻结）
+_LOCAL_STATUSES = (OrderStatus.QUEUED, OrderStatus.SUBMITTING)
+
+
+@dataclass
+class Position:
+    """持仓"""
+    symbol: str
+    quantity: int = 0  # 股票余额
+    available: int = 0  # 可用余额（T+1，当日买入不可卖）
+    cost_price: float = 0.0
+
+
+class Account:
+    """线程安全的本地账户缓存"""
+    
+    def __init__(self):
+        self.cash = 0.0  # 可用资金（已扣除未完成买单的冻结）
+        self.positions: Dict[str, Position] = {}
+        self.open_orders: Dict[str, Order] = {}
+        self.loaded = False
+        self._lock = threading.RLock()
+    
+    def available_cash(self) -> float:
+        """可用资金"""
+        with self._lock:
+            return self.cash
+    
+    def available_quantity(self, symbol: str) -> int:
+        """可卖数量"""
+        with self._lock:
+            position = self.positions.get(symbol)
+            return position.available if position else 0
+    
+    def position(self, symbol: str) -> Optional[Position]:
+        """持仓（副本）"""
+        with self._lock:
+            position = self.positions.get(symbol)
+            return Position(**position.__dict__) if position else None
+    
+    def _freeze(self, order: Order, sign: int):
+        """冻结（sign=1）或退回（sign=-1）订单未成交部分"""
+        remaining = order.quantity - order.filled_quantity
+        if order.side == SignalType.BUY:
+            self.cash -= sign * order.price * remaining
+        else:
+            position = self.positions.setdefault(order.symbol, Position(order.symbol))
+            position.available -= sign * remaining
+    
+    def on_order(self, order: Order):
+        """订单状态变化（由 TradeExecutor 在通知回调前调用）"""
+        with self._lock:
+            tracked = order.order_id in self.open_orders
+            if not order.status.is_final:
+                if not tracked:
+                    self.open_orders[order.order_id] = order
+                    self._freeze(order, 1)
+            elif tracked:
+                del self.open_orders[order.order_id]
+                self._freeze(order, -1)
+    
+    def apply_fill(self, order: Order, quantity: int, price: float, fee: float = 0.0):
+        """
+        成交回报（须在 order.filled_quantity 累加之前调用）
+        
+        Args:
+            quantity: 本次成交数量
+            price: 成交价
+            fee: 手续费
+        """
+        with self._lock:
+            position = self.positions.setdefault(order.symbol, Position(order.symbol))
+            if order.side == SignalType.BUY:
+                cost = position.cost_price * position.quantity + price * quantity + fee
+                position.quantity += quantity
+                position.cost_price = cost / position.quantity if position.quantity else 0.0
+                # 冻结按委托价，成交价不同的部分退回
+                self.cash += (order.price - price) * quantity - fee
+            else:
+                position.quantity -= quantity
+                self.cash += price * quantity - fee
+                if position.quantity <= 0:
+                    del self.positions[order.symbol]
+    
+    def reconcile(self, balance: Dict, positions: List[Dict]):
+        """
+        与券商查询结果对账
+        
+        Args:
+            balance: easytrader balance（含 可用金额）
+            positions: easytrader position 列表（含 证券代码/股票余额/可用余额/成本价）
+        """
+        if isinstance(balance, list):
+            balance = balance[0] if balance else {}
+        with self._lock:
+            previous = self.cash
+            self.cash = float(balance.get("可用金额", 0))
+            self.positions = {}
+            for pos in positions or []:
+                symbol = str(pos.get("证券代码", ""))
+                self.positions[symbol] = Position(
+                    symbol=symbol,
+                    quantity=int(pos.get("股票余额", pos.get("当前持仓", 0)) or 0),
+                    available=int(pos.get("可用余额", 0) or 0),
+                    cost_price=float(pos.get("成本价", 0) or 0)
+                )
+            # 已到达券商的委托由券商数据反映，只保留还没发出的订单并重新冻结
+            self.open_orders = {
+                order_id: order for order_id, order in self.open_orders.items()
+                if order.status in _LOCAL_STATUSES
+            }
+            for order in self.open_orders.values():
+                self._freeze(order, 1)
+            drift = self.cash - previous
+            if self.loaded and abs(drift) > 0.01:
+                log.debug("账户对账：可用资金偏差 {:.2f}", drift)
+            self.loaded = True
@@ -1,22 +1,69 @@
 """
 实盘交易执行器 - 基于 easytrader
+
+下单有两种方式：
+- execute_signal：在调用线程中同步下单，等待券商客户端返回
+- submit：非阻塞，订单进入优先级队列，由专用下单线程依次发送（start_worker 启动），
+  状态变化通过回调通知；未启动下单线程时 submit 退化为同步下单
+
+资金和持仓缓存在 account 中（随订单和成交更新），下单线程空闲时定期与券商对账。
 """
-from typing import Optional, Dict, List
+import threading
+import time
+from typing import Callable, Optional, Dict, List
 from config.settings import TradingConfig, BrokerType
 from strategy.base import Signal, SignalType
+from trader.account import Account
+from trader.orders import Order, OrderQueue, OrderStatus
+from trader.paper import PaperBroker
 from utils.logger import log
 
+OrderCallback = Callable[[Order], None]
+
+_SENDING_STATUSES = (OrderStatus.SUBMITTING, OrderStatus.SUBMITTED)
+
 
 class TradeExecutor:
     """交易执行器"""
     
-    def __init__(self, config: TradingConfig = None):
+    def __init__(self, config: TradingConfig = None, trader=None):
+        """
+        Args:
+            config: 交易配置
+            trader: 已连接的券商接口对象（与 easytrader 接口一致，如本地模拟券商），传入时无需 connect
+        """
         self.config = config or TradingConfig()
         self.trader = None
         self.is_connected = False
+        self.orders: Dict[str, Order] = {}  # 本次运行提交的全部订单
+        self.account = Account()
+        self._last_refresh = 0.0
+        self._queue = OrderQueue(self.config.order_queue_size)
+        self._callbacks: List[OrderCallback] = []
+        self._order_callbacks: Dict[str, OrderCallback] = {}
+        self._broker_lock = threading.RLock()  # 券商客户端不是线程安全的，所有调用串行
+        self._worker: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._entrusts: Dict[str, str] = {}  # 券商委托编号 -> 订单编号
+        if trader is not None:
+            self._attach(trader)
+    
+    def _attach(self, trader):
+        """使用已连接的券商接口；支持成交回报的（如模拟券商）接入 on_broker_fill"""
+        self.trader = trader
+        self.is_connected = True
+        if hasattr(trader, "fill_callback"):
+            trader.fill_callback = self.on_broker_fill
     
     def connect(self) -> bool:
         """连接交易客户端"""
+        if self.config.broker == BrokerType.PAPER:
+            broker = PaperBroker.from_config(self.config)
+            broker.start()
+            self._attach(broker)
+            log.info(f"已连接模拟券商，初始资金: {broker.cash:.2f}")
+            return True
+        
         try:
             import easytrader
             
@@ -34,13 +81,16 @@ class TradeExecutor:
             self.is_connected = True
             log.info(f"已连接交易客户端: {broker}")
             return True
-            
+        
         except Exception as e:
             log.error(f"连接交易客户端失败: {e}")
             return False
     
     def disconnect(self):
-        """断开连接"""
+        """断开连接（先停止下单线程）"""
+        self.stop_worker()
+        if isinstance(self.trader, PaperBroker):
+            self.trader.stop()
         if self.trader:
             self.trader = None
             self.is_connected = False
@@ -53,7 +103,8 @@ class TradeExecutor:
             return {}
         
         try:
-            return self.trader.balance
+            with self._broker_lock:
+                return self.trader.balance
         except Exception as e:
             log.error(f"获取资金失败: {e}")
             return {}
@@ -64,11 +115,36 @@ class TradeExecutor:
             return []
         
         try:
-            return self.trader.position
+            with self._broker_lock:
+                return self.trader.position
         except Exception as e:
             log.error(f"获取持仓失败: {e}")
             return []
     
+    def refresh_account(self) -> bool:
+        """从券商查询资金和持仓，与本地账户对账"""
+        if not self.is_connected:
+            return False
+        
+        try:
+            with self._broker_lock:
+                balance = self.trader.balance
+                positions = self.trader.position
+        except Exception as e:
+            log.error(f"账户对账失败: {e}")
+            return False
+        
+        self.account.reconcile(balance, positions)
+        self._last_refresh = time.monotonic()
+        return True
+    
+    def ensure_account(self):
+        """本地账户未加载，或没有下单线程定期对账且已过期时，从券商刷新"""
+        interval = self.config.account_refresh_interval
+        stale = interval > 0 and time.monotonic() - self._last_refresh >= interval
+        if not self.account.loaded or (stale and not self.worker_running):
+            self.refresh_account()
+    
     def execute_signal(self, signal: Signal) -> bool:
         """
         执行交易信号
@@ -91,15 +167,22 @@ class TradeExecutor:
             
             log.info(f"执行{signal.signal_type.value}: {signal.symbol}, 价格: {signal.price}, 数量: {signal.quantity}")
             return result
-            
+        
         except Exception as e:
             log.error(f"执行交易失败: {e}")
             return False
     
+    def _send(self, symbol: str, side: SignalType, price: float, quantity: int):
+        """向券商发送委托，返回券商的响应（失败时抛出异常）"""
+        with self._broker_lock:
+            if side == SignalType.BUY:
+                return self.trader.buy(symbol, price=price, amount=quantity)
+            return self.trader.sell(symbol, price=price, amount=quantity)
+    
     def _buy(self, symbol: str, price: float, quantity: int) -> bool:
         """买入"""
         try:
-            self.trader.buy(symbol, price=price, amount=quantity)
+            self._send(symbol, SignalType.BUY, price, quantity)
             return True
         except Exception as e:
             log.error(f"买入失败: {e}")
@@ -108,7 +191,7 @@ class TradeExecutor:
     def _sell(self, symbol: str, price: float, quantity: int) -> bool:
         """卖出"""
         try:
-            self.trader.sell(symbol, price=price, amount=quantity)
+            self._send(symbol, SignalType.SELL, price, quantity)
             return True
         except Exception as e:
             log.error(f"卖出失败: {e}")
@@ -118,7 +201,189 @@ class TradeExecutor:
         """撤销所有挂单"""
         if self.is_connected:
             try:
-                self.trader.cancel_entrusts()
+                with self._broker_lock:
+                    self.trader.cancel_entrusts()
                 log.info("已撤销所有挂单")
             except Exception as e:
                 log.error(f"撤单失败: {e}")
+    
+    @property
+    def worker_running(self) -> bool:
+        """下单线程是否在运行"""
+        return self._worker is not None and self._worker.is_alive()
+    
+    def add_order_callback(self, callback: OrderCallback):
+        """注册订单状态回调（所有订单，在状态变化的线程中调用，不应阻塞）"""
+        self._callbacks.append(callback)
+    
+    def submit(self, signal: Signal, priority: int = None, callback: OrderCallback = None) -> Optional[Order]:
+        """
+        提交交易信号（非阻塞）
+        
+        同一标的还在排队的订单会被合并：同方向替换为新订单，相反方向两笔都撤销。
+        
+        Args:
+            signal: 交易信号（quantity 已确定）
+            priority: 优先级，越小越先发送，默认卖出 0、买入 1
+            callback: 该订单的状态回调
+        
+        Returns:
+            Order: 订单（状态随处理进度更新），HOLD 信号返回 None
+        """
+        if signal.signal_type == SignalType.HOLD:
+            return None
+        
+        order = Order.from_signal(self._queue.next_id(), signal, priority)
+        self.orders[order.order_id] = order
+        if callback is not None:
+            self._order_callbacks[order.order_id] = callback
+        
+        if not self.worker_running:
+            self._process(order)
+            return order
+        
+        try:
+            finished = self._queue.put(order)
+        except OverflowError as e:
+            log.error(f"{order.symbol} 下单失败: {e}")
+            self._set_status(order, OrderStatus.REJECTED, str(e))
+            return order
+        
+        if order.status == OrderStatus.QUEUED:
+            self._notify(order)
+        for o in finished:
+            log.info(f"订单 {o.order_id} {o.symbol} {o.side.value}: {o.message}")
+            self._notify(o)
+        return order
+    
+    def _process(self, order: Order):
+        """发送一笔订单"""
+        if not self.is_connected:
+            self._set_status(order, OrderStatus.REJECTED, "未连接交易客户端")
+            log.warning(f"未连接交易客户端，订单 {order.order_id} 未发送")
+            return
+        
+        self._set_status(order, OrderStatus.SUBMITTING)
+        # 持锁登记委托编号，成交回报（同样持锁查找）不会早于登记
+        with self._broker_lock:
+            try:
+                response = self._send(order.symbol, order.side, order.price, order.quantity)
+            except Exception as e:
+                log.error(f"订单 {order.order_id} {order.symbol} {order.side.value}失败: {e}")
+                self._set_status(order, OrderStatus.REJECTED, str(e))
+                return
+            
+            if isinstance(response, dict) and response.get("entrust_no"):
+                order.broker_order_id = str(response["entrust_no"])
+                self._entrusts[order.broker_order_id] = order.order_id
+            # 释放锁之前置为已报，之后到达的成交回报不会被覆盖
+            self._set_status(order, OrderStatus.SUBMITTED)
+        log.info(
+            f"执行{order.side.value}: {order.symbol}, 价格: {order.price}, 数量: {order.quantity}, "
+            f"订单: {order.order_id}"
+        )
+    
+    def on_fill(self, order_id: str, quantity: int, price: float, fee: float = 0.0):
+        """
+        成交回报：更新订单和本地账户
+        
+        Args:
+            order_id: 订单编号
+            quantity: 本次成交数量
+            price: 成交价
+            fee: 手续费
+        """
+        order = self.orders.get(order_id)
+        if order is None or order.status.is_final or quantity <= 0:
+            return
+        quantity = min(quantity, order.quantity - order.filled_quantity)
+        self.account.apply_fill(order, quantity, price, fee)
+        filled = order.filled_quantity + quantity
+        order.filled_price = (order.filled_price * order.filled_quantity + price * quantity) / filled
+        order.filled_quantity = filled
+        status = OrderStatus.FILLED if filled >= order.quantity else OrderStatus.PARTIAL
+        self._set_status(order, status)
+    
+    def on_broker_fill(self, entrust_no: str, quantity: int, price: float, fee: float = 0.0):
+        """券商成交回报（按券商委托编号）"""
+        with self._broker_lock:
+            order_id = self._entrusts.get(str(entrust_no))
+        if order_id is None:
+            log.warning(f"收到未知委托 {entrust_no} 的成交回报")
+            return
+        self.on_fill(order_id, quantity, price, fee)
+    
+    def _set_status(self, order: Order, status: OrderStatus, message: str = ""):
+        # 已有成交或已结束的订单不再回到发送中/已报
+        if status in _SENDING_STATUSES and (order.status == OrderStatus.PARTIAL or order.status.is_final):
+            return
+        order.status = status
+        order.message = message or order.message
+        self._notify(order)
+    
+    def _notify(self, order: Order):
+        """调用状态回调，回调异常不影响下单"""
+        order.updated_at = time.time()
+        self.account.on_order(order)
+        callbacks = list(self._callbacks)
+        callback = self._order_callbacks.get(order.order_id)
+        if callback is not None:
+            callbacks.append(callback)
+            if order.status.is_final:
+                del self._order_callbacks[order.order_id]
+        for cb in callbacks:
+            try:
+                cb(order)
+            except Exception as e:
+                log.error(f"订单回调出错: {e}")
+    
+    def _worker_loop(self):
+        while not self._stop_event.is_set():
+            order = self._queue.get(timeout=0.5)
+            if order is None:
+                # 空闲时定期对账
+                interval = self.config.account_refresh_interval
+                if interval > 0 and time.monotonic() - self._last_refresh >= interval:
+                    self.refresh_account()
+                continue
+            try:
+                self._process(order)
+            except Exception as e:
+                log.error(f"处理订单 {order.order_id} 时出错: {e}")
+            finally:
+                self._queue.task_done()
+    
+    def start_worker(self):
+        """启动下单线程（之后的券商调用都经由该线程或券商锁串行执行）"""
+        if self.worker_running:
+            return
+        self._stop_event.clear()
+        self._worker = threading.Thread(target=self._worker_loop, name="order-worker", daemon=True)
+        self._worker.start()
+        log.info("下单线程已启动")
+    
+    def wait(self, timeout: float = None) -> bool:
+        """等待队列中的订单全部发送，返回是否在超时前完成"""
+        return self._queue.join(timeout)
+    
+    def stop_worker(self, cancel_pending: bool = False, timeout: float = 10.0):
+        """
+        停止下单线程
+        
+        Args:
+            cancel_pending: 撤销还在排队的订单，否则等待其发送完毕
+            timeout: 等待的最长秒数
+        """
+        if not self.worker_running:
+            return
+        if cancel_pending:
+            for order in self._queue.drain():
+                self._set_status(order, OrderStatus.CANCELLED, "下单线程停止")
+        elif not self._queue.join(timeout):
+            log.warning(f"下单队列在 {timeout} 秒内未清空，剩余订单撤销")
+            for order in self._queue.drain():
+                self._set_status(order, OrderStatus.CANCELLED, "下单线程停止")
+        self._stop_event.set()
+        self._worker.join(timeout)
+        self._worker = None
+        log.info("下单线程已停止")
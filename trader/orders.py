@@ -0,0 +1,180 @@
+"""
+委托订单与下单队列
+
+订单按优先级出队（默认卖出优先，先回笼资金），同优先级按提交顺序；
+同一标的尚未发出的订单会合并：同方向的新信号替换旧订单的价格和数量，相反方向的信号互相抵消。
+"""
+import heapq
+import itertools
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Dict, List, Optional
+from strategy.base import Signal, SignalType
+
+PRIORITY_SELL = 0
+PRIORITY_BUY = 1
+
+
+class OrderStatus(Enum):
+    """订单状态"""
+    QUEUED = "queued"  # 排队中
+    SUBMITTING = "submitting"  # 正在发送给券商
+    SUBMITTED = "submitted"  # 券商已接受
+    FILLED = "filled"  # 已成交
+    PARTIAL = "partial"  # 部分成交
+    REJECTED = "rejected"  # 券商拒绝或发送失败
+    CANCELLED = "cancelled"  # 已撤销（含被相反信号抵消）
+    MERGED = "merged"  # 被同标的同方向的新订单替换
+    
+    @property
+    def is_final(self) -> bool:
+        """是否为终态"""
+        return self in (OrderStatus.FILLED, OrderStatus.REJECTED, OrderStatus.CANCELLED, OrderStatus.MERGED)
+
+
+@dataclass
+class Order:
+    """委托订单"""
+    order_id: str
+    symbol: str
+    side: SignalType
+    price: float
+    quantity: int
+    priority: int = PRIORITY_BUY
+    reason: str = ""
+    status: OrderStatus = OrderStatus.QUEUED
+    filled_quantity: int = 0
+    filled_price: float = 0.0
+    message: str = ""
+    broker_order_id: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    
+    @classmethod
+    def from_signal(cls, order_id: str, signal: Signal, priority: int = None) -> "Order":
+        """由交易信号创建订单"""
+        if priority is None:
+            priority = PRIORITY_SELL if signal.signal_type == SignalType.SELL else PRIORITY_BUY
+        return cls(
+            order_id=order_id,
+            symbol=signal.symbol,
+            side=signal.signal_type,
+            price=signal.price,
+            quantity=signal.quantity or 0,
+            priority=priority,
+            reason=signal.reason
+        )
+    
+    def to_signal(self) -> Signal:
+        """转换回交易信号（券商接口使用）"""
+        return Signal(
+            symbol=self.symbol,
+            signal_type=self.side,
+            price=self.price,
+            quantity=self.quantity,
+            reason=self.reason
+        )
+
+
+class OrderQueue:
+    """线程安全的优先级下单队列（同标的未发出的订单自动合并）"""
+    
+    def __init__(self, maxsize: int = 1000):
+        self.maxsize = maxsize
+        self._heap: List[tuple] = []
+        self._queued: Dict[str, Order] = {}  # 标的 -> 排队中的订单
+        self._seq = itertools.count()
+        self._ids = itertools.count(1)
+        self._cond = threading.Condition()
+        self._unfinished = 0
+    
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._queued)
+    
+    def next_id(self) -> str:
+        """生成订单编号"""
+        return f"{datetime.now():%Y%m%d}-{next(self._ids):06d}"
+    
+    def put(self, order: Order) -> List[Order]:
+        """
+        订单入队
+        
+        Returns:
+            List[Order]: 因合并或抵消而进入终态的订单（含新订单本身被抵消的情况），由调用方通知状态变化
+        
+        Raises:
+            OverflowError: 队列已满
+        """
+        finished = []
+        with self._cond:
+            previous = self._queued.pop(order.symbol, None)
+            if previous is not None:
+                self._unfinished -= 1
+                if previous.side == order.side:
+                    previous.status = OrderStatus.MERGED
+                    previous.message = f"被订单 {order.order_id} 替换"
+                    finished.append(previous)
+                else:
+                    # 相反方向：两笔订单都不必发出
+                    for o in (previous, order):
+                        o.status = OrderStatus.CANCELLED
+                        o.message = "与同标的相反方向的信号抵消"
+                        o.updated_at = time.time()
+                    self._cond.notify_all()
+                    return [previous, order]
+            
+            if len(self._queued) >= self.maxsize:
+                raise OverflowError(f"下单队列已满（{self.maxsize}）")
+            self._queued[order.symbol] = order
+            self._unfinished += 1
+            heapq.heappush(self._heap, (order.priority, next(self._seq), order))
+            # get() 与 join() 共用条件变量，须全部唤醒
+            self._cond.notify_all()
+        return finished
+    
+    def get(self, timeout: float = None) -> Optional[Order]:
+        """取出优先级最高的订单，超时返回 None"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                while self._heap:
+                    _, _, order = heapq.heappop(self._heap)
+                    # 已被合并/抵消的订单在堆中惰性删除
+                    if self._queued.get(order.symbol) is order:
+                        del self._queued[order.symbol]
+                        return order
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+    
+    def task_done(self):
+        """标记一笔取出的订单已处理完"""
+        with self._cond:
+            self._unfinished -= 1
+            self._cond.notify_all()
+    
+    def join(self, timeout: float = None) -> bool:
+        """等待所有订单处理完，返回是否在超时前完成"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._unfinished > 0:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+    
+    def drain(self) -> List[Order]:
+        """取出所有排队中的订单（停止时撤销用）"""
+        with self._cond:
+            orders = list(self._queued.values())
+            self._queued.clear()
+            self._heap.clear()
+            self._unfinished -= len(orders)
+            self._cond.notify_all()
+            return orders
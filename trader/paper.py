@@ -0,0 +1,361 @@
+"""
+模拟券商 - 进程内撮合，用于模拟盘和实盘链路的压测
+
+接口与 easytrader 客户端一致（balance/position/buy/sell/cancel_entrusts/today_entrusts/today_trades），
+可直接作为 TradeExecutor 的 trader 使用：
+- 委托价为限价：延迟 latency 秒后，最新价不高于买入限价（不低于卖出限价）时按最新价 ± 滑点成交（成交价不超出限价），
+  否则继续等待；费用同回测配置（佣金、印花税），最低佣金按整笔委托只收一次
+- fill_ratio < 1 时每次撮合只成交剩余数量的一部分（按手取整），模拟部分成交
+- 买入冻结资金，卖出检查可用持仓；T+1，当日买入的股票次日才可卖出
+- 行情由 on_snapshot 推入（RealtimeMonitor 的快照监听），撮合在推入行情时和后台撮合线程中进行
+- 成交通过 fill_callback(entrust_no, quantity, price, fee) 回报
+"""
+import itertools
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional
+import numpy as np
+from config.settings import BacktestConfig, TradingConfig
+from data.snapshot import SpotSnapshot
+from utils.logger import log
+
+FillCallback = Callable[[str, int, float, float], None]
+
+
+@dataclass
+class _Entrust:
+    entrust_no: str
+    symbol: str
+    side: int  # 1-买入，-1-卖出
+    price: float
+    amount: int
+    created: datetime
+    submitted_at: float  # time.monotonic()
+    filled: int = 0
+    frozen: float = 0.0  # 买单剩余冻结资金
+    traded: float = 0.0  # 累计成交金额
+    commission: float = 0.0  # 累计佣金
+    status: str = "已报"
+    fills: List[tuple] = field(default_factory=list)
+    
+    @property
+    def remaining(self) -> int:
+        return self.amount - self.filled
+
+
+@dataclass
+class _Holding:
+    quantity: int = 0
+    available: int = 0
+    cost: float = 0.0  # 持仓总成本（含费用）
+
+
+class PaperBroker:
+    """进程内模拟券商"""
+    
+    def __init__(
+        self,
+        cash: float = 1_000_000.0,
+        latency: float = 0.0,
+        slippage: float = 0.001,
+        fill_ratio: float = 1.0,
+        costs: BacktestConfig = None,
+        match_interval: float = 0.05
+    ):
+        """
+        Args:
+            cash: 初始资金
+            latency: 委托到可成交的延迟（秒，按 clock 计时，回放时为模拟时间）
+            slippage: 滑点比例，买入价上浮、卖出价下浮
+            fill_ratio: 每次撮合最多成交剩余数量的比例
+            costs: 费用与每手股数，默认 BacktestConfig()
+            match_interval: 后台撮合线程的间隔（秒）
+        """
+        self.cash = cash
+        self.latency = latency
+        self.slippage = slippage
+        self.fill_ratio = fill_ratio
+        self.costs = costs or BacktestConfig()
+        self.match_interval = match_interval
+        self.clock: Callable[[], datetime] = datetime.now
+        self.fill_callback: Optional[FillCallback] = None
+        self.latencies: List[float] = []  # 每笔委托 报单到首次成交 的墙钟耗时（秒）
+        self._holdings: Dict[str, _Holding] = {}
+        self._entrusts: Dict[str, _Entrust] = {}
+        self._snapshot: Optional[SpotSnapshot] = None
+        self._ids = itertools.count(1)
+        self._day: Optional[date] = None
+        self._lock = threading.RLock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+    
+    @classmethod
+    def from_config(cls, config: TradingConfig, costs: BacktestConfig = None) -> "PaperBroker":
+        """按交易配置创建"""
+        return cls(
+            cash=config.paper_cash,
+            latency=config.paper_latency,
+            slippage=config.paper_slippage,
+            fill_ratio=config.paper_fill_ratio,
+            costs=costs
+        )
+    
+    def _roll_day(self, now: datetime):
+        """跨日时当日买入的持仓变为可用"""
+        if self._day == now.date():
+            return
+        self._day = now.date()
+        for holding in self._holdings.values():
+            holding.available = holding.quantity
+    
+    def _fee(self, value: float, side: int) -> float:
+        fee = max(value * self.costs.commission_rate, self.costs.min_commission)
+        if side < 0:
+            fee += value * self.costs.stamp_duty
+        return fee
+    
+    def _fill_fee(self, entrust: _Entrust, value: float) -> float:
+        """本次成交的费用：佣金按累计成交额计算后扣除已收部分，最低佣金只收一次"""
+        commission = max((entrust.traded + value) * self.costs.commission_rate, self.costs.min_commission)
+        commission -= entrust.commission
+        entrust.traded += value
+        entrust.commission += commission
+        if entrust.side < 0:
+            return commission + value * self.costs.stamp_duty
+        return commission
+    
+    def _quote(self, symbol: str) -> Optional[float]:
+        return self._snapshot.price(symbol) if self._snapshot is not None else None
+    
+    @property
+    def balance(self) -> Dict:
+        """资金"""
+        with self._lock:
+            market_value = sum(
+                h.quantity * (self._quote(s) or (h.cost / h.quantity if h.quantity else 0.0))
+                for s, h in self._holdings.items()
+            )
+            frozen = sum(e.frozen for e in self._entrusts.values())
+            return {
+                "资金余额": self.cash + frozen,
+                "可用金额": self.cash,
+                "冻结金额": frozen,
+                "股票市值": market_value,
+                "总资产": self.cash + frozen + market_value,
+            }
+    
+    @property
+    def position(self) -> List[Dict]:
+        """持仓"""
+        with self._lock:
+            self._roll_day(self.clock())
+            result = []
+            for symbol, h in self._holdings.items():
+                if h.quantity <= 0:
+                    continue
+                price = self._quote(symbol) or h.cost / h.quantity
+                result.append({
+                    "证券代码": symbol,
+                    "股票余额": h.quantity,
+                    "可用余额": h.available - self._pending_sell(symbol),
+                    "成本价": h.cost / h.quantity,
+                    "市价": price,
+                    "市值": price * h.quantity,
+                })
+            return result
+    
+    def _pending_sell(self, symbol: str) -> int:
+        return sum(
+            e.remaining for e in self._entrusts.values()
+            if e.symbol == symbol and e.side < 0 and e.status in ("已报", "部成")
+        )
+    
+    def _entrust(self, symbol: str, side: int, price: float, amount: int) -> Dict:
+        amount = int(amount)
+        if amount <= 0 or price <= 0:
+            raise ValueError(f"委托价格或数量无效: {price} x {amount}")
+        with self._lock:
+            now = self.clock()
+            self._roll_day(now)
+            entrust = _Entrust(f"P{next(self._ids):08d}", symbol, side, float(price), amount, now, time.monotonic())
+            if side > 0:
+                # 按滑点后的价格加费用冻结
+                value = price * (1 + self.slippage) * amount
+                need = value + self._fee(value, side)
+                if need > self.cash:
+                    raise ValueError(f"可用资金不足: 需要 {need:.2f}，可用 {self.cash:.2f}")
+                self.cash -= need
+                entrust.frozen = need
+            else:
+                holding = self._holdings.get(symbol)
+                available = (holding.available if holding else 0) - self._pending_sell(symbol)
+                if amount > available:
+                    raise ValueError(f"{symbol} 可用持仓不足: 委托 {amount}，可用 {available}")
+            self._entrusts[entrust.entrust_no] = entrust
+        return {"entrust_no": entrust.entrust_no}
+    
+    def buy(self, security: str, price: float, amount: int) -> Dict:
+        """买入委托"""
+        return self._entrust(security, 1, price, amount)
+    
+    def sell(self, security: str, price: float, amount: int) -> Dict:
+        """卖出委托"""
+        return self._entrust(security, -1, price, amount)
+    
+    def cancel_entrust(self, entrust_no: str) -> Dict:
+        """撤单（已成交部分保留）"""
+        with self._lock:
+            entrust = self._entrusts.get(entrust_no)
+            if entrust is None or entrust.status not in ("已报", "部成"):
+                return {"message": "委托不存在或已结束"}
+            entrust.status = "已撤" if entrust.filled == 0 else "部撤"
+            self.cash += entrust.frozen
+            entrust.frozen = 0.0
+            return {"message": "撤单成功"}
+    
+    def cancel_entrusts(self):
+        """撤销所有未完成委托"""
+        with self._lock:
+            for entrust_no in list(self._entrusts):
+                self.cancel_entrust(entrust_no)
+    
+    @property
+    def today_entrusts(self) -> List[Dict]:
+        """当日委托"""
+        with self._lock:
+            return [{
+                "合同编号": e.entrust_no,
+                "证券代码": e.symbol,
+                "操作": "买入" if e.side > 0 else "卖出",
+                "委托价格": e.price,
+                "委托数量": e.amount,
+                "成交数量": e.filled,
+                "备注": e.status,
+            } for e in self._entrusts.values()]
+    
+    @property
+    def today_trades(self) -> List[Dict]:
+        """当日成交"""
+        with self._lock:
+            return [{
+                "合同编号": e.entrust_no,
+                "证券代码": e.symbol,
+                "操作": "买入" if e.side > 0 else "卖出",
+                "成交价格": price,
+                "成交数量": quantity,
+                "手续费": fee,
+            } for e in self._entrusts.values() for quantity, price, fee in e.fills]
+    
+    def on_snapshot(self, snapshot: SpotSnapshot):
+        """推入最新行情并撮合"""
+        self._snapshot = snapshot
+        self.match()
+    
+    def _fill_quantity(self, entrust: _Entrust) -> int:
+        if self.fill_ratio >= 1:
+            return entrust.remaining
+        lot = self.costs.lot_size
+        quantity = math.ceil(entrust.amount * self.fill_ratio / lot) * lot
+        return min(max(quantity, lot), entrust.remaining)
+    
+    def match(self) -> int:
+        """
+        撮合到期的委托
+        
+        Returns:
+            int: 本次成交笔数
+        """
+        fills = []
+        with self._lock:
+            now = self.clock()
+            self._roll_day(now)
+            for entrust in self._entrusts.values():
+                if entrust.status not in ("已报", "部成"):
+                    continue
+                if (now - entrust.created).total_seconds() < self.latency:
+                    continue
+                quote = self._quote(entrust.symbol)
+                if quote is None or (quote - entrust.price) * entrust.side > 0:
+                    # 无行情，或买入时行情高于限价 / 卖出时低于限价
+                    continue
+                
+                quantity = self._fill_quantity(entrust)
+                price = quote * (1 + self.slippage * entrust.side)
+                # 加滑点后不超出限价
+                price = min(price, entrust.price) if entrust.side > 0 else max(price, entrust.price)
+                value = price * quantity
+                fee = self._fill_fee(entrust, value)
+                holding = self._holdings.setdefault(entrust.symbol, _Holding())
+                if entrust.side > 0:
+                    holding.quantity += quantity
+                    holding.cost += value + fee
+                    entrust.frozen -= value + fee
+                    if entrust.filled + quantity == entrust.amount:
+                        self.cash += entrust.frozen  # 剩余冻结（价格差）退回
+                        entrust.frozen = 0.0
+                else:
+                    cost = holding.cost * quantity / holding.quantity
+                    holding.quantity -= quantity
+                    holding.available -= quantity
+                    holding.cost -= cost
+                    self.cash += value - fee
+                
+                if entrust.filled == 0:
+                    self.latencies.append(time.monotonic() - entrust.submitted_at)
+                entrust.filled += quantity
+                entrust.status = "已成" if entrust.remaining == 0 else "部成"
+                entrust.fills.append((quantity, price, fee))
+                fills.append((entrust.entrust_no, quantity, price, fee))
+        
+        # 回调在锁外执行，避免与调用方的锁互相等待
+        if self.fill_callback is not None:
+            for fill in fills:
+                try:
+                    self.fill_callback(*fill)
+                except Exception as e:
+                    log.error(f"成交回报处理出错: {e}")
+        return len(fills)
+    
+    def stats(self) -> Dict:
+        """委托/成交统计与 报单到成交 延迟分位数（毫秒）"""
+        with self._lock:
+            entrusts = list(self._entrusts.values())
+            latencies = np.array(self.latencies) * 1000
+        result = {
+            "entrusts": len(entrusts),
+            "filled": sum(e.status == "已成" for e in entrusts),
+            "partial": sum(e.status in ("部成", "部撤") for e in entrusts),
+            "fills": sum(len(e.fills) for e in entrusts),
+        }
+        if len(latencies):
+            result.update({
+                "latency_p50_ms": float(np.percentile(latencies, 50)),
+                "latency_p99_ms": float(np.percentile(latencies, 99)),
+                "latency_max_ms": float(latencies.max()),
+            })
+        return result
+    
+    def _match_loop(self):
+        while not self._stop_event.wait(self.match_interval):
+            try:
+                self.match()
+            except Exception as e:
+                log.error(f"模拟撮合出错: {e}")
+    
+    def start(self):
+        """启动后台撮合线程"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._match_loop, name="paper-broker", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """停止后台撮合线程"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
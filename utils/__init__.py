@@ -1,3 +1,3 @@
-from .logger import log, setup_logger
+from .logger import log, setup_logger, PROFILES
 
-__all__ = ['log', 'setup_logger']
+__all__ = ['log', 'setup_logger', 'PROFILES']
@@ -1,30 +1,48 @@
 """
 日志管理模块
-"""
-import os
 
-# 清除代理环境变量
-for key in list(os.environ.keys()):
-    if 'proxy' in key.lower():
-        del os.environ[key]
+日志方案（profile）：
+- default: 控制台 INFO，文件 DEBUG，同步写入
+- production: 控制台 INFO，文件 INFO，sink 经队列由后台线程写入，调用方不等待磁盘 IO
+- quiet: 回测用，只输出 WARNING 及以上（同样异步写入），回测过程中的 INFO/DEBUG 日志在入口处直接返回
 
+回测等热点路径的日志使用 loguru 的参数形式 log.info("{} ...", value)，消息只在级别生效时才格式化。
+"""
 from loguru import logger
 import sys
 from pathlib import Path
+from config.settings import config
 
+# 日志方案: (控制台级别, 文件级别, 是否异步写入)
+PROFILES = {
+    "default": ("INFO", "DEBUG", False),
+    "production": ("INFO", "INFO", True),
+    "quiet": ("WARNING", "WARNING", True),
+}
 
-def setup_logger(log_dir: str = "logs"):
-    """配置日志"""
+
+def setup_logger(log_dir: str = "logs", profile: str = "default"):
+    """
+    配置日志
+    
+    Args:
+        log_dir: 日志文件目录
+        profile: 日志方案，见 PROFILES
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"未知的日志方案: {profile}，可选 {list(PROFILES)}")
+    console_level, file_level, enqueue = PROFILES[profile]
     Path(log_dir).mkdir(exist_ok=True)
     
-    # 移除默认handler
+    # 移除默认handler（异步 sink 移除时会先写完队列中的日志）
     logger.remove()
     
     # 控制台输出
     logger.add(
         sys.stdout,
         format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
-        level="INFO"
+        level=console_level,
+        enqueue=enqueue
     )
     
     # 文件输出
@@ -32,10 +50,11 @@ def setup_logger(log_dir: str = "logs"):
         f"{log_dir}/trading_{{time:YYYY-MM-DD}}.log",
         rotation="00:00",
         retention="30 days",
-        level="DEBUG"
+        level=file_level,
+        enqueue=enqueue
     )
     
     return logger
 
 
-log = setup_logger()
+log = setup_logger(config.log.log_dir, config.log.profile)
@@ -6,10 +6,19 @@ PushPlus 微信通知模块
 2. 复制 Token
 3. 关注「pushplus推送加」公众号
 4. 调用 send() 方法发送消息
+
+在交易链路中使用 AsyncPushPlusNotifier：调用立即返回，消息由后台线程限流、重试后发送，
+短时间内的多个交易信号合并为一条汇总消息。
 """
+import queue
+import threading
+import time
 import requests
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import datetime
+from utils.logger import log
+from utils.ratelimit import RateLimiter
+from utils.templates import DISCLAIMER, ROW_SEPARATORS, STYLES, TEMPLATES, render_rows
 
 
 class PushPlusNotifier:
@@ -17,14 +26,24 @@ class PushPlusNotifier:
     
     API_URL = "http://www.pushplus.plus/send"
     
-    def __init__(self, token: str):
+    def __init__(self, token: str, api_url: str = None, timeout: float = 10, style: str = "html"):
         """
         初始化通知器
         
         Args:
             token: PushPlus 的 token，从 https://www.pushplus.plus/ 获取
+            api_url: 接口地址，默认 API_URL（测试时可指向本地服务）
+            timeout: 请求超时秒数
+            style: 交易信号和日报的消息格式，html / markdown / txt（后两者更紧凑）
         """
+        if style not in STYLES:
+            raise ValueError(f"不支持的消息格式: {style}")
         self.token = token
+        self.style = style
+        self._templates = TEMPLATES[style]
+        self.api_url = api_url or self.API_URL
+        self.timeout = timeout
+        self.session = requests.Session()  # 复用 HTTP 连接
     
     def send(
         self,
@@ -51,10 +70,14 @@ class PushPlusNotifier:
                 - webhook: 第三方webhook
                 - cp: 企业微信
                 - mail: 邮件
-                
+        
         Returns:
             dict: 返回结果 {"code": 200, "msg": "success", "data": "..."}
         """
+        return self._post(self._payload(title, content, template, topic, channel))
+    
+    def _payload(self, title: str, content: str, template: str = "html", topic: str = "", channel: str = "wechat") -> dict:
+        """请求体"""
         data = {
             "token": self.token,
             "title": title,
@@ -66,18 +89,23 @@ class PushPlusNotifier:
             data["topic"] = topic
         if channel != "wechat":
             data["channel"] = channel
-        
+        return data
+    
+    def _post(self, data: dict) -> dict:
+        """发送请求；网络错误、超时和服务端 5xx 返回 code -1"""
         try:
-            response = requests.post(self.API_URL, json=data, timeout=10)
+            response = self.session.post(self.api_url, json=data, timeout=self.timeout)
+            if response.status_code >= 500:
+                raise requests.HTTPError(f"HTTP {response.status_code}")
             result = response.json()
             
             if result.get("code") == 200:
-                print(f"✅ 消息发送成功: {title}")
+                print(f"✅ 消息发送成功: {data['title']}")
             else:
                 print(f"❌ 消息发送失败: {result.get('msg')}")
             
             return result
-            
+        
         except requests.exceptions.Timeout:
             print("❌ 请求超时")
             return {"code": -1, "msg": "请求超时"}
@@ -115,47 +143,35 @@ class PushPlusNotifier:
             reason: 触发原因
             quantity: 交易数量（可选）
         """
+        title, content = self._trade_signal_message(symbol, signal_type, price, reason, quantity)
+        return self.send(title, content, template=self.style)
+    
+    def _trade_signal_message(
+        self,
+        symbol: str,
+        signal_type: str,
+        price: float,
+        reason: str = "",
+        quantity: int = None
+    ) -> tuple:
+        """交易信号通知的标题和内容"""
         is_buy = signal_type.lower() == "buy"
         emoji = "🟢" if is_buy else "🔴"
         action = "买入" if is_buy else "卖出"
-        color = "#07C160" if is_buy else "#FA5151"
         
         title = f"{emoji} {symbol} {action}信号"
-        
-        # 使用 HTML 模板，更美观
-        content = f"""
-        <div style="padding: 15px; font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;">
-            <h2 style="color: {color}; margin-bottom: 20px;">{emoji} 交易信号</h2>
-            <table style="width: 100%; border-collapse: collapse;">
-                <tr style="border-bottom: 1px solid #eee;">
-                    <td style="padding: 10px 0; color: #666;">股票代码</td>
-                    <td style="padding: 10px 0; font-weight: bold;">{symbol}</td>
-                </tr>
-                <tr style="border-bottom: 1px solid #eee;">
-                    <td style="padding: 10px 0; color: #666;">信号类型</td>
-                    <td style="padding: 10px 0; font-weight: bold; color: {color};">{action}</td>
-                </tr>
-                <tr style="border-bottom: 1px solid #eee;">
-                    <td style="padding: 10px 0; color: #666;">当前价格</td>
-                    <td style="padding: 10px 0; font-weight: bold;">¥{price:.2f}</td>
-                </tr>
-                {"<tr style='border-bottom: 1px solid #eee;'><td style='padding: 10px 0; color: #666;'>交易数量</td><td style='padding: 10px 0;'>" + str(quantity) + " 股</td></tr>" if quantity else ""}
-                <tr style="border-bottom: 1px solid #eee;">
-                    <td style="padding: 10px 0; color: #666;">触发原因</td>
-                    <td style="padding: 10px 0;">{reason or "策略触发"}</td>
-                </tr>
-                <tr>
-                    <td style="padding: 10px 0; color: #666;">触发时间</td>
-                    <td style="padding: 10px 0;">{datetime.now().strftime("%Y-%m-%d %H:%M:%S")}</td>
-                </tr>
-            </table>
-            <p style="margin-top: 20px; color: #999; font-size: 12px;">
-                ⚠️ 此消息由量化交易系统自动发送，仅供参考，不构成投资建议
-            </p>
-        </div>
-        """
-        
-        return self.send_html(title, content)
+        content = self._templates["signal"].render(
+            emoji=emoji,
+            action=action,
+            color="#07C160" if is_buy else "#FA5151",
+            symbol=symbol,
+            price=f"{price:.2f}",
+            quantity_row=self._templates["quantity_row"].render(quantity=quantity) if quantity else "",
+            reason=reason or "策略触发",
+            time=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            disclaimer=DISCLAIMER
+        )
+        return title, content
     
     def send_daily_report(
         self,
@@ -175,52 +191,190 @@ class PushPlusNotifier:
         """
         title = f"📊 每日交易报告 {datetime.now().strftime('%m-%d')}"
         
-        position_rows = ""
-        for pos in positions:
-            profit_color = "#07C160" if pos.get("profit", 0) >= 0 else "#FA5151"
-            position_rows += f"""
-            <tr style="border-bottom: 1px solid #eee;">
-                <td style="padding: 8px;">{pos.get('symbol', '')}</td>
-                <td style="padding: 8px;">{pos.get('name', '')}</td>
-                <td style="padding: 8px; color: {profit_color};">{pos.get('profit', 0):+.2%}</td>
-            </tr>
-            """
+        templates = self._templates
+        # 字段顺序见 utils.templates.ROW_FIELDS
+        rows = render_rows(templates["position_row"], [
+            (
+                pos.get("symbol", ""),
+                pos.get("name", ""),
+                "#07C160" if pos.get("profit", 0) >= 0 else "#FA5151",
+                f"{pos.get('profit', 0):+.2%}",
+            )
+            for pos in positions
+        ], ROW_SEPARATORS[self.style])
         
-        content = f"""
-        <div style="padding: 15px; font-family: -apple-system, BlinkMacSystemFont, sans-serif;">
-            <h2 style="margin-bottom: 20px;">📊 每日交易报告</h2>
-            
-            <div style="display: flex; margin-bottom: 20px;">
-                <div style="flex: 1; text-align: center; padding: 15px; background: #f5f5f5; border-radius: 8px; margin-right: 10px;">
-                    <div style="color: #666; font-size: 12px;">总收益率</div>
-                    <div style="font-size: 24px; font-weight: bold; color: {'#07C160' if total_profit >= 0 else '#FA5151'};">
-                        {total_profit:+.2%}
-                    </div>
-                </div>
-                <div style="flex: 1; text-align: center; padding: 15px; background: #f5f5f5; border-radius: 8px;">
-                    <div style="color: #666; font-size: 12px;">今日收益</div>
-                    <div style="font-size: 24px; font-weight: bold; color: {'#07C160' if today_profit >= 0 else '#FA5151'};">
-                        {today_profit:+.2%}
-                    </div>
-                </div>
-            </div>
+        content = templates["report"].render(
+            total_color="#07C160" if total_profit >= 0 else "#FA5151",
+            total_profit=f"{total_profit:+.2%}",
+            today_color="#07C160" if today_profit >= 0 else "#FA5151",
+            today_profit=f"{today_profit:+.2%}",
+            rows=rows or templates["no_positions"].source,
+            trades_today=trades_today,
+            time=datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        )
+        
+        return self.send(title, content, template=self.style)
+
+
+class AsyncPushPlusNotifier(PushPlusNotifier):
+    """
+    后台发送的 PushPlus 通知器
+    
+    - send 系列方法只把消息放入有界队列即返回，队列满时丢弃并记录日志
+    - 后台线程复用 HTTP 连接，按令牌桶限流发送，网络错误按指数退避重试
+    - send_trade_signal 在 digest_window 秒内的多个信号合并为一条汇总消息
+    """
+    
+    def __init__(
+        self,
+        token: str,
+        api_url: str = None,
+        timeout: float = 10,
+        style: str = "html",
+        maxsize: int = 100,
+        rate: float = 0.5,
+        burst: int = 3,
+        max_retries: int = 3,
+        backoff: float = 1.0,
+        digest_window: float = 5.0
+    ):
+        """
+        Args:
+            maxsize: 队列容量
+            rate: 每秒最多发送的消息数（PushPlus 有频率和每日条数限制）
+            burst: 允许的突发条数
+            max_retries: 网络错误重试次数
+            backoff: 重试初始等待秒数
+            digest_window: 交易信号合并窗口（秒），0 表示逐条发送
+        """
+        super().__init__(token, api_url, timeout, style)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.digest_window = digest_window
+        self.stats = {"queued": 0, "sent": 0, "failed": 0, "dropped": 0, "digested": 0}
+        self._queue: queue.Queue = queue.Queue(maxsize)
+        self._limiter = RateLimiter(rate, burst)
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="notifier", daemon=True)
+        self._thread.start()
+    
+    def _enqueue(self, item) -> dict:
+        if self._closed.is_set():
+            return {"code": -1, "msg": "通知器已关闭"}
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.stats["dropped"] += 1
+            log.warning("通知队列已满，丢弃消息")
+            return {"code": -1, "msg": "通知队列已满"}
+        self.stats["queued"] += 1
+        return {"code": 202, "msg": "已加入发送队列"}
+    
+    def _post(self, data: dict) -> dict:
+        # send 系列方法经由此处入队，真正的请求在后台线程中执行
+        return self._enqueue(("message", data))
+    
+    def send_trade_signal(
+        self,
+        symbol: str,
+        signal_type: str,
+        price: float,
+        reason: str = "",
+        quantity: int = None
+    ) -> dict:
+        """交易信号通知（合并窗口内的信号汇总为一条消息）"""
+        if self.digest_window <= 0:
+            return super().send_trade_signal(symbol, signal_type, price, reason, quantity)
+        return self._enqueue(("signal", {
+            "symbol": symbol,
+            "signal_type": signal_type,
+            "price": price,
+            "reason": reason,
+            "quantity": quantity,
+            "time": datetime.now(),
+        }))
+    
+    def _deliver(self, data: dict) -> dict:
+        """限流发送，网络错误重试"""
+        for attempt in range(self.max_retries + 1):
+            self._limiter.acquire()
+            result = PushPlusNotifier._post(self, data)
+            if result.get("code") != -1:
+                break
+            if attempt < self.max_retries:
+                wait = self.backoff * 2 ** attempt
+                log.warning(f"通知发送失败（{result.get('msg')}），{wait:.1f} 秒后重试")
+                self._closed.wait(wait)
+        self.stats["sent" if result.get("code") == 200 else "failed"] += 1
+        return result
+    
+    def _flush_signals(self, signals: List[Dict]):
+        """发送合并的交易信号"""
+        if len(signals) == 1:
+            # 单条信号使用原来的详细格式
+            s = signals[0]
+            title, content = self._trade_signal_message(s["symbol"], s["signal_type"], s["price"], s["reason"], s["quantity"])
+            data = self._payload(title, content, self.style)
+        else:
+            data = self._digest_message(signals)
+            self.stats["digested"] += len(signals)
+        self._deliver(data)
+    
+    def _digest_message(self, signals: List[Dict]) -> dict:
+        """多个交易信号的汇总消息"""
+        buys = sum(s["signal_type"].lower() == "buy" for s in signals)
+        # 字段顺序见 utils.templates.ROW_FIELDS
+        rows = []
+        for s in signals:
+            is_buy = s["signal_type"].lower() == "buy"
+            rows.append((
+                f"{s['time']:%H:%M:%S}",
+                s["symbol"],
+                "#07C160" if is_buy else "#FA5151",
+                "买入" if is_buy else "卖出",
+                f"{s['price']:.2f}",
+                s["quantity"] or "",
+                s["reason"] or "策略触发",
+            ))
+        content = self._templates["digest"].render(
+            count=len(signals),
+            rows=render_rows(self._templates["digest_row"], rows, ROW_SEPARATORS[self.style]),
+            disclaimer=DISCLAIMER
+        )
+        title = f"📣 交易信号汇总：买入 {buys} / 卖出 {len(signals) - buys}"
+        return self._payload(title, content, self.style)
+    
+    def _run(self):
+        signals: List[Dict] = []
+        deadline: Optional[float] = None
+        while True:
+            timeout = 0.5 if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                kind, payload = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                kind = payload = None
             
-            <h3 style="margin-bottom: 10px;">📈 当前持仓</h3>
-            <table style="width: 100%; border-collapse: collapse; margin-bottom: 20px;">
-                <tr style="background: #f5f5f5;">
-                    <th style="padding: 8px; text-align: left;">代码</th>
-                    <th style="padding: 8px; text-align: left;">名称</th>
-                    <th style="padding: 8px; text-align: left;">盈亏</th>
-                </tr>
-                {position_rows if position_rows else "<tr><td colspan='3' style='padding: 20px; text-align: center; color: #999;'>暂无持仓</td></tr>"}
-            </table>
+            if kind == "message":
+                self._deliver(payload)
+            elif kind == "signal":
+                signals.append(payload)
+                if deadline is None:
+                    deadline = time.monotonic() + self.digest_window
             
-            <p style="color: #666;">今日交易: {trades_today} 笔</p>
-            <p style="color: #999; font-size: 12px;">报告时间: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}</p>
-        </div>
-        """
-        
-        return self.send_html(title, content)
+            stopping = kind == "stop"
+            if signals and (stopping or time.monotonic() >= deadline):
+                self._flush_signals(signals)
+                signals, deadline = [], None
+            if stopping:
+                return
+    
+    def close(self, timeout: float = 30):
+        """发送完队列中的消息（含未到窗口的信号）后停止后台线程"""
+        if self._closed.is_set():
+            return
+        self._queue.put(("stop", None))
+        self._thread.join(timeout)
+        self._closed.set()
 
 
 # 便捷函数
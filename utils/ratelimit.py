@@ -0,0 +1,35 @@
+"""
+限流工具 - 线程安全的令牌桶
+"""
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    令牌桶限流器
+    
+    rate 为每秒允许的请求数，burst 为允许的突发请求数；rate <= 0 表示不限流。
+    """
+    
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """获取一个令牌，必要时阻塞等待"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
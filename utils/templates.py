@@ -0,0 +1,228 @@
+"""
+通知消息模板
+
+每种消息布局在模块加载时解析一次：$name 占位符转换为按字段序号的 str.format 格式串，渲染时不再解析模板；
+列表类内容（持仓、信号汇总）逐行渲染后一次性 join，不做逐行字符串拼接。
+HTML 模板解析时去掉标签之间的缩进和换行，markdown/txt 为紧凑格式，消息体更小。
+"""
+import re
+from typing import Dict, Iterable, Mapping
+
+STYLES = ("html", "markdown", "txt")
+
+DISCLAIMER = "⚠️ 此消息由量化交易系统自动发送，仅供参考，不构成投资建议"
+
+
+class MessageTemplate:
+    """解析后的消息模板"""
+    
+    def __init__(self, source: str, fields: tuple = None):
+        """
+        Args:
+            source: 模板文本，$name 为占位符
+            fields: 按位置传值（render_row）时的字段顺序，须包含所有占位符，默认按出现顺序
+        """
+        self.source = source
+        placeholders = tuple(dict.fromkeys(re.findall(r"\$(\w+)", source)))
+        if fields is not None:
+            missing = set(placeholders) - set(fields)
+            if missing:
+                raise ValueError(f"模板占位符未在 fields 中: {missing}")
+        self.fields = tuple(fields) if fields is not None else placeholders
+        # 字面部分转义花括号，$name 替换为字段序号 {i}，渲染时只做一次 str.format
+        index = {name: i for i, name in enumerate(self.fields)}
+        escaped = source.replace("{", "{{").replace("}", "}}")
+        self._format = re.sub(r"\$(\w+)", lambda m: f"{{{index[m.group(1)]}}}", escaped)
+    
+    def render(self, values: Mapping = None, **kwargs) -> str:
+        """替换占位符（多余的键忽略）"""
+        values = kwargs if values is None else values
+        return self._format.format(*[values[name] for name in self.fields])
+    
+    def render_row(self, *values) -> str:
+        """按 fields 的顺序传值渲染（逐行渲染列表时使用）"""
+        return self._format.format(*values)
+
+
+def compile_template(source: str, html: bool = False, fields: tuple = None) -> MessageTemplate:
+    """解析模板；HTML 去掉标签之间的空白，其余格式只去掉每行的缩进"""
+    if html:
+        return MessageTemplate(re.sub(r">\s+<", "><", source.strip()), fields)
+    return MessageTemplate("\n".join(line.strip() for line in source.strip().splitlines()), fields)
+
+
+def render_rows(template: MessageTemplate, rows: Iterable[tuple], sep: str = "") -> str:
+    """
+    逐行渲染并一次性拼接
+    
+    Args:
+        rows: 每行的字段值，顺序同 template.fields（行模板见 ROW_FIELDS）
+    """
+    render_row = template.render_row
+    return sep.join([render_row(*row) for row in rows])
+
+
+_HTML = {
+    "signal": """
+        <div style="padding: 15px; font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;">
+            <h2 style="color: $color; margin-bottom: 20px;">$emoji 交易信号</h2>
+            <table style="width: 100%; border-collapse: collapse;">
+                <tr style="border-bottom: 1px solid #eee;">
+                    <td style="padding: 10px 0; color: #666;">股票代码</td>
+                    <td style="padding: 10px 0; font-weight: bold;">$symbol</td>
+                </tr>
+                <tr style="border-bottom: 1px solid #eee;">
+                    <td style="padding: 10px 0; color: #666;">信号类型</td>
+                    <td style="padding: 10px 0; font-weight: bold; color: $color;">$action</td>
+                </tr>
+                <tr style="border-bottom: 1px solid #eee;">
+                    <td style="padding: 10px 0; color: #666;">当前价格</td>
+                    <td style="padding: 10px 0; font-weight: bold;">¥$price</td>
+                </tr>
+                $quantity_row
+                <tr style="border-bottom: 1px solid #eee;">
+                    <td style="padding: 10px 0; color: #666;">触发原因</td>
+                    <td style="padding: 10px 0;">$reason</td>
+                </tr>
+                <tr>
+                    <td style="padding: 10px 0; color: #666;">触发时间</td>
+                    <td style="padding: 10px 0;">$time</td>
+                </tr>
+            </table>
+            <p style="margin-top: 20px; color: #999; font-size: 12px;">$disclaimer</p>
+        </div>
+    """,
+    "quantity_row": """
+        <tr style="border-bottom: 1px solid #eee;">
+            <td style="padding: 10px 0; color: #666;">交易数量</td>
+            <td style="padding: 10px 0;">$quantity 股</td>
+        </tr>
+    """,
+    "report": """
+        <div style="padding: 15px; font-family: -apple-system, BlinkMacSystemFont, sans-serif;">
+            <h2 style="margin-bottom: 20px;">📊 每日交易报告</h2>
+            <div style="display: flex; margin-bottom: 20px;">
+                <div style="flex: 1; text-align: center; padding: 15px; background: #f5f5f5; border-radius: 8px; margin-right: 10px;">
+                    <div style="color: #666; font-size: 12px;">总收益率</div>
+                    <div style="font-size: 24px; font-weight: bold; color: $total_color;">$total_profit</div>
+                </div>
+                <div style="flex: 1; text-align: center; padding: 15px; background: #f5f5f5; border-radius: 8px;">
+                    <div style="color: #666; font-size: 12px;">今日收益</div>
+                    <div style="font-size: 24px; font-weight: bold; color: $today_color;">$today_profit</div>
+                </div>
+            </div>
+            <h3 style="margin-bottom: 10px;">📈 当前持仓</h3>
+            <table style="width: 100%; border-collapse: collapse; margin-bottom: 20px;">
+                <tr style="background: #f5f5f5;">
+                    <th style="padding: 8px; text-align: left;">代码</th>
+                    <th style="padding: 8px; text-align: left;">名称</th>
+                    <th style="padding: 8px; text-align: left;">盈亏</th>
+                </tr>
+                $rows
+            </table>
+            <p style="color: #666;">今日交易: $trades_today 笔</p>
+            <p style="color: #999; font-size: 12px;">报告时间: $time</p>
+        </div>
+    """,
+    "position_row": """
+        <tr style="border-bottom: 1px solid #eee;">
+            <td style="padding: 8px;">$symbol</td>
+            <td style="padding: 8px;">$name</td>
+            <td style="padding: 8px; color: $color;">$profit</td>
+        </tr>
+    """,
+    "no_positions": """
+        <tr><td colspan="3" style="padding: 20px; text-align: center; color: #999;">暂无持仓</td></tr>
+    """,
+    "digest": """
+        <div style="padding: 15px;">
+            <h2>📣 $count 个交易信号</h2>
+            <table style="width: 100%; border-collapse: collapse;">
+                <tr style="background: #f5f5f5;">
+                    <th>时间</th><th>代码</th><th>方向</th><th>价格</th><th>数量</th><th>原因</th>
+                </tr>
+                $rows
+            </table>
+            <p style="margin-top: 20px; color: #999; font-size: 12px;">$disclaimer</p>
+        </div>
+    """,
+    "digest_row": """
+        <tr style="border-bottom: 1px solid #eee;">
+            <td style="padding: 6px;">$time</td>
+            <td style="padding: 6px; font-weight: bold;">$symbol</td>
+            <td style="padding: 6px; color: $color;">$action</td>
+            <td style="padding: 6px;">¥$price</td>
+            <td style="padding: 6px;">$quantity</td>
+            <td style="padding: 6px;">$reason</td>
+        </tr>
+    """,
+}
+
+_MARKDOWN = {
+    "signal": """
+        **$emoji $action $symbol** ¥$price $quantity_row
+        原因: $reason
+        时间: $time
+    """,
+    "quantity_row": "× $quantity 股",
+    "report": """
+        **总收益** $total_profit | **今日** $today_profit | **今日交易** $trades_today 笔
+        
+        | 代码 | 名称 | 盈亏 |
+        |---|---|---|
+        $rows
+        
+        $time
+    """,
+    "position_row": "| $symbol | $name | $profit |",
+    "no_positions": "| - | 暂无持仓 | - |",
+    "digest": """
+        **$count 个交易信号**
+        
+        | 时间 | 代码 | 方向 | 价格 | 数量 | 原因 |
+        |---|---|---|---|---|---|
+        $rows
+    """,
+    "digest_row": "| $time | $symbol | $action | $price | $quantity | $reason |",
+}
+
+_TXT = {
+    "signal": """
+        $emoji $action $symbol ¥$price $quantity_row
+        原因: $reason
+        时间: $time
+    """,
+    "quantity_row": "× $quantity 股",
+    "report": """
+        总收益 $total_profit，今日 $today_profit，今日交易 $trades_today 笔
+        $rows
+        $time
+    """,
+    "position_row": "$symbol $name $profit",
+    "no_positions": "暂无持仓",
+    "digest": """
+        $count 个交易信号
+        $rows
+    """,
+    "digest_row": "$time $action $symbol ¥$price $quantity $reason",
+}
+
+# 各格式行与行之间的分隔符
+ROW_SEPARATORS = {"html": "", "markdown": "\n", "txt": "\n"}
+
+# 行模板按位置传值的字段顺序（各格式一致，未用到的字段忽略）
+ROW_FIELDS = {
+    "position_row": ("symbol", "name", "color", "profit"),
+    "digest_row": ("time", "symbol", "color", "action", "price", "quantity", "reason"),
+}
+
+
+def _compile_all(sources: Dict[str, str], html: bool = False) -> Dict[str, MessageTemplate]:
+    return {name: compile_template(source, html, ROW_FIELDS.get(name)) for name, source in sources.items()}
+
+
+TEMPLATES: Dict[str, Dict[str, MessageTemplate]] = {
+    "html": _compile_all(_HTML, html=True),
+    "markdown": _compile_all(_MARKDOWN),
+    "txt": _compile_all(_TXT),
+}